@@ -2,20 +2,27 @@ import pandas as pd
 from typing import Dict, Any, List
 
 from .utils import (
-    load_player_features,
+    load_feature_store,
+    load_name_index,
     get_role_for_agent,
     ROLES
 )
-from .prediction import predict_player_performance, predict_match_outcome
+from .prediction import predict_players_performance, predict_match_outcome
 from ml_pipeline.meta_analysis import get_top_agents_for_map
 from ml_pipeline.counter_logic import find_best_counter, analyze_composition_weakness
 from ml_pipeline.prediction import suggest_best_agent, suggest_best_composition
 
-def analyze_team(players: List[Dict[str, str]], map_name: str) -> Dict[str, Any]:
+def analyze_team(players: List[Dict[str, str]], map_name: str,
+                 predictions: List[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Build the team block for the final JSON.
     players format: [{"name": "Player1", "agent": "Jett"}, ...]
+    predictions: precomputed predict_players_performance() results, one per player
+    (computed here in one batch if omitted).
     """
+    if predictions is None:
+        predictions = predict_players_performance([(p["name"], map_name, p["agent"]) for p in players])
+
     team_data = {
         "players": [],
         "summary": {
@@ -27,7 +34,7 @@ def analyze_team(players: List[Dict[str, str]], map_name: str) -> Dict[str, Any]
 
     total_rating = 0.0
     total_acs = 0.0
-    for p in players:
+    for p, player_pred in zip(players, predictions):
         name = p["name"]
         agent = p["agent"]
         role = get_role_for_agent(agent)
@@ -39,13 +46,8 @@ def analyze_team(players: List[Dict[str, str]], map_name: str) -> Dict[str, Any]
         else:
             team_data["summary"]["role_distribution"][role_key] = 1
 
-        # Profile basic metrics + prediction
-        player_pred = predict_player_performance(name, map_name, agent)
-        
         # Calculate Flexibility and Best/Worst role for the player using all history
-        player_feats = load_player_features()
-        mask = player_feats["player_name"].str.lower() == name.lower()
-        hist = player_feats[mask]
+        hist = load_feature_store().player_rows(name)
 
         best_role = "Unknown"
         worst_role = "Unknown"
@@ -120,12 +122,24 @@ def generate_insights(team_a_data: Dict[str, Any], team_b_data: Dict[str, Any])
     # Deduplicate and sort insights
     return list(dict.fromkeys(insights))
 
-def generate_reasoning(team_a_data: Dict[str, Any], team_b_data: Dict[str, Any]) -> List[str]:
+def generate_reasoning(team_a_data: Dict[str, Any], team_b_data: Dict[str, Any],
+                       model_reasoning: List[Dict[str, Any]] = None) -> List[str]:
     """
     Generate human-readable reasoning explaining why the model predicts as it does.
+    model_reasoning: the match model's top features by attribution, each
+    with the team it favours (from predict_match_outcome); without it, team
+    averages are compared instead.
     """
     reasoning = []
-    
+
+    if model_reasoning:
+        for r in model_reasoning:
+            if r["favours"] == "neither":
+                continue
+            reasoning.append(f"{r['label'][0].upper()}{r['label'][1:]} ({r['value']}) favours {r['favours']} "
+                             f"({r['contribution']:+.2f} log-odds).")
+        return reasoning + _role_gaps(team_a_data, team_b_data)
+
     # Rating comparison
     if team_a_data["summary"]["avg_rating"] > team_b_data["summary"]["avg_rating"]:
         reasoning.append("Team A has higher average rating based on historical performance.")
@@ -138,27 +152,34 @@ def generate_reasoning(team_a_data: Dict[str, Any], team_b_data: Dict[str, Any])
     elif team_b_data["summary"]["avg_acs"] > team_a_data["summary"]["avg_acs"]:
         reasoning.append("Team B shows stronger combat score (ACS).")
 
-    # Missing Roles Comparison
+    return reasoning + _role_gaps(team_a_data, team_b_data)
+
+def _role_gaps(team_a_data: Dict[str, Any], team_b_data: Dict[str, Any]) -> List[str]:
+    """Missing duelist/controller notes for both teams."""
+    gaps = []
     for team_name, team_info in [("Team A", team_a_data), ("Team B", team_b_data)]:
         roles = team_info["summary"]["role_distribution"]
         if roles.get("duelist", 0) == 0:
-            reasoning.append(f"{team_name} lacks a duelist.")
+            gaps.append(f"{team_name} lacks a duelist.")
         if roles.get("controller", 0) == 0:
-            reasoning.append(f"{team_name} lacks a controller (smokes).")
-
-    return reasoning
+            gaps.append(f"{team_name} lacks a controller (smokes).")
+    return gaps
 
 def process_match_query(team_a: List[Dict[str, str]], team_b: List[Dict[str, str]], map_name: str) -> Dict[str, Any]:
     """
     Produces final JSON matching output schema.
     """
-    ta_data = analyze_team(team_a, map_name)
-    tb_data = analyze_team(team_b, map_name)
+    # All 10 player predictions in a single model call
+    predictions = predict_players_performance(
+        [(p["name"], map_name, p["agent"]) for p in team_a + team_b]
+    )
+    ta_data = analyze_team(team_a, map_name, predictions[:len(team_a)])
+    tb_data = analyze_team(team_b, map_name, predictions[len(team_a):])
 
     match_probs = predict_match_outcome(team_a, team_b, map_name)
 
     insights = generate_insights(ta_data, tb_data)
-    reasoning = generate_reasoning(ta_data, tb_data)
+    reasoning = generate_reasoning(ta_data, tb_data, match_probs.get("model_reasoning"))
 
     # --- Prescriptive Analytics Integration ---
 
@@ -217,10 +238,18 @@ def process_match_query(team_a: List[Dict[str, str]], team_b: List[Dict[str, str
 def process_player_query(player_name: str) -> Dict[str, Any]:
     """
     Produces a full player profile module output.
+    The name is resolved with typo tolerance ("aspa" → "Aspas").
     """
-    player_feats = load_player_features()
-    mask = player_feats["player_name"].str.lower() == player_name.lower()
-    hist = player_feats[mask]
+    name_index = load_name_index()
+    resolved = name_index.resolve(player_name)
+    if resolved is None:
+        error = {"error": f"No data found for {player_name}"}
+        suggestions = name_index.suggest(player_name)
+        if suggestions:
+            error["suggestions"] = suggestions
+        return error
+    player_name = resolved
+    hist = load_feature_store().player_rows(player_name)
 
     if hist.empty:
         return {"error": f"No data found for {player_name}"}
@@ -268,7 +297,7 @@ def process_player_query(player_name: str) -> Dict[str, Any]:
     # --- Prescriptive Integration ---
     best_agent_res = suggest_best_agent(player_name, most_played_map)
     recommended_agent = None
-    if "suggestions" in best_agent_res and best_agent_res["suggestions"]:
+    if "error" not in best_agent_res and best_agent_res["suggestions"]:
         recommended_agent = best_agent_res["suggestions"][0]
 
     return {
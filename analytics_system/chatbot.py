@@ -3,12 +3,12 @@ from spacy.pipeline import EntityRuler
 from typing import List, Dict, Any, Optional
 import pandas as pd
 
-from .utils import load_player_features, AGENT_ROLE_MAP, ROLES
+from .utils import load_player_features, load_name_index, AGENT_ROLE_MAP, ROLES
 from .prediction import predict_player_performance, predict_match_outcome
 from .analysis import process_match_query, process_player_query
 from ml_pipeline.meta_analysis import get_top_agents_for_map
 from ml_pipeline.counter_logic import find_best_counter, analyze_composition_weakness
-from ml_pipeline.prediction import suggest_best_agent, suggest_best_composition
+from ml_pipeline.prediction import suggest_best_agent, suggest_best_composition, predict_series
 
 class ValorantChatbot:
     def __init__(self):
@@ -29,6 +29,9 @@ class ValorantChatbot:
         # Merge static maps with actual maps for coverage
         self.maps = sorted(list(set(["Bind", "Haven", "Split", "Ascent", "Icebox", "Breeze", "Fracture", "Pearl", "Lotus", "Sunset", "Abyss"] + self.actual_maps)))
         player_names = list(self.player_feats["player_name"].unique())
+        # Typo-tolerant resolution of player mentions to known names
+        self.name_index = load_name_index()
+        self._not_players = {w.casefold() for w in self.agents + self.maps}
 
         self.ruler = self.nlp.add_pipe("entity_ruler", before="ner")
 
@@ -54,16 +57,26 @@ class ValorantChatbot:
             elif ent.label_ == "MAP":
                 entities["maps"].append(ent.text)
             elif ent.label_ == "PERSON":
-                entities["players"].append(ent.text)
+                self._add_player(entities["players"], self.name_index.resolve(ent.text))
 
-        # Fallback for players: check Proper Nouns that aren't agents or maps
+        # Fallback for players: proper nouns may be misspelled player names;
+        # any other word only counts if it is spelled exactly like a player
+        # or shaped like a handle ("best" is not the player Best)
         for token in doc:
-            if token.pos_ == "PROPN" and token.text not in self.agents and token.text not in self.maps:
-                if token.text not in entities["players"]:
-                    entities["players"].append(token.text)
+            if token.text.casefold() in self._not_players:
+                continue
+            if token.pos_ == "PROPN":
+                self._add_player(entities["players"], self.name_index.resolve(token.text))
+            else:
+                self._add_player(entities["players"], self.name_index.resolve_word(token.text))
 
         return entities
 
+    def _add_player(self, players: List[str], name: Optional[str]):
+        """Append the known player `name`, if any and not already present."""
+        if name and name not in players:
+            players.append(name)
+
     def _determine_intent(self, text: str) -> str:
         text = text.lower()
         
@@ -222,9 +235,25 @@ class ValorantChatbot:
             team_a = build_team(team_a_names)
             team_b = build_team(team_b_names)
 
+            # No map given (or a series asked for): evaluate every pool map and
+            # veto a Bo3/Bo5; the detailed analysis uses the first map played
+            text = user_input.lower()
+            series = None
+            if not entities["maps"] or any(w in text for w in ["bo3", "bo5", "series"]):
+                series = predict_series(team_a, team_b, best_of=5 if "bo5" in text else 3)
+                if not entities["maps"]:
+                    map_name = series["maps"][0]["map"]
+
             res = process_match_query(team_a, team_b, map_name)
             win_prob = res["team_a_win_probability"] * 100
             result["response"] = f"Predicting {', '.join(team_a_names)} vs {', '.join(team_b_names)} on {map_name}... Team A has a {win_prob:.1f}% chance of winning."
+            if series:
+                played = ", ".join(m["map"] for m in series["maps"])
+                result["response"] += (
+                    f" Over a Bo{series['best_of']} with optimal vetoes ({played}), Team A wins the series "
+                    f"{series['series']['team_a_win_probability']:.1f}% of the time."
+                )
+                res["series"] = series
             
             # Add strategic steps to reasoning
             res["strategic_roadmap"] = [
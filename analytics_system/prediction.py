@@ -1,96 +1,95 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from .utils import (
     load_player_model,
     load_match_model,
-    load_player_features,
-    load_match_features,
+    load_model_schema,
+    load_fallback_index,
     get_role_for_agent,
     ROLES
 )
+from ml_pipeline.fallback_tables import PlayerFallbackIndex, player_key
+from ml_pipeline.prediction import match_reasoning
 
 
-def predict_player_performance(player_name: str, map_name: str, agent: str) -> Dict[str, Any]:
+# Used when a player has no history and even the agent/role priors are missing
+GENERIC_PLAYER_REF = {
+    "rating_total": 1.0, "acs_total": 200.0, "kd_ratio": 1.0,
+    "kast_total": 70.0, "adr_total": 130.0,
+}
+
+
+def predict_players_performance(queries: List[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
     """
-    Predict a player's performance (rating, ACS) on a given map with a given agent.
-    If exact historical data isn't found, falls back to map averages, then overall averages.
+    Batched predict_player_performance() for (player_name, map_name, agent) triples.
+    Features for every query are resolved at once and the model is called a single time.
     """
-    model = load_player_model()
-    player_feats = load_player_features()
-
-    role = get_role_for_agent(agent)
-
-    # Filter rules as requested: player name -> map -> agent
-    mask = (
-        (player_feats["player_name"].str.lower() == player_name.lower()) &
-        (player_feats["map"] == map_name) &
-        (player_feats["agent"] == agent)
-    )
-    hist = player_feats[mask]
-
-    # Fallback to map-only
-    if hist.empty:
-        mask_any = (
-            (player_feats["player_name"].str.lower() == player_name.lower()) &
-            (player_feats["map"] == map_name)
-        )
-        hist = player_feats[mask_any]
-
-    # Fallback to player only
-    if hist.empty:
-        mask_all = player_feats["player_name"].str.lower() == player_name.lower()
-        hist = player_feats[mask_all]
-
-    # If completely empty, use global generic averages
-    if hist.empty:
-        ref = pd.Series({
-            "rating_total": 1.0, "acs_total": 200, "kd_ratio": 1.0, 
-            "kast_total": 70, "adr_total": 130
-        })
-    else:
-        # Compute averages as requested
-        ref = hist.mean(numeric_only=True)
-
-    input_row = {
-        "map": map_name,
-        "agent": agent,
-        "role": role,
-    }
-
-    # Populate numerical features
-    # Get columns from the model's feature names (it's a pipeline, so we inspect preprocessor or just supply them)
-    # The original ML pipeline expects the same columns as in the dataframe minus target columns.
-    numeric_cols = [c for c in player_feats.columns if c not in 
-                    ["player_name", "map", "agent", "role", "rating_total", "acs_total", "date", "match_id"]]
-    
-    for col in numeric_cols:
-        input_row[col] = ref.get(col, 0)
+    if not queries:
+        return []
 
-    input_df = pd.DataFrame([input_row])
+    model = load_player_model()
+    schema = load_model_schema("player")
+    fallback = load_fallback_index()
+
+    keys = [player_key(name) for name, _, _ in queries]
+    roles = [get_role_for_agent(agent) for _, _, agent in queries]
+
+    # Filter rules as requested: player name -> map -> agent.
+    # Map-only and player-only fallbacks are precomputed averages.
+    levels, refs = fallback.resolve_many([
+        ("exact",       [(k, m, a) for k, (_, m, a) in zip(keys, queries)]),
+        ("player_map",  [(k, m) for k, (_, m, _) in zip(keys, queries)]),
+        ("player",      [(k,) for k in keys]),
+        ("agent_prior", [(a,) for _, _, a in queries]),
+        ("role_prior",  [(r,) for r in roles]),
+    ])
+
+    # If even the agent/role priors are missing, use global generic averages
+    missing = [i for i, level in enumerate(levels) if level is None]
+    if missing:
+        refs[missing] = [GENERIC_PLAYER_REF.get(c, schema.defaults.get(c, np.nan)) for c in fallback.columns]
+
+    # Build the input frame from the schema saved with the model; numeric
+    # features the reference rows lack get the training defaults
+    columns = dict(zip(fallback.columns, refs.T))
+    columns.update({
+        "map":   [m for _, m, _ in queries],
+        "agent": [a for _, _, a in queries],
+        "role":  roles,
+    })
 
-    # Ensure all required features are present
     try:
-        prediction = model.predict(input_df)
-        pred_rating = float(prediction[0][0])
-        pred_acs = float(prediction[0][1])
+        prediction = np.asarray(model.predict(schema.batch_input(model, columns, len(queries)))).reshape(len(queries), -1)
     except Exception as e:
         # Fallback if prediction fails
-        pred_rating = 1.0
-        pred_acs = 200.0
-
-    return {
-        "predicted_rating": round(pred_rating, 2),
-        "predicted_acs": round(pred_acs, 2),
-        "historical_avg_rating": round(ref.get("rating_total", 0), 2),
-        "historical_avg_acs": round(ref.get("acs_total", 0), 2),
-        "kd_ratio": round(ref.get("kd_ratio", 1.0), 2),
-        "kast": round(ref.get("kast_total", 70), 2),
-        "adr": round(ref.get("adr_total", 130), 2)
-    }
+        prediction = np.tile([1.0, 200.0], (len(queries), 1))
+
+    results = []
+    for i in range(len(queries)):
+        ref = dict(zip(fallback.columns, refs[i]))
+        results.append({
+            "predicted_rating": round(float(prediction[i][0]), 2),
+            "predicted_acs": round(float(prediction[i][1]), 2),
+            "historical_avg_rating": round(ref.get("rating_total", 0), 2),
+            "historical_avg_acs": round(ref.get("acs_total", 0), 2),
+            "kd_ratio": round(ref.get("kd_ratio", 1.0), 2),
+            "kast": round(ref.get("kast_total", 70), 2),
+            "adr": round(ref.get("adr_total", 130), 2)
+        })
+    return results
 
 
-def build_team_feature_vector(players: List[Dict[str, str]], prefix: str, player_feats: pd.DataFrame) -> Dict[str, float]:
+def predict_player_performance(player_name: str, map_name: str, agent: str) -> Dict[str, Any]:
+    """
+    Predict a player's performance (rating, ACS) on a given map with a given agent.
+    If exact historical data isn't found, falls back to map averages, then overall averages.
+    """
+    return predict_players_performance([(player_name, map_name, agent)])[0]
+
+
+def build_team_feature_vector(players: List[Dict[str, str]], prefix: str, fallback: PlayerFallbackIndex) -> Dict[str, float]:
     """
     Build raw statistics dict for a team.
     players format: [{"name": "Player1", "agent": "Jett"}, ...]
@@ -101,19 +100,16 @@ def build_team_feature_vector(players: List[Dict[str, str]], prefix: str, player
         name = p["name"]
         agent = p["agent"]
         role = get_role_for_agent(agent)
+        key = player_key(name)
 
-        mask = (
-            (player_feats["player_name"].str.lower() == name.lower()) &
-            (player_feats["agent"] == agent)
-        )
-        hist = player_feats[mask]
+        _, row = fallback.resolve([
+            ("player_agent", (key, agent)),
+            ("player",       (key,)),
+            ("agent_prior",  (agent,)),
+            ("role_prior",   (role,)),
+        ])
 
-        if hist.empty:
-            mask_any = player_feats["player_name"].str.lower() == name.lower()
-            hist = player_feats[mask_any]
-
-        if not hist.empty:
-            row = hist.mean(numeric_only=True)
+        if row is not None:
             stats.append({
                 "rating_total": row.get("rating_total", 1.0),
                 "acs_total":    row.get("acs_total", 200),
@@ -164,13 +160,15 @@ def build_team_feature_vector(players: List[Dict[str, str]], prefix: str, player
 
 def predict_match_outcome(team_a: List[Dict[str, str]], team_b: List[Dict[str, str]], map_name: str) -> Dict[str, float]:
     """
-    Predict win probabilities for Team A vs Team B.
+    Predict win probabilities for Team A vs Team B, with the model's top
+    contributing features ("model_reasoning") when the model supports it.
     """
     model = load_match_model()
-    player_feats = load_player_features()
+    schema = load_model_schema("match")
+    fallback = load_fallback_index()
 
-    ta_feats = build_team_feature_vector(team_a, "ta", player_feats)
-    tb_feats = build_team_feature_vector(team_b, "tb", player_feats)
+    ta_feats = build_team_feature_vector(team_a, "ta", fallback)
+    tb_feats = build_team_feature_vector(team_b, "tb", fallback)
 
     row = {"map": map_name}
     row.update(ta_feats)
@@ -188,30 +186,29 @@ def predict_match_outcome(team_a: List[Dict[str, str]], team_b: List[Dict[str, s
     for ta_suffix, tb_suffix in delta_cols:
         row[f"delta_{ta_suffix}"] = ta_feats.get(f"ta_{ta_suffix}", 0) - tb_feats.get(f"tb_{tb_suffix}", 0)
 
-    input_df = pd.DataFrame([row])
-
-    # Make sure we have the right columns
-    # Optimization: We know which columns the model expects based on the features we just built
-    # Instead of loading a huge parquet file just for column names, we use the known schema
-    model_cols = ["map"] + list(ta_feats.keys()) + list(tb_feats.keys())
-    for ta_suffix, _ in delta_cols:
-        model_cols.append(f"delta_{ta_suffix}")
-
-    for col in model_cols:
-        if col not in input_df.columns:
-            input_df[col] = 0
-
-    input_df = input_df[model_cols]
-
+    # Columns, order and fill values come from the schema saved with the model
+    X, reasoning = None, None
     try:
-        proba = model.predict_proba(input_df)[0]
+        X = schema.model_input(model, [schema.row(row)])
+        proba = model.predict_proba(X)[0]
         team_b_win_prob = float(proba[0])
         team_a_win_prob = float(proba[1])
     except Exception as e:
+        X = None
         team_a_win_prob = 0.5
         team_b_win_prob = 0.5
 
-    return {
+    # Reasoning is optional: a failure here must not discard the prediction
+    if X is not None:
+        try:
+            reasoning = match_reasoning(model, X)
+        except Exception:
+            reasoning = None
+
+    result = {
         "team_a_win_probability": round(team_a_win_prob, 2),
         "team_b_win_probability": round(team_b_win_prob, 2)
     }
+    if reasoning is not None:
+        result["model_reasoning"] = reasoning
+    return result
@@ -1,14 +1,17 @@
 import os
 import pandas as pd
-import joblib
+
+from ml_pipeline.fallback_tables import PlayerFallbackIndex
+from ml_pipeline.feature_store import PlayerFeatureStore
+from ml_pipeline.name_index import PlayerNameIndex
+from ml_pipeline.compact_models import load_model_artifact
+from ml_pipeline.model_registry import resolve_model_path, load_feature_schema
 
 # Paths to models and data inside ml_pipeline
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-MODEL_DIR = os.path.join(BASE_DIR, "ml_pipeline", "models")
 DATA_DIR = os.path.join(BASE_DIR, "ml_pipeline", "data")
 
-PLAYER_MODEL_PATH = os.path.join(MODEL_DIR, "player_performance_rf.pkl")
-MATCH_MODEL_PATH = os.path.join(MODEL_DIR, "match_win_predictor.pkl")
+# Models are served from the registry's promoted version (model_registry.py)
 PLAYER_FEATURES_PARQUET = os.path.join(DATA_DIR, "player_features.parquet")
 MATCH_FEATURES_PARQUET = os.path.join(DATA_DIR, "match_features.parquet")
 
@@ -57,21 +60,48 @@ ROLES = ["Duelist", "Controller", "Initiator", "Sentinel"]
 # Simple in-memory cache to avoid reading parquet/pickle files on every request
 _CACHE = {}
 
+def _load_promoted_model(name: str):
+    # Keyed by the promoted artifact path, so a promotion or rollback is
+    # picked up on the next request without restarting the server
+    path = resolve_model_path(name)
+    if _CACHE.get(f"{name}_model_path") != path:
+        model = load_model_artifact(path)
+        _CACHE[f"{name}_model"] = model
+        _CACHE[f"{name}_schema"] = load_feature_schema(path, model)
+        _CACHE[f"{name}_model_path"] = path
+    return _CACHE[f"{name}_model"]
+
+def load_model_schema(name: str):
+    """Input schema (feature_schema.FeatureSchema) of the promoted "player" or "match" model."""
+    _load_promoted_model(name)
+    return _CACHE[f"{name}_schema"]
+
 def load_player_model():
-    if "player_model" not in _CACHE:
-        _CACHE["player_model"] = joblib.load(PLAYER_MODEL_PATH)
-    return _CACHE["player_model"]
+    return _load_promoted_model("player")
 
 def load_match_model():
-    if "match_model" not in _CACHE:
-        _CACHE["match_model"] = joblib.load(MATCH_MODEL_PATH)
-    return _CACHE["match_model"]
+    return _load_promoted_model("match")
 
 def load_player_features() -> pd.DataFrame:
     if "player_feats" not in _CACHE:
         _CACHE["player_feats"] = pd.read_parquet(PLAYER_FEATURES_PARQUET)
     return _CACHE["player_feats"]
 
+def load_feature_store() -> PlayerFeatureStore:
+    if "feature_store" not in _CACHE:
+        _CACHE["feature_store"] = PlayerFeatureStore(load_player_features())
+    return _CACHE["feature_store"]
+
+def load_name_index() -> PlayerNameIndex:
+    if "name_index" not in _CACHE:
+        _CACHE["name_index"] = PlayerNameIndex.from_player_features(load_player_features())
+    return _CACHE["name_index"]
+
+def load_fallback_index() -> PlayerFallbackIndex:
+    if "fallback_index" not in _CACHE:
+        _CACHE["fallback_index"] = PlayerFallbackIndex.load(load_player_features())
+    return _CACHE["fallback_index"]
+
 def load_match_features() -> pd.DataFrame:
     if "match_feats" not in _CACHE:
         _CACHE["match_feats"] = pd.read_parquet(MATCH_FEATURES_PARQUET)
@@ -3,8 +3,8 @@ import uvicorn
 import spacy
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
 
 from contextlib import asynccontextmanager
 
@@ -18,6 +18,8 @@ def ensure_spacy_model():
         subprocess.check_call([sys.executable, "-m", "spacy", "download", "en_core_web_sm"])
 
 from analytics_system.chatbot import ValorantChatbot
+from ml_pipeline.config import MC_SEED, TOURNAMENT_MAX_SIMULATIONS, TOURNAMENT_SIMULATIONS
+from ml_pipeline.prediction import predict_series, simulate_tournament
 
 # Global chatbot instance
 chatbot_instance: Optional[ValorantChatbot] = None
@@ -77,6 +79,44 @@ async def chat_endpoint(request: ChatRequest):
         print(f"Error in chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class SeriesRequest(BaseModel):
+    team_a: List[Dict[str, str]]  # [{"name": ..., "agent": ...}, ...]
+    team_b: List[Dict[str, str]]
+    best_of: int = 3
+    map_pool: Optional[List[str]] = None
+    first: str = "A"
+
+@app.post("/api/predict-series")
+def predict_series_endpoint(request: SeriesRequest):
+    try:
+        return predict_series(request.team_a, request.team_b, request.best_of,
+                              request.map_pool, request.first)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error in series endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+class TournamentRequest(BaseModel):
+    teams: Dict[str, List[Dict[str, str]]]  # team name -> lineup
+    stages: List[Dict[str, Any]]             # see ml_pipeline/tournament.py
+    n_sims: int = Field(TOURNAMENT_SIMULATIONS, ge=1, le=TOURNAMENT_MAX_SIMULATIONS)
+    seed: Optional[int] = MC_SEED
+    map_pool: Optional[List[str]] = None
+
+# Plain def: FastAPI runs it in its threadpool, so a long simulation does not
+# block the event loop
+@app.post("/api/simulate-tournament")
+def simulate_tournament_endpoint(request: TournamentRequest):
+    try:
+        return simulate_tournament(request.teams, request.stages, request.n_sims,
+                                   request.seed, request.map_pool)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error in tournament endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health")
 async def health_check():
     if chatbot_instance is None:
@@ -0,0 +1,374 @@
+"""
+benchmarks.py — Performance benchmarks for the ScoutAnt ML pipeline.
+
+Provides:
+  1. benchmark_match_backends() — fit time, predict latency, model size and
+                                  AUC for every match model backend
+  2. benchmark_player_forest()  — native multi-output forest vs one
+                                  MultiOutputRegressor forest per target
+  3. benchmark_model_loading()  — load time and resident memory of the
+                                  pickled pipelines vs mmapped compact artifacts
+  4. benchmark_inference()      — predict latency of the sklearn pipelines vs
+                                  the flattened NumPy engine, batch 1 → 10k
+  5. benchmark_series_simulation() — Monte Carlo simulate_series() throughput
+                                  per series format (Bo1/Bo3/Bo5)
+
+Usage:
+    python -m ml_pipeline.run_pipeline --benchmark match-backends
+    python -m ml_pipeline.run_pipeline --benchmark player-forest
+    python -m ml_pipeline.run_pipeline --benchmark model-loading
+    python -m ml_pipeline.run_pipeline --benchmark inference
+    python -m ml_pipeline.run_pipeline --benchmark series-simulation
+"""
+
+import io
+import os
+import sys
+import time
+import subprocess
+import numpy as np
+import pandas as pd
+import joblib
+
+from sklearn.model_selection import train_test_split, GroupShuffleSplit
+from sklearn.metrics import roc_auc_score, mean_absolute_error, r2_score
+
+from ml_pipeline.config import (
+    MATCH_FEATURES_PARQUET, PLAYER_FEATURES_PARQUET, MATCH_MODEL_BACKENDS,
+    MC_SIMULATIONS, SERIES_FORMATS,
+)
+from ml_pipeline.model_registry import resolve_model_path
+from ml_pipeline.compact_models import compact_path_for, compile_pipeline, parity_error
+from ml_pipeline.model_training import (
+    prepare_match_data, build_match_pipeline,
+    prepare_player_data, build_player_pipeline, player_groups, PLAYER_TARGETS,
+)
+from ml_pipeline.prediction import simulate_series
+
+
+def _median_latency_ms(fn, repeats: int) -> float:
+    """Median wall time of `fn()` in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def _model_size_mb(model) -> float:
+    """Serialized (joblib) size of a fitted model in MB."""
+    buf = io.BytesIO()
+    joblib.dump(model, buf)
+    return buf.getbuffer().nbytes / (1024 * 1024)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 1. MATCH MODEL BACKENDS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def benchmark_match_backends(
+    features_path: str = MATCH_FEATURES_PARQUET,
+    backends: list[str] = MATCH_MODEL_BACKENDS,
+    latency_repeats: int = 200,
+) -> pd.DataFrame:
+    """
+    Compare match model backends on match_features.parquet.
+
+    Every backend is trained on the same stratified 80/20 split used by
+    train_match_model(). Reports fit time, single-row and batch predict
+    latency, serialized model size and test AUC.
+    """
+    print("=" * 60)
+    print("⏱️  Benchmark: match model backends")
+    print("=" * 60)
+
+    df = pd.read_parquet(features_path)
+    X, y, categorical_features, numeric_features = prepare_match_data(df)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    print(f"   Train: {X_train.shape[0]} | Test: {X_test.shape[0]}")
+
+    single_row = X_test.iloc[[0]]
+    results = []
+
+    for backend in backends:
+        try:
+            model = build_match_pipeline(categorical_features, numeric_features, backend)
+        except ImportError as e:
+            print(f"   ⚠️  Skipping {backend}: {e}")
+            continue
+
+        print(f"   Fitting {backend}...")
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+
+        auc = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+        batch_ms = _median_latency_ms(lambda: model.predict_proba(X_test), max(1, latency_repeats // 20))
+
+        results.append({
+            "backend":          backend,
+            "fit_s":            round(fit_s, 3),
+            "predict_1_ms":     round(_median_latency_ms(lambda: model.predict_proba(single_row), latency_repeats), 3),
+            "predict_batch_us_per_row": round(batch_ms * 1000 / len(X_test), 2),
+            "model_mb":         round(_model_size_mb(model), 3),
+            "auc":              round(auc, 4),
+        })
+
+    report = pd.DataFrame(results)
+    print("\n" + report.to_string(index=False))
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 2. PLAYER FOREST (NATIVE VS WRAPPED MULTI-OUTPUT)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def benchmark_player_forest(
+    features_path: str = PLAYER_FEATURES_PARQUET,
+    latency_repeats: int = 100,
+) -> pd.DataFrame:
+    """
+    Compare the native multi-output forest against MultiOutputRegressor.
+
+    Both are trained on the same 80/20 split by player used by
+    train_player_model(), so no player is in both train and test.
+    Reports fit time, single-row predict latency, model size, total trees
+    traversed per prediction and per-target MAE / R².
+    """
+    print("=" * 60)
+    print("⏱️  Benchmark: player forest (native vs wrapped multi-output)")
+    print("=" * 60)
+
+    df = pd.read_parquet(features_path)
+    X, y, categorical_features, numeric_features = prepare_player_data(df)
+    train_idx, test_idx = next(
+        GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42).split(X, y, player_groups(df, X))
+    )
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+    print(f"   Train: {X_train.shape[0]} | Test: {X_test.shape[0]} (split by player)")
+
+    single_row = X_test.iloc[[0]]
+    results = []
+
+    for mode in ["wrapped", "native"]:
+        model = build_player_pipeline(categorical_features, numeric_features, multioutput=mode)
+
+        print(f"   Fitting {mode}...")
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+
+        regressor = model.named_steps["regressor"]
+        if mode == "wrapped":
+            n_trees = sum(len(est.estimators_) for est in regressor.estimators_)
+        else:
+            n_trees = len(regressor.regressor_.estimators_)
+
+        y_pred = model.predict(X_test)
+        row = {
+            "mode":         mode,
+            "fit_s":        round(fit_s, 3),
+            "predict_1_ms": round(_median_latency_ms(lambda: model.predict(single_row), latency_repeats), 3),
+            "model_mb":     round(_model_size_mb(model), 3),
+            "trees":        n_trees,
+        }
+        for i, target in enumerate(PLAYER_TARGETS):
+            row[f"{target}_mae"] = round(mean_absolute_error(y_test.iloc[:, i], y_pred[:, i]), 4)
+            row[f"{target}_r2"] = round(r2_score(y_test.iloc[:, i], y_pred[:, i]), 4)
+        results.append(row)
+
+    report = pd.DataFrame(results)
+    print("\n" + report.to_string(index=False))
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 3. MODEL LOADING (PICKLE VS COMPACT MMAP)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Runs in a fresh interpreter so load time and RSS are not skewed by
+# modules or pages already loaded by this process.
+_LOAD_PROBE = """
+import sys, time, joblib
+try:
+    import psutil
+    rss = lambda: psutil.Process().memory_info().rss
+except ImportError:
+    try:
+        import resource
+        rss = lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        rss = lambda: float("nan")
+import sklearn.ensemble, sklearn.pipeline, ml_pipeline.compact_models
+path, mmap = sys.argv[1], sys.argv[2] == "1"
+before = rss()
+start = time.perf_counter()
+joblib.load(path, mmap_mode="r" if mmap else None)
+print(time.perf_counter() - start, rss() - before)
+"""
+
+
+def _probe_load(path: str, mmap: bool) -> tuple[float, float]:
+    """(load seconds, RSS growth in MB) for loading `path` in a new process."""
+    out = subprocess.run(
+        [sys.executable, "-c", _LOAD_PROBE, path, "1" if mmap else "0"],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout.split()
+    return float(out[0]), float(out[1]) / (1024 * 1024)
+
+
+def benchmark_model_loading(
+    models: list[str] = ["player", "match"],
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """
+    Compare cold-start loading of each promoted model's pickle and compact artifact.
+
+    Every load runs in a fresh interpreter; reports the median load time,
+    RSS growth (psutil, else peak RSS via resource) and file size.
+    """
+    print("=" * 60)
+    print("⏱️  Benchmark: model loading (pickle vs compact mmap)")
+    print("=" * 60)
+
+    results = []
+    for name in models:
+        model_path = resolve_model_path(name)
+        candidates = [("pickle", model_path, False), ("compact+mmap", compact_path_for(model_path), True)]
+        for fmt, path, mmap in candidates:
+            if not os.path.exists(path):
+                print(f"   ⚠️  Skipping {path}: not found")
+                continue
+            probes = [_probe_load(path, mmap) for _ in range(repeats)]
+            results.append({
+                "model":   name,
+                "format":  fmt,
+                "file_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+                "load_ms": round(float(np.median([t for t, _ in probes])) * 1000, 1),
+                "rss_mb":  round(float(np.median([m for _, m in probes])), 1),
+            })
+
+    report = pd.DataFrame(results)
+    print("\n" + report.to_string(index=False))
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 4. INFERENCE LATENCY (SKLEARN VS FLATTENED NUMPY ENGINE)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def benchmark_inference(
+    batch_sizes: list[int] = [1, 10, 100, 1000, 10000],
+    latency_repeats: int = 50,
+) -> pd.DataFrame:
+    """
+    Compare predict latency of the saved pipelines and their compact models.
+
+    Batches are sampled (with replacement) from the training features. The
+    compact model is timed on DataFrame input and on a list of feature dicts,
+    which is what the prediction API passes. Also reports the max deviation
+    from sklearn (see compact_models.parity_error) per model.
+    """
+    print("=" * 60)
+    print("⏱️  Benchmark: inference latency (sklearn vs flattened NumPy)")
+    print("=" * 60)
+
+    models = [
+        ("player", PLAYER_FEATURES_PARQUET, prepare_player_data, "predict"),
+        ("match",  MATCH_FEATURES_PARQUET,  prepare_match_data,  "predict_proba"),
+    ]
+
+    rng = np.random.default_rng(42)
+    results = []
+    for name, features_path, prepare, method in models:
+        pipeline = joblib.load(resolve_model_path(name))
+        try:
+            compact = compile_pipeline(pipeline)
+        except ValueError as e:
+            print(f"   ⚠️  Skipping {name}: {e}")
+            continue
+
+        X = prepare(pd.read_parquet(features_path))[0]
+        print(f"   {name}: {compact.ensemble.n_trees} trees, depth ≤ {compact.ensemble.max_depth}, "
+              f"max deviation {parity_error(pipeline, compact, X):.1e}")
+
+        for batch in batch_sizes:
+            X_batch = X.iloc[rng.integers(0, len(X), batch)]
+            records = X_batch.to_dict("records")
+            repeats = max(3, latency_repeats // max(1, batch // 100))
+
+            sklearn_ms = _median_latency_ms(lambda: getattr(pipeline, method)(X_batch), repeats)
+            compact_ms = _median_latency_ms(lambda: getattr(compact, method)(X_batch), repeats)
+            records_ms = _median_latency_ms(lambda: getattr(compact, method)(records), repeats)
+            results.append({
+                "model":          name,
+                "batch":          batch,
+                "sklearn_ms":     round(sklearn_ms, 3),
+                "compact_ms":     round(compact_ms, 3),
+                "compact_dict_ms": round(records_ms, 3),
+                "compact_us_per_row": round(compact_ms * 1000 / batch, 2),
+                "speedup":        round(sklearn_ms / compact_ms, 1),
+            })
+
+    report = pd.DataFrame(results)
+    print("\n" + report.to_string(index=False))
+    return report
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 5. MONTE CARLO SERIES SIMULATION THROUGHPUT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def benchmark_series_simulation(
+    n_sims: int = MC_SIMULATIONS,
+    formats: list[int] = SERIES_FORMATS,
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """
+    Time simulate_series() for each series format.
+
+    The two lineups are the ten most experienced players (five per side, each
+    on their most played agent) and the maps are the most played ones.
+    Reports median wall time and simulated series / maps per second.
+    """
+    print("=" * 60)
+    print(f"⏱️  Benchmark: Monte Carlo series simulation ({n_sims:,} sims)")
+    print("=" * 60)
+
+    player_feats = pd.read_parquet(PLAYER_FEATURES_PARQUET)
+    regulars = (player_feats.sort_values("match_count", ascending=False, kind="stable")
+                            .drop_duplicates("player_name")
+                            .head(10))
+    lineup = [{"name": n, "agent": a} for n, a in zip(regulars["player_name"], regulars["agent"])]
+    team_a, team_b = lineup[:5], lineup[5:]
+    maps = player_feats["map"].value_counts().index[:max(formats)].tolist()
+
+    # Warm-up: loads the model and builds the stat-line sampler
+    simulate_series(team_a, team_b, maps[:1], n_sims=100)
+
+    results = []
+    for best_of in formats:
+        ms = _median_latency_ms(
+            lambda: simulate_series(team_a, team_b, maps[:best_of], n_sims=n_sims), repeats
+        )
+        results.append({
+            "format":         f"Bo{best_of}",
+            "n_sims":         n_sims,
+            "median_ms":      round(ms, 1),
+            "series_per_s":   round(n_sims / ms * 1000),
+            "maps_per_s":     round(n_sims * best_of / ms * 1000),
+            "us_per_series":  round(ms * 1000 / n_sims, 2),
+        })
+
+    report = pd.DataFrame(results)
+    print("\n" + report.to_string(index=False))
+    return report
+
+
+if __name__ == "__main__":
+    benchmark_match_backends()
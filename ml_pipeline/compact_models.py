@@ -0,0 +1,603 @@
+"""
+compact_models.py — Flattened NumPy inference engine and compact model artifacts.
+
+Unpickling a full sklearn Pipeline rebuilds every Tree object and copies its
+node arrays into fresh memory, and every predict() call pays ColumnTransformer
+and per-estimator dispatch overhead that dwarfs the arithmetic of a single row.
+
+At training time each fitted pipeline is compiled into a CompactModel that
+holds only what inference needs:
+  - one-hot category lookups and scaler mean/scale of the ColumnTransformer
+  - all trees concatenated into flat arrays (feature, threshold, children,
+    missing-value direction, leaf values) with float32 thresholds and values
+
+Leaves point to themselves, so every row descends every tree in lock-step
+for `max_depth` vectorized steps — one NumPy pass per level for the whole
+ensemble instead of a Python loop per tree. Inputs may be DataFrames, raw
+feature dicts (one row or a list of rows) or arrays in `feature_names` order.
+
+Each node also stores its expectation: the training-cover-weighted mean of
+the leaf values below it. Path attributions (feature_contributions) credit
+every split on a row's path with the change in expectation it causes, to
+the split's feature. Per row, the expected value plus all contributions
+equals the raw output. This is the path-based (Saabas) approximation of
+TreeSHAP, and it runs in the same lock-step descent as prediction.
+
+The CompactModel is written with joblib *uncompressed*, so
+`joblib.load(path, mmap_mode="r")` maps the large arrays straight from the
+file. Multiple worker processes loading the same artifact share those pages
+through the OS page cache.
+
+Supported: RandomForestRegressor (plain, inside TransformedTargetRegressor or
+MultiOutputRegressor), GradientBoostingClassifier and
+HistGradientBoostingClassifier (binary). Other estimators keep using the
+pickled pipeline.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import joblib
+
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.ensemble import (
+    RandomForestRegressor, GradientBoostingClassifier, HistGradientBoostingClassifier,
+)
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+
+COMPACT_SUFFIX = ".compact.joblib"
+
+# Rows evaluated per lock-step pass; bounds the (rows × trees) node matrix
+EVAL_BLOCK_ROWS = 2048
+
+
+def compact_path_for(model_path: str) -> str:
+    """player_performance_rf.pkl → player_performance_rf.compact.joblib"""
+    return os.path.splitext(model_path)[0] + COMPACT_SUFFIX
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PREPROCESSING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _as_columns(X, feature_names: list[str]) -> tuple[dict, int]:
+    """
+    Normalize raw model input to {column: 1-D array} and a row count.
+
+    Accepts a DataFrame, a single feature dict, a list of feature dicts or a
+    2-D array whose columns follow `feature_names`. Missing keys become None.
+    """
+    if isinstance(X, pd.DataFrame):
+        return {c: X[c].to_numpy() for c in feature_names}, len(X)
+    if isinstance(X, dict):
+        columns = {c: np.atleast_1d(np.asarray(X.get(c), dtype=object)) for c in feature_names}
+        return columns, max((len(v) for v in columns.values()), default=1)
+    if isinstance(X, (list, tuple)) and (not X or isinstance(X[0], dict)):
+        return {c: np.array([r.get(c) for r in X], dtype=object) for c in feature_names}, len(X)
+
+    arr = np.asarray(X, dtype=object)
+    if arr.ndim == 1:
+        arr = arr[None, :]
+    if arr.shape[1] != len(feature_names):
+        raise ValueError(f"Expected {len(feature_names)} feature columns, got {arr.shape[1]}")
+    return {c: arr[:, i] for i, c in enumerate(feature_names)}, arr.shape[0]
+
+
+class CompactPreprocessor:
+    """OneHotEncoder(handle_unknown="ignore") + StandardScaler as plain arrays."""
+
+    def __init__(self, column_transformer):
+        self.cat_features: list[str] = []
+        self.categories: list[np.ndarray] = []
+        self.num_features: list[str] = []
+        self.mean = np.zeros(0)
+        self.scale = np.ones(0)
+
+        for name, transformer, columns in column_transformer.transformers_:
+            if name == "remainder" or transformer == "drop":
+                continue
+            if isinstance(transformer, OneHotEncoder):
+                if transformer.drop is not None:
+                    raise ValueError("OneHotEncoder with drop is not supported")
+                if self.num_features:
+                    raise ValueError("Categorical columns must precede numeric columns")
+                self.cat_features = list(columns)
+                self.categories = [np.asarray(c, dtype=object) for c in transformer.categories_]
+            elif isinstance(transformer, StandardScaler):
+                self.num_features = list(columns)
+                n = len(columns)
+                self.mean = transformer.mean_ if transformer.with_mean else np.zeros(n)
+                self.scale = transformer.scale_ if transformer.with_std else np.ones(n)
+            else:
+                raise ValueError(f"Unsupported transformer: {type(transformer).__name__}")
+
+        # category value → output column, per categorical feature
+        self._lookups = []
+        offset = 0
+        for cats in self.categories:
+            self._lookups.append({v: offset + i for i, v in enumerate(cats)})
+            offset += len(cats)
+        self.n_features_out = offset + len(self.num_features)
+
+    @property
+    def feature_names(self) -> list[str]:
+        """Raw input columns, in the order expected for array input."""
+        return self.cat_features + self.num_features
+
+    def source_features(self) -> np.ndarray:
+        """Index into feature_names of the raw feature behind each design-matrix column."""
+        one_hot = [np.full(len(cats), k) for k, cats in enumerate(self.categories)]
+        numeric = np.arange(len(self.num_features)) + len(self.cat_features)
+        return np.concatenate(one_hot + [numeric]).astype(np.int64)
+
+    def transform(self, X) -> np.ndarray:
+        """Encode raw features (see _as_columns) into the float64 design matrix."""
+        columns, n = _as_columns(X, self.feature_names)
+        out = np.zeros((n, self.n_features_out), dtype=np.float64)
+
+        rows = np.arange(n)
+        for col, lookup in zip(self.cat_features, self._lookups):
+            # Unknown categories stay all-zero, like handle_unknown="ignore"
+            idx = np.fromiter((lookup.get(v, -1) for v in columns[col]), dtype=np.int64, count=n)
+            known = idx >= 0
+            out[rows[known], idx[known]] = 1.0
+
+        if self.num_features:
+            num = np.column_stack([
+                np.asarray(columns[c], dtype=np.float64) for c in self.num_features
+            ])
+            out[:, self.n_features_out - len(self.num_features):] = (num - self.mean) / self.scale
+        return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TREE ENSEMBLE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """
+    Round float64 thresholds down to float32.
+
+    sklearn compares float32 inputs against float64 thresholds; rounding
+    down keeps `x <= t` identical for every float32 x.
+    """
+    t32 = threshold.astype(np.float32)
+    over = t32.astype(np.float64) > threshold
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+def _node_expectations(left: np.ndarray, right: np.ndarray, value: np.ndarray,
+                       cover: np.ndarray) -> np.ndarray:
+    """
+    Expected tree output at each node: the mean of the leaf values below it,
+    weighted by training cover (local child arrays, leaves have left == -1).
+    """
+    expected = np.asarray(value, dtype=np.float64).copy()
+    cover = np.asarray(cover, dtype=np.float64)
+    for node in range(len(left) - 1, -1, -1):  # children before parents
+        l, r = left[node], right[node]
+        if l >= 0:
+            total = cover[l] + cover[r]
+            if total > 0:
+                expected[node] = (cover[l] * expected[l] + cover[r] * expected[r]) / total
+    return expected
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    """Depth of a tree given local child arrays (leaves have left == -1)."""
+    depth = np.zeros(len(left), dtype=np.int64)
+    for node in range(len(left)):  # children always have larger ids than parents
+        if left[node] >= 0:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+class CompactTreeEnsemble:
+    """
+    All trees of an ensemble concatenated into flat node arrays.
+
+    Node ids are global; `roots` holds each tree's root node and
+    children[2 * node] / children[2 * node + 1] its left / right child.
+    Leaves are their own children so rows parked at a leaf stay there.
+
+    prediction = base + Σ over trees of leaf value. Forest averaging, target
+    inverse scaling and boosting learning rates are folded into the leaf
+    values at compile time. `expected` holds each node's expectation on the
+    same scale; `expected_value` is the ensemble output with no splits taken.
+    """
+
+    def __init__(self, trees: list[dict], base: np.ndarray, input_dtype=np.float32):
+        offsets = np.cumsum([0] + [len(t["left"]) for t in trees[:-1]])
+
+        left, right, feature = [], [], []
+        for tree, offset in zip(trees, offsets):
+            tree_left = np.asarray(tree["left"], dtype=np.int64)
+            tree_right = np.asarray(tree["right"], dtype=np.int64)
+            is_leaf = tree_left < 0
+            own = np.arange(len(tree_left)) + offset
+            left.append(np.where(is_leaf, own, tree_left + offset))
+            right.append(np.where(is_leaf, own, tree_right + offset))
+            feature.append(np.where(is_leaf, 0, tree["feature"]))
+
+        self.roots = offsets.astype(np.int32)
+        self.feature = np.concatenate(feature).astype(np.int32)
+        self.threshold = np.concatenate([t["threshold"] for t in trees])
+        self.children = np.column_stack([np.concatenate(left), np.concatenate(right)]).ravel().astype(np.int32)
+        self.missing_left = np.concatenate([t["missing_left"] for t in trees]).astype(np.bool_)
+        self.value = np.concatenate([t["value"] for t in trees]).astype(np.float32)
+        self.max_depth = max(_tree_depth(t["left"], t["right"]) for t in trees)
+        self.base = np.asarray(base, dtype=np.float64)
+        self.input_dtype = input_dtype
+
+        # Per-node expectations for path attributions (see feature_contributions)
+        self.expected = np.concatenate([
+            _node_expectations(np.asarray(t["left"]), np.asarray(t["right"]),
+                               np.asarray(t["value"], dtype=np.float32), t["cover"])
+            for t in trees
+        ]).astype(np.float32)
+        self.expected_value = self.base + self.expected[self.roots].sum(axis=0, dtype=np.float64)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_outputs(self) -> int:
+        return self.value.shape[1]
+
+    def _descend(self, X: np.ndarray):
+        """
+        Lock-step descent of every row through every tree. Yields
+        (node, child) id arrays, shape (n_rows, n_trees), once per level.
+        """
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        n_rows, n_cols = X.shape
+        flat_x = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.int64) * n_cols)[:, None]
+        has_missing = np.isnan(flat_x).any()
+
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            x = flat_x.take(row_offset + self.feature.take(node))
+            go_right = ~(x <= self.threshold.take(node))
+            if has_missing:
+                go_right &= ~(np.isnan(x) & self.missing_left.take(node))
+            child = self.children.take(2 * node + go_right)
+            yield node, child
+            node = child
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node id reached in every tree, shape (n_rows, n_trees)."""
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _, node in self._descend(X):
+            pass
+        return node
+
+    def predict_raw(self, X: np.ndarray) -> np.ndarray:
+        """Ensemble output per row, shape (n_rows, n_outputs)."""
+        out = np.empty((X.shape[0], self.n_outputs), dtype=np.float64)
+        for start in range(0, X.shape[0], EVAL_BLOCK_ROWS):
+            block = slice(start, start + EVAL_BLOCK_ROWS)
+            out[block] = self.value[self.apply(X[block])].sum(axis=1, dtype=np.float64)
+        return out + self.base
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """
+        Path attribution of every design-matrix column, shape (n_rows,
+        n_cols, n_outputs). Each split a row passes through adds the change
+        in node expectation to the column it splits on, so per row
+        expected_value + contributions.sum(axis=1) matches predict_raw()
+        (up to float32 rounding).
+        """
+        if getattr(self, "expected", None) is None:
+            raise ValueError("Ensemble was compiled without node expectations; recompile the model")
+        n_rows, n_cols = X.shape
+        out = np.zeros((n_rows, n_cols, self.n_outputs), dtype=np.float64)
+        for start in range(0, n_rows, EVAL_BLOCK_ROWS):
+            block = X[start:start + EVAL_BLOCK_ROWS]
+            n = len(block)
+            row_offset = (np.arange(n, dtype=np.int64) * n_cols)[:, None]
+            acc = np.zeros((n * n_cols, self.n_outputs))
+            for node, child in self._descend(block):
+                # Leaves are their own children, so finished trees add zero
+                slot = (row_offset + self.feature.take(node)).ravel()
+                delta = (self.expected[child] - self.expected[node]).reshape(-1, self.n_outputs).astype(np.float64)
+                for j in range(self.n_outputs):
+                    acc[:, j] += np.bincount(slot, weights=delta[:, j], minlength=n * n_cols)
+            out[start:start + n] = acc.reshape(n, n_cols, self.n_outputs)
+        return out
+
+    def tree_outputs(self) -> np.ndarray:
+        """
+        (n_trees, n_outputs) mask of the outputs each tree writes: every
+        output for a single forest, its own target for MultiOutputRegressor.
+        """
+        if getattr(self, "_tree_outputs", None) is None:
+            self._tree_outputs = np.logical_or.reduceat(self.value != 0, self.roots, axis=0)
+        return self._tree_outputs
+
+
+def _sklearn_tree_arrays(tree, value: np.ndarray) -> dict:
+    return {
+        "feature":      tree.feature,
+        "threshold":    _float32_floor(tree.threshold),
+        "left":         tree.children_left,
+        "right":        tree.children_right,
+        "missing_left": getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)),
+        "value":        value,
+        "cover":        tree.weighted_n_node_samples,
+    }
+
+
+def _compile_forest(forest: RandomForestRegressor, y_scaler=None) -> CompactTreeEnsemble:
+    n_outputs = forest.estimators_[0].tree_.value.shape[1]
+    scale, base = np.ones(n_outputs), np.zeros(n_outputs)
+    if y_scaler is not None:
+        # Fold the target inverse-transform into the leaves (the mean is linear)
+        scale, base = y_scaler.scale_, y_scaler.mean_
+
+    weight = scale / len(forest.estimators_)
+    trees = [
+        _sklearn_tree_arrays(est.tree_, est.tree_.value[:, :, 0] * weight)
+        for est in forest.estimators_
+    ]
+    return CompactTreeEnsemble(trees, base=base)
+
+
+def _compile_multioutput_forest(wrapper: MultiOutputRegressor) -> CompactTreeEnsemble:
+    """One forest per target: each tree writes only its own output column."""
+    n_outputs = len(wrapper.estimators_)
+    trees = []
+    for j, forest in enumerate(wrapper.estimators_):
+        if not isinstance(forest, RandomForestRegressor):
+            raise ValueError("Only MultiOutputRegressor over RandomForest is supported")
+        for est in forest.estimators_:
+            value = np.zeros((est.tree_.node_count, n_outputs))
+            value[:, j] = est.tree_.value[:, 0, 0] / len(forest.estimators_)
+            trees.append(_sklearn_tree_arrays(est.tree_, value))
+    return CompactTreeEnsemble(trees, base=np.zeros(n_outputs))
+
+
+def _compile_gradient_boosting(clf: GradientBoostingClassifier) -> CompactTreeEnsemble:
+    if len(clf.classes_) != 2:
+        raise ValueError("Only binary GradientBoostingClassifier is supported")
+    if not hasattr(clf.init_, "class_prior_"):
+        raise ValueError("Only the default prior init estimator is supported")
+
+    prior = clf.init_.class_prior_[1]
+    base = np.array([np.log(prior / (1 - prior))])
+    trees = [
+        _sklearn_tree_arrays(est.tree_, est.tree_.value[:, :, 0] * clf.learning_rate)
+        for est in clf.estimators_[:, 0]
+    ]
+    return CompactTreeEnsemble(trees, base=base)
+
+
+def _compile_hist_gradient_boosting(clf: HistGradientBoostingClassifier) -> CompactTreeEnsemble:
+    if len(clf.classes_) != 2:
+        raise ValueError("Only binary HistGradientBoostingClassifier is supported")
+    if getattr(clf, "is_categorical_", None) is not None and np.any(clf.is_categorical_):
+        raise ValueError("Native categorical splits are not supported")
+
+    trees = []
+    for (predictor,) in clf._predictors:
+        nodes = predictor.nodes
+        leaf = nodes["is_leaf"].astype(bool)
+        # children are uint32 in the predictor; widen before marking leaves with -1
+        trees.append({
+            "feature":      nodes["feature_idx"],
+            "threshold":    nodes["num_threshold"],
+            "left":         np.where(leaf, -1, nodes["left"].astype(np.int64)),
+            "right":        np.where(leaf, -1, nodes["right"].astype(np.int64)),
+            "missing_left": nodes["missing_go_to_left"],
+            "value":        nodes["value"][:, None],
+            "cover":        nodes["count"],
+        })
+    # HistGB splits on float64 inputs, so thresholds stay float64
+    return CompactTreeEnsemble(trees, base=np.ravel(clf._baseline_prediction),
+                               input_dtype=np.float64)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MODEL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class CompactModel:
+    """
+    Drop-in replacement for a fitted preprocessing + tree pipeline.
+
+    Exposes predict() (regressors) and predict_proba() (binary classifiers)
+    with the same output shapes as the sklearn Pipeline. Inputs may be a
+    DataFrame, a feature dict, a list of feature dicts or an array whose
+    columns follow `feature_names`.
+    Forest regressors also give per-tree percentiles (predict_interval()),
+    and every model gives per-feature path attributions (feature_contributions()).
+    """
+
+    def __init__(self, preprocessor: CompactPreprocessor, ensemble: CompactTreeEnsemble,
+                 task: str, classes=None):
+        self.preprocessor = preprocessor
+        self.ensemble = ensemble
+        self.task = task
+        self.classes_ = classes
+
+    @property
+    def feature_names(self) -> list[str]:
+        return self.preprocessor.feature_names
+
+    def _raw(self, X) -> np.ndarray:
+        return self.ensemble.predict_raw(self.preprocessor.transform(X))
+
+    def predict(self, X) -> np.ndarray:
+        raw = self._raw(X)
+        if self.task == "regression":
+            return raw
+        return self.classes_[(raw[:, 0] > 0).astype(int)]
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.task != "binary":
+            raise AttributeError("predict_proba is only available for classifiers")
+        p = 1.0 / (1.0 + np.exp(-self._raw(X)[:, 0]))
+        return np.column_stack([1.0 - p, p])
+
+    @property
+    def supports_attribution(self) -> bool:
+        """False for artifacts compiled before node expectations were stored."""
+        return getattr(self.ensemble, "expected", None) is not None
+
+    def feature_contributions(self, X) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Path attributions per raw input feature in raw output units (log-odds
+        for classifiers). Returns the expected value, shape (n_outputs,), and
+        contributions, shape (n_rows, len(feature_names), n_outputs). One-hot
+        columns are summed back onto their categorical feature, so per row
+        expected value + contributions.sum(axis=1) is the raw output.
+        """
+        design = self.ensemble.contributions(self.preprocessor.transform(X))
+        fold = np.zeros((design.shape[1], len(self.feature_names)))
+        fold[np.arange(design.shape[1]), self.preprocessor.source_features()] = 1.0
+        return self.ensemble.expected_value, np.einsum("rco,cf->rfo", design, fold)
+
+    def explain(self, X, top_k: int) -> list[list[list[tuple[str, object, float]]]]:
+        """
+        Per row and output, the `top_k` raw features with the largest
+        absolute contribution, as (feature, input value, contribution).
+        """
+        columns, _ = _as_columns(X, self.feature_names)
+        _, contributions = self.feature_contributions(X)
+        top = np.argsort(-np.abs(contributions), axis=1, kind="stable")[:, :top_k]  # (rows, k, outputs)
+        names = self.feature_names
+        return [
+            [[(names[f], columns[names[f]][r], float(contributions[r, f, j])) for f in top[r, :, j]]
+             for j in range(contributions.shape[2])]
+            for r in range(len(top))
+        ]
+
+    def predict_interval(self, X, percentiles) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Forest prediction and the spread of its individual trees.
+
+        Returns predict()'s (n_rows, n_outputs) array and the given
+        percentiles of the per-tree predictions, shape (len(percentiles),
+        n_rows, n_outputs), both from one lock-step pass over all trees.
+        """
+        if self.task != "regression":
+            raise AttributeError("predict_interval is only available for forest regressors")
+        ensemble = self.ensemble
+        Z = self.preprocessor.transform(X)
+        members = ensemble.tree_outputs()
+        forest_size = members.sum(axis=0)
+
+        pred = np.empty((len(Z), ensemble.n_outputs))
+        bounds = np.empty((len(percentiles), len(Z), ensemble.n_outputs))
+        for start in range(0, len(Z), EVAL_BLOCK_ROWS):
+            block = slice(start, start + EVAL_BLOCK_ROWS)
+            leaf_values = ensemble.value[ensemble.apply(Z[block])]  # (rows, trees, outputs)
+            pred[block] = leaf_values.sum(axis=1, dtype=np.float64) + ensemble.base
+            for j in range(ensemble.n_outputs):
+                # Leaves hold value / forest size (see _compile_forest); undo it per tree
+                per_tree = leaf_values[:, members[:, j], j] * np.float64(forest_size[j]) + ensemble.base[j]
+                bounds[:, block, j] = np.percentile(per_tree, percentiles, axis=1)
+        return pred, bounds
+
+
+def compile_pipeline(pipeline) -> CompactModel:
+    """
+    Compile a fitted Pipeline([("preprocessor", ColumnTransformer), (name, model)]).
+
+    Raises ValueError for unsupported estimators.
+    """
+    preprocessor = CompactPreprocessor(pipeline.steps[0][1])
+    estimator = pipeline.steps[-1][1]
+
+    if isinstance(estimator, TransformedTargetRegressor):
+        if not isinstance(estimator.regressor_, RandomForestRegressor) \
+                or not isinstance(estimator.transformer_, StandardScaler):
+            raise ValueError("Only RandomForest with a StandardScaler target transform is supported")
+        ensemble = _compile_forest(estimator.regressor_, estimator.transformer_)
+        return CompactModel(preprocessor, ensemble, task="regression")
+
+    if isinstance(estimator, RandomForestRegressor):
+        return CompactModel(preprocessor, _compile_forest(estimator), task="regression")
+
+    if isinstance(estimator, MultiOutputRegressor):
+        return CompactModel(preprocessor, _compile_multioutput_forest(estimator), task="regression")
+
+    if isinstance(estimator, GradientBoostingClassifier):
+        return CompactModel(preprocessor, _compile_gradient_boosting(estimator),
+                            task="binary", classes=estimator.classes_)
+
+    if isinstance(estimator, HistGradientBoostingClassifier):
+        return CompactModel(preprocessor, _compile_hist_gradient_boosting(estimator),
+                            task="binary", classes=estimator.classes_)
+
+    raise ValueError(f"Unsupported estimator for compact export: {type(estimator).__name__}")
+
+
+def parity_error(pipeline, compact: CompactModel, X: pd.DataFrame) -> float:
+    """
+    Largest relative deviation between sklearn and compact outputs on X.
+
+    Regressors compare predict() per target scaled by the target's spread;
+    classifiers compare the positive-class probability.
+    """
+    if compact.task == "binary":
+        return float(np.max(np.abs(pipeline.predict_proba(X)[:, 1] - compact.predict_proba(X)[:, 1])))
+
+    expected = np.asarray(pipeline.predict(X)).reshape(len(X), -1)
+    got = compact.predict(X)
+    spread = np.maximum(np.abs(expected).max(axis=0), 1e-12)
+    return float(np.max(np.abs(expected - got) / spread))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SAVE / LOAD
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def save_compact_artifact(pipeline, model_path: str, X_check: pd.DataFrame | None = None,
+                          tolerance: float = 1e-5) -> str | None:
+    """
+    Write the compact artifact next to `model_path`.
+
+    If `X_check` is given the compiled model must reproduce the pipeline's
+    outputs on it within `tolerance` (see parity_error). Returns the artifact
+    path, or None if the estimator is unsupported or fails the check (any
+    stale artifact is removed so loaders fall back to the pickle).
+    """
+    path = compact_path_for(model_path)
+    try:
+        compact = compile_pipeline(pipeline)
+        if X_check is not None:
+            error = parity_error(pipeline, compact, X_check)
+            if error > tolerance:
+                raise ValueError(f"outputs differ from sklearn by {error:.2e}")
+            print(f"   ✅ Compact model matches sklearn (max deviation {error:.1e})")
+    except ValueError as e:
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"   ⚠️  No compact artifact: {e}")
+        return None
+
+    # compress=0 keeps the numpy arrays raw on disk so they can be memory-mapped
+    joblib.dump(compact, path, compress=0)
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    print(f"   💾 Saved compact artifact to {path} ({size_mb:.1f} MB)")
+    return path
+
+
+def load_model_artifact(model_path: str, mmap: bool = True):
+    """
+    Load a model for inference, preferring the compact artifact.
+
+    The compact artifact is memory-mapped read-only; otherwise the full
+    pickled pipeline at `model_path` is loaded.
+    """
+    path = compact_path_for(model_path)
+    if os.path.exists(path):
+        return joblib.load(path, mmap_mode="r" if mmap else None)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found: {model_path}. Run model_training first.")
+    return joblib.load(model_path)
@@ -0,0 +1,164 @@
+"""
+composition_solver.py — Exact top-k player → agent assignment.
+
+suggest_best_composition() scores a composition as the sum of each player's
+rating on their agent plus ROLE_BALANCE_BONUS per role covered, with every
+agent picked at most once. Enumerating itertools.product over each player's
+agent pool grows as pool_size ** n_players. Here the best k compositions are
+found exactly by depth-first branch-and-bound instead:
+
+  - players are branched in order of fewest viable agents, each trying its
+    agents best-first, so strong compositions are found early;
+  - a node is pruned when an upper bound on any completion cannot beat the
+    k-th best composition found so far. The bound is the current score plus
+    the optimal distinct-agent assignment of the remaining players (Hungarian
+    algorithm, scipy's linear_sum_assignment) plus the largest role bonus
+    still reachable; a cheap per-player-maximum bound is tried first;
+  - optional role limits {role: (min, max)} prune as soon as a maximum is
+    exceeded or the remaining players can no longer reach every minimum.
+"""
+
+import heapq
+import numpy as np
+
+from scipy.optimize import linear_sum_assignment
+
+from ml_pipeline.config import AGENT_ROLE_MAP, ROLES, ROLE_BALANCE_BONUS
+
+# Tolerance for comparing float scores against the pruning threshold
+_EPS = 1e-12
+
+
+def _assignment_bound(ratings: np.ndarray) -> float:
+    """Best total rating of a distinct-agent assignment (-inf if none is feasible)."""
+    if ratings.shape[0] == 0:
+        return 0.0
+    viable = np.isfinite(ratings)
+    cost = np.where(viable, -ratings, 1e9)
+    rows, cols = linear_sum_assignment(cost)
+    if not viable[rows, cols].all():
+        return -np.inf
+    return float(ratings[rows, cols].sum())
+
+
+def solve_compositions(
+    options: list[dict[str, float]],
+    top_k: int = 5,
+    role_limits: dict[str, tuple[int, int]] | None = None,
+    balance_bonus: float = ROLE_BALANCE_BONUS,
+) -> list[tuple[float, list[str]]]:
+    """
+    Top `top_k` distinct agent assignments for a team.
+
+    `options[i]` maps each viable agent of player i to its rating.
+    `role_limits` optionally bounds how many players may take each role,
+    e.g. {"Duelist": (1, 2), "Controller": (1, 2)}. Returns
+    [(score, agents in player order)], best first.
+    """
+    n = len(options)
+    agents = sorted({a for opts in options for a in opts})
+    if n == 0 or top_k <= 0 or len(agents) < n:
+        return []
+    col = {a: j for j, a in enumerate(agents)}
+
+    ratings = np.full((n, len(agents)), -np.inf)
+    for i, opts in enumerate(options):
+        for agent, rating in opts.items():
+            ratings[i, col[agent]] = rating
+
+    role_index = {r: k for k, r in enumerate(ROLES)}
+    agent_role = [role_index.get(AGENT_ROLE_MAP.get(a, "Unknown"), -1) for a in agents]
+    limits = role_limits or {}
+    min_count = [limits.get(r, (0, n))[0] for r in ROLES]
+    max_count = [limits.get(r, (0, n))[1] for r in ROLES]
+
+    # Branch on the most constrained players first, agents best-first
+    order = sorted(range(n), key=lambda i: np.isfinite(ratings[i]).sum())
+    ordered = ratings[order]
+    candidates = [
+        [(int(j), float(row[j])) for j in np.argsort(-row, kind="stable") if np.isfinite(row[j])]
+        for row in ordered
+    ]
+
+    best: list[tuple[float, tuple[int, ...]]] = []  # min-heap of (score, picks)
+    used = np.zeros(len(agents), dtype=bool)
+    counts = [0] * len(ROLES)
+    picks: list[int] = []
+
+    def threshold() -> float:
+        return best[0][0] if len(best) == top_k else -np.inf
+
+    def covered() -> int:
+        return sum(1 for c in counts if c)
+
+    def record(score: float):
+        entry = (score, tuple(picks))
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        elif score > best[0][0] + _EPS:
+            heapq.heapreplace(best, entry)
+
+    def search(depth: int, total: float):
+        remaining = n - depth
+        if sum(max(lo - c, 0) for lo, c in zip(min_count, counts)) > remaining:
+            return
+
+        if remaining == 1:
+            # Last player: candidates are best-first, so stop at the first
+            # one that cannot beat the threshold even with a new role
+            base = covered()
+            for j, rating in candidates[depth]:
+                if total + rating + balance_bonus * min(len(ROLES), base + 1) <= threshold() + _EPS:
+                    break
+                if used[j]:
+                    continue
+                role = agent_role[j]
+                if role >= 0 and counts[role] + 1 > max_count[role]:
+                    continue
+                if any(c + (k == role) < lo for k, (c, lo) in enumerate(zip(counts, min_count))):
+                    continue
+                new_role = role >= 0 and counts[role] == 0
+                picks.append(j)
+                record(total + rating + balance_bonus * (base + new_role))
+                picks.pop()
+            return
+
+        # Cheap bound: every remaining player takes their best unused agent
+        rest = ordered[depth:][:, ~used]
+        row_best = rest.max(axis=1)
+        if not np.isfinite(row_best).all():
+            return
+        bonus_bound = balance_bonus * min(len(ROLES), covered() + remaining)
+        if total + row_best.sum() + bonus_bound <= threshold() + _EPS:
+            return
+        # Exact distinct-agent bound for the remaining players
+        if total + _assignment_bound(rest) + bonus_bound <= threshold() + _EPS:
+            return
+
+        for j, rating in candidates[depth]:
+            if used[j]:
+                continue
+            role = agent_role[j]
+            if role >= 0 and counts[role] + 1 > max_count[role]:
+                continue
+            used[j] = True
+            if role >= 0:
+                counts[role] += 1
+            picks.append(j)
+
+            search(depth + 1, total + rating)
+
+            picks.pop()
+            if role >= 0:
+                counts[role] -= 1
+            used[j] = False
+
+    search(0, 0.0)
+
+    results = []
+    for score, chosen in sorted(best, reverse=True):
+        by_player = [None] * n
+        for depth, j in enumerate(chosen):
+            by_player[order[depth]] = agents[j]
+        results.append((score, by_player))
+    return results
@@ -22,9 +22,185 @@ PLAYER_STATS_PARQUET = os.path.join(DATA_DIR, "player_stats.parquet")
 PLAYER_FEATURES_PARQUET = os.path.join(DATA_DIR, "player_features.parquet")
 MATCH_FEATURES_PARQUET = os.path.join(DATA_DIR, "match_features.parquet")
 
+# Precomputed fallback hierarchy (coarser aggregates of player_features)
+PLAYER_MAP_FEATURES_PARQUET = os.path.join(DATA_DIR, "player_map_features.parquet")
+PLAYER_AGENT_FEATURES_PARQUET = os.path.join(DATA_DIR, "player_agent_features.parquet")
+PLAYER_OVERALL_FEATURES_PARQUET = os.path.join(DATA_DIR, "player_overall_features.parquet")
+AGENT_PRIORS_PARQUET = os.path.join(DATA_DIR, "agent_priors.parquet")
+ROLE_PRIORS_PARQUET = os.path.join(DATA_DIR, "role_priors.parquet")
+
+# Recency-weighted (rolling / EWM) form features
+PLAYER_ROLLING_FEATURES_DIR = os.path.join(DATA_DIR, "player_rolling_features")
+PLAYER_FORM_PARQUET = os.path.join(DATA_DIR, "player_form.parquet")
+PLAYER_AGENT_FORM_PARQUET = os.path.join(DATA_DIR, "player_agent_form.parquet")
+ROLLING_STATE_PATH = os.path.join(DATA_DIR, "rolling_state.pkl")
+
+# Encoded (one-hot + scaled) float32 design matrices shared by CV folds / tuning
+DESIGN_MATRIX_DIR = os.path.join(DATA_DIR, "design_matrices")
+
 PLAYER_MODEL_PATH = os.path.join(MODEL_DIR, "player_performance_rf.pkl")
 MATCH_MODEL_PATH = os.path.join(MODEL_DIR, "match_win_predictor.pkl")
 
+# Versioned model artifacts + manifests; the promoted version replaces the paths above
+MODEL_REGISTRY_DIR = os.path.join(MODEL_DIR, "registry")
+
+# Best hyperparameters and CV scores found by --tune (used by training if present)
+TUNED_PARAMS_PATH = os.path.join(MODEL_DIR, "tuned_params.json")
+
+# ─── Distributional Player Features ──────────────────────────────────────────
+
+# Key stats that get spread features (std, min, max, percentiles) per group
+DISTRIBUTION_STATS = ["rating_total", "acs_total", "adr_total", "kast_total"]
+
+# Percentiles computed for each distribution stat (column suffix _p10, _p50, ...)
+DISTRIBUTION_QUANTILES = [0.1, 0.5, 0.9]
+
+# ─── Rolling Form Features ───────────────────────────────────────────────────
+
+# Stats tracked by the rolling/EWM engine
+ROLLING_STATS = ["rating_total", "acs_total", "adr_total", "kast_total", "kd_ratio", "is_winner"]
+
+# Window size (maps) for last-N averages
+ROLLING_WINDOW = 10
+
+# Half-life (maps) for the exponentially-decayed averages
+ROLLING_HALFLIFE = 8
+
+# ─── Out-of-Core Feature Engineering ─────────────────────────────────────────
+
+# Rows per streamed batch when player_stats.parquet is read in chunked mode
+FEATURE_BATCH_ROWS = 250_000
+
+# Number of hash partitions (by match_id) used to build match features
+# with bounded memory — every map of a match lands in the same partition
+MATCH_PARTITIONS = 64
+
+# ─── Model Backends ──────────────────────────────────────────────────────────
+
+# Classifier backends for the match win model:
+#   gb      — sklearn GradientBoostingClassifier (exact splits)
+#   hist    — sklearn HistGradientBoostingClassifier (binned histogram splits)
+#   xgboost — XGBClassifier with tree_method="hist"
+MATCH_MODEL_BACKENDS = ["gb", "hist", "xgboost"]
+DEFAULT_MATCH_BACKEND = "gb"
+
+# ─── Hyperparameter Tuning ───────────────────────────────────────────────────
+
+# Successive halving: TUNING_CANDIDATES random configs start on a small tree
+# budget; each round keeps the best 1/TUNING_HALVING_FACTOR and gives them
+# TUNING_HALVING_FACTOR× more trees, so the last round uses TUNING_MAX_TREES
+TUNING_CANDIDATES = 27
+TUNING_HALVING_FACTOR = 3
+TUNING_MAX_TREES = 400
+TUNING_CV_FOLDS = 5
+
+# ─── Player Model Evaluation ─────────────────────────────────────────────────
+
+# GroupKFold-by-player CV run on every player model training. Folds fit in
+# parallel with PLAYER_CV_THREADS_PER_FOLD threads each; PLAYER_CV_PROXY_TREES
+# shrinks the forest for a quick estimate (None = full forest)
+PLAYER_CV_FOLDS = 5
+PLAYER_CV_THREADS_PER_FOLD = 1
+PLAYER_CV_PROXY_TREES = 50
+
+# ─── Prediction Intervals ────────────────────────────────────────────────────
+
+# Percentiles of the player forest's per-tree predictions reported around
+# predicted rating/ACS; trees disagree more where history is thin
+PREDICTION_INTERVAL_PERCENTILES = (10, 90)
+
+# ─── Model Reasoning ─────────────────────────────────────────────────────────
+
+# Features reported per prediction, ranked by absolute path attribution
+ATTRIBUTION_TOP_FEATURES = 5
+
+# ─── Model Registry ──────────────────────────────────────────────────────────
+
+# Versions kept per model (the promoted one is never deleted)
+MODEL_REGISTRY_KEEP = 10
+
+# ─── Incremental Model Updates ───────────────────────────────────────────────
+
+# Trees added to the player forest per update (warm_start), and the cap
+# after which the oldest trees are dropped
+INCREMENTAL_PLAYER_TREES = 50
+MAX_PLAYER_FOREST_TREES = 400
+
+# How the match model absorbs new maps:
+#   continue — add boosting rounds fitted on the new rows (warm_start)
+#   window   — refit from scratch on the most recent MATCH_UPDATE_WINDOW maps
+MATCH_UPDATE_MODES = ["continue", "window"]
+INCREMENTAL_MATCH_ROUNDS = 50
+MATCH_UPDATE_WINDOW = 5000
+
+# Share of the new rows held out to compare the current and updated model;
+# the update is promoted only if its holdout score drops by at most the tolerance
+UPDATE_HOLDOUT_FRACTION = 0.2
+PROMOTION_TOLERANCE = 0.0
+
+# ─── Composition Solver ──────────────────────────────────────────────────────
+
+# Agents considered per player (best historical rating first) and the score
+# bonus per role covered by a composition
+COMPOSITION_AGENT_POOL = 15
+ROLE_BALANCE_BONUS = 0.1
+
+# ─── Roster Search ───────────────────────────────────────────────────────────
+
+# suggest_best_roster: agents considered per pool player, lineups kept per
+# beam step, and the most refinement rounds of single player/agent swaps
+ROSTER_AGENT_POOL = 8
+ROSTER_BEAM_WIDTH = 32
+ROSTER_REFINE_ROUNDS = 3
+
+# ─── Monte Carlo Simulation ──────────────────────────────────────────────────
+
+# Simulated series per simulate_series() call and its default RNG seed
+MC_SIMULATIONS = 20000
+MC_SEED = 42
+
+# Fewest maps a player needs on an agent before only those maps are sampled
+MC_MIN_AGENT_MAPS = 3
+
+# Percentiles of the simulated per-map win probability reported as its interval
+MC_INTERVAL_PERCENTILES = (5, 95)
+
+# Supported series lengths (best of N maps)
+SERIES_FORMATS = [1, 3, 5]
+
+# ─── Map Veto ────────────────────────────────────────────────────────────────
+
+# Veto map pool; empty = the ACTIVE_MAP_POOL_SIZE most played maps in the data
+ACTIVE_MAP_POOL = []
+ACTIVE_MAP_POOL_SIZE = 7
+
+# Pick/ban order per series length for a 7-map pool, as (team, action); the
+# map left over is the decider. Team A is the side that vetoes first.
+VETO_FORMATS = {
+    1: [("A", "ban"), ("B", "ban"), ("A", "ban"), ("B", "ban"), ("A", "ban"), ("B", "ban")],
+    3: [("A", "ban"), ("B", "ban"), ("A", "pick"), ("B", "pick"), ("A", "ban"), ("B", "ban")],
+    5: [("A", "ban"), ("B", "ban"), ("A", "pick"), ("B", "pick"), ("A", "pick"), ("B", "pick")],
+}
+
+# ─── Player Name Resolution ──────────────────────────────────────────────────
+
+# Fuzzy player matches may be this many edits per query character away (at
+# least one): "aspa" → "Aspas", "tenzz" → "TenZ"
+NAME_MATCH_MAX_EDIT_RATIO = 0.25
+# Names per query verified by edit distance, most shared trigrams first
+NAME_MATCH_SHORTLIST = 32
+# Ranked candidates returned per name query
+NAME_MATCH_SUGGESTIONS = 5
+
+# ─── Tournament Simulation ───────────────────────────────────────────────────
+
+# Simulated runs of a whole event (brackets are cheap to replay once the
+# pairwise series probabilities are known)
+TOURNAMENT_SIMULATIONS = 100000
+# Most runs one API request may ask for (memory grows with n_sims × teams)
+TOURNAMENT_MAX_SIMULATIONS = 1000000
+TOURNAMENT_FORMATS = ["single_elim", "double_elim", "swiss", "groups"]
+
 # ─── Agent → Role Mapping ───────────────────────────────────────────────────
 
 AGENT_ROLE_MAP = {
@@ -0,0 +1,139 @@
+"""
+design_matrix.py — Cached, memory-mapped encoded design matrices.
+
+Cross-validation and hyperparameter search refit the ColumnTransformer
+(one-hot + scaling) inside every fold and trial although its output never
+changes. The encoded matrix is instead materialized once per feature table:
+
+  design_matrices/<name>.<fingerprint>.npy — float32 (n_rows, n_encoded_features)
+  design_matrices/<name>.json               — matrix file name, feature names,
+                                              shape and input fingerprint
+
+and opened with np.load(mmap_mode="r"). Folds index into the mapped file,
+and joblib passes np.memmap arguments to worker processes by filename, so
+parallel CV workers read the same pages instead of receiving pickled copies.
+float32 is the dtype sklearn's tree builders convert to anyway.
+
+The encoder is fitted on all rows. Tree splits are invariant to the
+per-feature affine scaling, so this is equivalent to per-fold preprocessing
+up to floating-point ties between candidate splits and categories that
+appear only in a validation fold.
+
+The cache is rebuilt when the input rows, columns or encoder change. Each
+matrix file is named by its fingerprint and the .json names the current one,
+so a rebuild writes a new .npy and then swaps the .json in one os.replace:
+readers see the old pair or the new pair, never a mix, and concurrent
+builders only race on identical files. Both are written to unique temporary
+files first.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from sklearn.base import clone
+
+from ml_pipeline.config import DESIGN_MATRIX_DIR
+
+# Rows encoded per chunk while writing the .npy file
+ENCODE_CHUNK_ROWS = 100_000
+
+
+def _meta_path(name: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{name}.json")
+
+
+def _npy_name(name: str, fingerprint: str) -> str:
+    return f"{name}.{fingerprint[:16]}.npy"
+
+
+def _read_meta(meta_path: str) -> dict | None:
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _temp_path(cache_dir: str, suffix: str) -> str:
+    """A new, uniquely named empty file in cache_dir (same filesystem as the target)."""
+    fd, path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp-", suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def _fingerprint(X: pd.DataFrame, preprocessor) -> str:
+    """Hash of the input rows, column order and encoder configuration."""
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(json.dumps(list(X.columns)).encode())
+    digest.update(repr(preprocessor).encode())
+    return digest.hexdigest()
+
+
+def load_design_matrix(name: str, cache_dir: str = DESIGN_MATRIX_DIR) -> tuple[np.ndarray, list[str]]:
+    """Open a cached design matrix read-only; returns (memmap, feature names)."""
+    meta = _read_meta(_meta_path(name, cache_dir))
+    npy_path = os.path.join(cache_dir, meta["npy"]) if meta and "npy" in meta else None
+    if npy_path is None or not os.path.exists(npy_path):
+        raise FileNotFoundError(f"No cached design matrix '{name}' in {cache_dir}")
+    return np.load(npy_path, mmap_mode="r"), meta["feature_names"]
+
+
+def cached_design_matrix(
+    name: str, X: pd.DataFrame, preprocessor, cache_dir: str = DESIGN_MATRIX_DIR,
+) -> tuple[np.ndarray, list[str]]:
+    """
+    Return the encoded float32 design matrix of X, building it only if stale.
+
+    `preprocessor` is an unfitted (or fitted) ColumnTransformer; a clone is
+    fitted on X. Returns (read-only memmap, encoded feature names).
+    """
+    meta_path = _meta_path(name, cache_dir)
+    fingerprint = _fingerprint(X, preprocessor)
+    npy_path = os.path.join(cache_dir, _npy_name(name, fingerprint))
+
+    previous = _read_meta(meta_path)
+    if previous and previous.get("fingerprint") == fingerprint and os.path.exists(npy_path):
+        print(f"   ♻️  Reusing cached design matrix {npy_path}")
+        return load_design_matrix(name, cache_dir)
+
+    encoder = clone(preprocessor).fit(X)
+    feature_names = [str(n) for n in encoder.get_feature_names_out()]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = _temp_path(cache_dir, ".npy")
+    try:
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                        shape=(len(X), len(feature_names)))
+        for start in range(0, len(X), ENCODE_CHUNK_ROWS):
+            chunk = X.iloc[start:start + ENCODE_CHUNK_ROWS]
+            out[start:start + len(chunk)] = encoder.transform(chunk)
+        out.flush()
+        del out
+        os.replace(tmp_path, npy_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    # Publishing the .json switches readers to the new matrix in one step
+    tmp_meta = _temp_path(cache_dir, ".json")
+    with open(tmp_meta, "w") as f:
+        json.dump({"npy": os.path.basename(npy_path), "feature_names": feature_names,
+                   "shape": [len(X), len(feature_names)], "fingerprint": fingerprint}, f)
+    os.replace(tmp_meta, meta_path)
+
+    # The superseded matrix (and any pre-fingerprint <name>.npy) is no longer
+    # referenced; open memmaps keep their pages, and Windows refuses removal
+    for stale in {previous.get("npy") if previous else None, f"{name}.npy"} - {None, os.path.basename(npy_path)}:
+        try:
+            os.remove(os.path.join(cache_dir, stale))
+        except OSError:
+            pass
+
+    size_mb = os.path.getsize(npy_path) / (1024 * 1024)
+    print(f"   💾 Cached design matrix to {npy_path} ({len(X)} × {len(feature_names)}, {size_mb:.1f} MB)")
+    return load_design_matrix(name, cache_dir)
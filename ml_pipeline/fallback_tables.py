@@ -0,0 +1,178 @@
+"""
+fallback_tables.py — Precomputed fallback hierarchy for player lookups.
+
+Prediction falls back from the exact (player, map, agent) row to coarser
+history when a combination has never been played. Instead of re-scanning
+player_features and averaging on every request, the feature stage
+materializes each level as its own keyed table:
+
+  player_map    — mean of a player's rows per (player, map)
+  player_agent  — mean of a player's rows per (player, agent)
+  player        — mean of all of a player's rows
+  agent_prior   — mean over all players per agent
+  role_prior    — mean over all players per role
+
+Player names are keyed case-insensitively (player_key = casefolded name).
+PlayerFallbackIndex resolves a lookup chain with hash-index lookups only,
+for one query (resolve) or a whole batch at once (resolve_many).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.config import (
+    PLAYER_MAP_FEATURES_PARQUET, PLAYER_AGENT_FEATURES_PARQUET,
+    PLAYER_OVERALL_FEATURES_PARQUET, AGENT_PRIORS_PARQUET, ROLE_PRIORS_PARQUET,
+)
+
+
+# level name → (key columns, parquet path)
+FALLBACK_TABLES = {
+    "player_map":   (["player_key", "map"],   PLAYER_MAP_FEATURES_PARQUET),
+    "player_agent": (["player_key", "agent"], PLAYER_AGENT_FEATURES_PARQUET),
+    "player":       (["player_key"],          PLAYER_OVERALL_FEATURES_PARQUET),
+    "agent_prior":  (["agent"],               AGENT_PRIORS_PARQUET),
+    "role_prior":   (["role"],                ROLE_PRIORS_PARQUET),
+}
+
+EXACT_KEYS = ["player_key", "map", "agent"]
+
+
+def player_key(name: str) -> str:
+    """Normalize a player name for case-insensitive lookups."""
+    return name.casefold()
+
+
+def _with_player_key(player_feats: pd.DataFrame) -> pd.DataFrame:
+    return player_feats.assign(player_key=player_feats["player_name"].str.casefold())
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BUILD (feature stage)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def build_fallback_tables(player_feats: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    Aggregate player_features into one table per fallback level.
+
+    Each table holds the key columns plus the mean of every numeric column,
+    i.e. exactly what `hist.mean(numeric_only=True)` would give per request.
+    """
+    feats = _with_player_key(player_feats)
+    numeric_cols = list(player_feats.select_dtypes("number").columns)
+
+    tables = {}
+    for level, (keys, _) in FALLBACK_TABLES.items():
+        tables[level] = feats.groupby(keys)[numeric_cols].mean().reset_index()
+    return tables
+
+
+def save_fallback_tables(tables: dict[str, pd.DataFrame]):
+    """Write each fallback table to its configured Parquet path."""
+    for level, table in tables.items():
+        path = FALLBACK_TABLES[level][1]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table.to_parquet(path, index=False)
+        print(f"💾 Saved {level} fallback table to {path} ({table.shape[0]} rows)")
+
+
+def load_fallback_tables(player_feats: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    Load the precomputed fallback tables.
+
+    If they have not been built yet (older feature run), they are derived
+    from `player_feats` once instead.
+    """
+    paths = [path for _, path in FALLBACK_TABLES.values()]
+    if all(os.path.exists(p) for p in paths):
+        return {level: pd.read_parquet(path) for level, (_, path) in FALLBACK_TABLES.items()}
+    return build_fallback_tables(player_feats)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# LOOKUP (prediction)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PlayerFallbackIndex:
+    """
+    Hash-indexed access to exact player rows and every fallback level.
+
+    Usage:
+        level, ref = index.resolve([
+            ("exact",      (key, map_name, agent)),
+            ("player_map", (key, map_name)),
+            ("player",     (key,)),
+        ])
+    """
+
+    def __init__(self, player_feats: pd.DataFrame, tables: dict[str, pd.DataFrame]):
+        numeric_cols = list(player_feats.select_dtypes("number").columns)
+
+        # Exact level: first row per (player_key, map, agent), like hist.iloc[0]
+        exact = _with_player_key(player_feats).set_index(EXACT_KEYS)[numeric_cols]
+        exact = exact[~exact.index.duplicated(keep="first")]
+
+        self.columns = numeric_cols
+        self._tables = {"exact": exact}
+        for level, (keys, _) in FALLBACK_TABLES.items():
+            self._tables[level] = tables[level].set_index(keys).reindex(columns=numeric_cols)
+        # Key tuple → row position and dense float copies, for batched lookups
+        self._values = {level: t.to_numpy(dtype=np.float64) for level, t in self._tables.items()}
+        self._positions = {
+            level: {(k if isinstance(k, tuple) else (k,)): i for i, k in enumerate(t.index)}
+            for level, t in self._tables.items()
+        }
+
+    @classmethod
+    def load(cls, player_feats: pd.DataFrame) -> "PlayerFallbackIndex":
+        return cls(player_feats, load_fallback_tables(player_feats))
+
+    def lookup(self, level: str, key) -> pd.Series | None:
+        """Return the row stored under `key` at `level`, or None."""
+        if isinstance(key, tuple) and len(key) == 1:
+            key = key[0]
+        table = self._tables[level]
+        try:
+            pos = table.index.get_loc(key)
+        except KeyError:
+            return None
+        return table.iloc[pos]
+
+    def resolve(self, chain: list[tuple[str, tuple]]) -> tuple[str | None, pd.Series | None]:
+        """Walk a (level, key) chain and return the first level that has a row."""
+        for level, key in chain:
+            row = self.lookup(level, key)
+            if row is not None:
+                return level, row
+        return None, None
+
+    def resolve_many(self, chain: list[tuple[str, list[tuple]]]) -> tuple[list[str | None], np.ndarray]:
+        """
+        Batched resolve() for many queries at once.
+
+        `chain` pairs each level with one key tuple per query, e.g.
+        [("exact", [(key, map, agent), ...]), ("player", [(key,), ...])].
+        Returns the resolved level per query (None if no level has a row) and
+        an (n_queries, len(self.columns)) float array of the resolved rows
+        (NaN where unresolved), gathered from the dense tables in one step
+        per level.
+        """
+        n = len(chain[0][1]) if chain else 0
+        levels = [None] * n
+        values = np.full((n, len(self.columns)), np.nan)
+        pending = list(range(n))
+
+        for level, keys in chain:
+            if not pending:
+                break
+            positions = self._positions[level]
+            hits = [(i, positions[keys[i]]) for i in pending if keys[i] in positions]
+            if hits:
+                rows, pos = zip(*hits)
+                values[list(rows)] = self._values[level][list(pos)]
+                for i in rows:
+                    levels[i] = level
+                pending = [i for i in pending if levels[i] is None]
+
+        return levels, values
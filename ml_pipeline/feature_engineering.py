@@ -4,17 +4,30 @@ feature_engineering.py — Step 2: Build player-level and match-level features.
 Reads the cleaned player_stats.parquet and produces:
   1. player_features.parquet — aggregated historical stats per (player, map, agent)
   2. match_features.parquet — team-level features + label for win prediction
+
+Both tables can also be built out-of-core (chunked=True): row batches are
+streamed from the Parquet file, player features are reduced from per-batch
+partial aggregates, and match features are built one match-partition at a time.
+
+backend="duckdb" runs the same logic as lazy SQL query plans over the Parquet
+file instead (see feature_engineering_duckdb.py).
 """
 
 import os
+import tempfile
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from ml_pipeline.config import (
     DATA_DIR, PLAYER_STATS_PARQUET,
     PLAYER_FEATURES_PARQUET, MATCH_FEATURES_PARQUET,
     STAT_COLUMN_MAP, PHASES, ROLES,
+    FEATURE_BATCH_ROWS, MATCH_PARTITIONS,
+    DISTRIBUTION_STATS, DISTRIBUTION_QUANTILES,
 )
+from ml_pipeline.fallback_tables import build_fallback_tables, save_fallback_tables
 
 
 # ─── Numeric stat columns we aggregate ───────────────────────────────────────
@@ -32,6 +45,15 @@ NUMERIC_STAT_COLS = _stat_columns() + [
     "kd_ratio", "kd_ratio_attack", "kd_ratio_defense", "fk_fd_ratio"
 ]
 
+PLAYER_GROUP_COLS = ["player_name", "map", "agent", "role"]
+
+# Spread aggregates for DISTRIBUTION_STATS (in addition to the mean)
+DISTRIBUTION_AGGS = ["std", "min", "max"]
+
+
+def _quantile_suffix(q: float) -> str:
+    return f"p{int(round(q * 100))}"
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # PLAYER FEATURES
@@ -43,19 +65,22 @@ def build_player_features(df: pd.DataFrame) -> pd.DataFrame:
     
     For each group, compute:
       - mean of every numeric stat column
+      - std / min / max / percentiles of the key DISTRIBUTION_STATS
       - match count (sample size)
       - win rate
       - attack-defense differential for rating
     """
     print("🔧 Building player-level features...")
 
-    group_cols = ["player_name", "map", "agent", "role"]
-
-    # Aggregation: mean of stats + count + win rate
-    agg_dict = {col: "mean" for col in NUMERIC_STAT_COLS if col in df.columns}
+    # Aggregation: mean of stats (+ spread for key stats) + count + win rate
+    agg_dict = {
+        col: ["mean"] + DISTRIBUTION_AGGS if col in DISTRIBUTION_STATS else "mean"
+        for col in NUMERIC_STAT_COLS if col in df.columns
+    }
     agg_dict["is_winner"] = ["mean", "count"]
 
-    grouped = df.groupby(group_cols, as_index=False).agg(agg_dict)
+    groups = df.groupby(PLAYER_GROUP_COLS)
+    grouped = groups.agg(agg_dict)
 
     # Flatten multi-level columns
     grouped.columns = [
@@ -69,14 +94,31 @@ def build_player_features(df: pd.DataFrame) -> pd.DataFrame:
         "is_winner_count": "match_count",
     })
 
-    # Derived: attack-defense differential
+    # Percentiles reuse the same grouping
+    grouped = grouped.join(_quantile_features(groups, df.columns)).reset_index()
+
+    grouped = _add_player_derived_features(grouped)
+
+    print(f"   ✅ Player features: {grouped.shape[0]} rows × {grouped.shape[1]} columns")
+    return grouped
+
+
+def _quantile_features(groups, columns) -> pd.DataFrame:
+    """Per-group percentiles of the distribution stats, e.g. rating_total_p50."""
+    cols = [c for c in DISTRIBUTION_STATS if c in columns]
+    quantiles = groups[cols].quantile(DISTRIBUTION_QUANTILES).unstack(level=-1)
+    quantiles.columns = [f"{col}_{_quantile_suffix(q)}" for col, q in quantiles.columns]
+    return quantiles
+
+
+def _add_player_derived_features(grouped: pd.DataFrame) -> pd.DataFrame:
+    """Add attack-defense differentials to an aggregated player feature frame."""
     if "rating_attack" in grouped.columns and "rating_defense" in grouped.columns:
         grouped["rating_atk_def_diff"] = grouped["rating_attack"] - grouped["rating_defense"]
 
     if "acs_attack" in grouped.columns and "acs_defense" in grouped.columns:
         grouped["acs_atk_def_diff"] = grouped["acs_attack"] - grouped["acs_defense"]
 
-    print(f"   ✅ Player features: {grouped.shape[0]} rows × {grouped.shape[1]} columns")
     return grouped
 
 
@@ -129,6 +171,13 @@ def build_match_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     print("🔧 Building match-level features...")
 
+    match_df = pd.DataFrame(_match_feature_rows(df))
+    print(f"   ✅ Match features: {match_df.shape[0]} rows × {match_df.shape[1]} columns")
+    return match_df
+
+
+def _match_feature_rows(df: pd.DataFrame) -> list[dict]:
+    """Build one feature row per (match_id, map_id) with 5 players on each side."""
     # Group by (match_id, map_id) — each group has ~10 players
     match_groups = df.groupby(["match_id", "map_id"])
 
@@ -180,7 +229,209 @@ def build_match_features(df: pd.DataFrame) -> pd.DataFrame:
 
         match_rows.append(row)
 
+    return match_rows
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# OUT-OF-CORE (CHUNKED) MODE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _partial_player_aggregates(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce one row batch to mergeable partial aggregates per player group.
+
+    For every stat column we keep the sum and the non-null count; the key
+    distribution stats also keep M2 (sum of squared deviations from the batch
+    mean), min and max, so partials of different batches can be merged exactly.
+    """
+    value_cols = [col for col in NUMERIC_STAT_COLS if col in chunk.columns] + ["is_winner"]
+    dist_cols = [col for col in DISTRIBUTION_STATS if col in chunk.columns]
+
+    grouped = chunk.groupby(PLAYER_GROUP_COLS)
+    sums = grouped[value_cols].sum()
+    counts = grouped[value_cols].count()
+    m2 = (grouped[dist_cols].var(ddof=0) * counts[dist_cols]).fillna(0.0)
+
+    return pd.concat([
+        sums,
+        counts.add_suffix("__n"),
+        m2.add_suffix("__m2"),
+        grouped[dist_cols].min().add_suffix("__min"),
+        grouped[dist_cols].max().add_suffix("__max"),
+    ], axis=1)
+
+
+def _merge_partials(acc: pd.DataFrame, partial: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge two partial aggregate frames (Chan et al. parallel variance update).
+
+    M2 = M2_a + M2_b + (mean_a - mean_b)² · n_a · n_b / (n_a + n_b)
+    """
+    index = acc.index.union(partial.index)
+    a = acc.reindex(index)
+    b = partial.reindex(index)
+    merged = pd.DataFrame(index=index)
+
+    value_cols = [c for c in acc.columns if "__" not in c]
+    for col in value_cols:
+        merged[col] = a[col].fillna(0.0) + b[col].fillna(0.0)
+        merged[f"{col}__n"] = a[f"{col}__n"].fillna(0) + b[f"{col}__n"].fillna(0)
+
+    for col in [c[:-len("__m2")] for c in acc.columns if c.endswith("__m2")]:
+        n_a = a[f"{col}__n"].fillna(0)
+        n_b = b[f"{col}__n"].fillna(0)
+        n = (n_a + n_b).replace(0, np.nan)
+        delta = a[col] / n_a.replace(0, np.nan) - b[col] / n_b.replace(0, np.nan)
+        merged[f"{col}__m2"] = (
+            a[f"{col}__m2"].fillna(0.0) + b[f"{col}__m2"].fillna(0.0)
+            + (delta ** 2 * n_a * n_b / n).fillna(0.0)
+        )
+        merged[f"{col}__min"] = np.fmin(a[f"{col}__min"], b[f"{col}__min"])
+        merged[f"{col}__max"] = np.fmax(a[f"{col}__max"], b[f"{col}__max"])
+
+    return merged[acc.columns]
+
+
+class _HashPartitioner:
+    """Spill Arrow tables into hash partitions of one key column."""
+
+    def __init__(self, out_dir: str, key: str, schema: pa.Schema, num_partitions: int):
+        self.out_dir = out_dir
+        self.key = key
+        self.schema = schema
+        self.num_partitions = num_partitions
+        self.writers = {}
+
+    def write(self, table: pa.Table):
+        keys = table.column(self.key).to_pandas()
+        buckets = pd.util.hash_pandas_object(keys, index=False).to_numpy() % self.num_partitions
+
+        for bucket in np.unique(buckets):
+            if bucket not in self.writers:
+                path = os.path.join(self.out_dir, f"part-{bucket:04d}.parquet")
+                self.writers[bucket] = pq.ParquetWriter(path, self.schema)
+            self.writers[bucket].write_table(table.take(np.flatnonzero(buckets == bucket)))
+
+    def close(self) -> list[str]:
+        for writer in self.writers.values():
+            writer.close()
+        return [os.path.join(self.out_dir, f"part-{b:04d}.parquet") for b in sorted(self.writers)]
+
+
+def build_player_features_chunked(
+    player_stats_path: str = PLAYER_STATS_PARQUET,
+    batch_rows: int = FEATURE_BATCH_ROWS,
+    num_partitions: int = MATCH_PARTITIONS,
+) -> pd.DataFrame:
+    """
+    Out-of-core equivalent of build_player_features().
+
+    Streams row batches from the Parquet file and merges each batch's partial
+    aggregates into a running per-group accumulator. Memory is bounded by the
+    number of (player, map, agent, role) groups, not the number of rows.
+
+    Percentiles are not mergeable, so during the same pass the key stat
+    columns are spilled into player_name hash partitions and the percentiles
+    are computed exactly one partition at a time.
+    """
+    print("🔧 Building player-level features (chunked)...")
+
+    parquet_file = pq.ParquetFile(player_stats_path)
+    dist_cols = [c for c in DISTRIBUTION_STATS if c in parquet_file.schema_arrow.names]
+    spill_schema = pa.schema([parquet_file.schema_arrow.field(c) for c in PLAYER_GROUP_COLS + dist_cols])
+
+    acc = None
+    n_batches = 0
+
+    with tempfile.TemporaryDirectory(prefix="player_parts_", dir=DATA_DIR) as tmp_dir:
+        partitioner = _HashPartitioner(tmp_dir, "player_name", spill_schema, num_partitions)
+        try:
+            for batch in parquet_file.iter_batches(batch_size=batch_rows):
+                partial = _partial_player_aggregates(batch.to_pandas())
+                acc = partial if acc is None else _merge_partials(acc, partial)
+                partitioner.write(pa.Table.from_batches([batch]).select(spill_schema.names).cast(spill_schema))
+                n_batches += 1
+        finally:
+            partitions = partitioner.close()
+
+        if acc is None:
+            return pd.DataFrame(columns=PLAYER_GROUP_COLS)
+
+        quantiles = pd.concat([
+            _quantile_features(pd.read_parquet(path).groupby(PLAYER_GROUP_COLS), dist_cols)
+            for path in partitions
+        ])
+
+    # Finalize: mean = sum / non-null count (all-NaN groups stay NaN),
+    # std = sqrt(M2 / (n - 1)) for groups with at least two values
+    value_cols = [c for c in acc.columns if "__" not in c]
+    grouped = pd.DataFrame(index=acc.index)
+    for col in value_cols:
+        n = acc[f"{col}__n"]
+        grouped[col] = acc[col] / n.replace(0, np.nan)
+        if col in dist_cols:
+            grouped[f"{col}_std"] = np.sqrt(acc[f"{col}__m2"] / (n - 1).where(n > 1))
+            grouped[f"{col}_min"] = acc[f"{col}__min"]
+            grouped[f"{col}_max"] = acc[f"{col}__max"]
+
+    grouped = grouped.rename(columns={"is_winner": "win_rate"})
+    grouped["match_count"] = acc["is_winner__n"].astype("int64")
+    grouped = grouped.join(quantiles).reset_index()
+
+    grouped = _add_player_derived_features(grouped)
+
+    print(f"   Streamed {n_batches} batches")
+    print(f"   ✅ Player features: {grouped.shape[0]} rows × {grouped.shape[1]} columns")
+    return grouped
+
+
+def _partition_by_match(
+    parquet_file: pq.ParquetFile, out_dir: str, batch_rows: int, num_partitions: int
+) -> list[str]:
+    """
+    Hash-partition the player stats rows by match_id into spill files.
+
+    Every map of a match lands in the same partition, so each partition can be
+    turned into match features independently.
+    """
+    schema = parquet_file.schema_arrow
+    partitioner = _HashPartitioner(out_dir, "match_id", schema, num_partitions)
+
+    try:
+        for batch in parquet_file.iter_batches(batch_size=batch_rows):
+            partitioner.write(pa.Table.from_batches([batch], schema=schema))
+    finally:
+        partitions = partitioner.close()
+
+    return partitions
+
+
+def build_match_features_chunked(
+    player_stats_path: str = PLAYER_STATS_PARQUET,
+    batch_rows: int = FEATURE_BATCH_ROWS,
+    num_partitions: int = MATCH_PARTITIONS,
+) -> pd.DataFrame:
+    """
+    Out-of-core equivalent of build_match_features().
+
+    Spills rows into match_id hash partitions, then builds match features one
+    partition at a time. Peak memory is roughly one partition of player rows.
+    """
+    print("🔧 Building match-level features (chunked)...")
+
+    parquet_file = pq.ParquetFile(player_stats_path)
+    match_rows = []
+
+    with tempfile.TemporaryDirectory(prefix="match_parts_", dir=DATA_DIR) as tmp_dir:
+        partitions = _partition_by_match(parquet_file, tmp_dir, batch_rows, num_partitions)
+        for path in partitions:
+            match_rows.extend(_match_feature_rows(pd.read_parquet(path)))
+
     match_df = pd.DataFrame(match_rows)
+    if not match_df.empty:
+        match_df = match_df.sort_values(["match_id", "map_id"], ignore_index=True)
+
+    print(f"   Processed {len(partitions)} match partitions")
     print(f"   ✅ Match features: {match_df.shape[0]} rows × {match_df.shape[1]} columns")
     return match_df
 
@@ -189,21 +440,52 @@ def build_match_features(df: pd.DataFrame) -> pd.DataFrame:
 # RUN
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def run_feature_engineering(player_stats_path: str = PLAYER_STATS_PARQUET):
-    """Full feature engineering pipeline: load cleaned data → build features → save."""
-    print("📂 Loading cleaned player stats...")
-    df = pd.read_parquet(player_stats_path)
-    print(f"   Loaded {df.shape[0]} rows")
+def run_feature_engineering(
+    player_stats_path: str = PLAYER_STATS_PARQUET,
+    chunked: bool = False,
+    batch_rows: int = FEATURE_BATCH_ROWS,
+    backend: str = "pandas",
+):
+    """
+    Full feature engineering pipeline: load cleaned data → build features → save.
 
-    # Player features
-    player_feats = build_player_features(df)
+    With chunked=True the player stats are never fully loaded; both feature
+    tables are built out-of-core from streamed row batches.
+    With backend="duckdb" both tables are built by DuckDB query plans.
+    """
     os.makedirs(DATA_DIR, exist_ok=True)
+
+    if backend == "duckdb":
+        from ml_pipeline.feature_engineering_duckdb import (
+            build_player_features_duckdb, build_match_features_duckdb,
+        )
+        print("📂 Querying cleaned player stats with DuckDB...")
+        player_feats = build_player_features_duckdb(player_stats_path)
+    elif chunked:
+        num_rows = pq.ParquetFile(player_stats_path).metadata.num_rows
+        print(f"📂 Streaming cleaned player stats ({num_rows} rows, {batch_rows} per batch)...")
+        player_feats = build_player_features_chunked(player_stats_path, batch_rows)
+    else:
+        print("📂 Loading cleaned player stats...")
+        df = pd.read_parquet(player_stats_path)
+        print(f"   Loaded {df.shape[0]} rows")
+        player_feats = build_player_features(df)
+
+    # Player features
     player_feats.to_parquet(PLAYER_FEATURES_PARQUET, index=False)
     size_mb = os.path.getsize(PLAYER_FEATURES_PARQUET) / (1024 * 1024)
     print(f"💾 Saved player features to {PLAYER_FEATURES_PARQUET} ({size_mb:.1f} MB)")
 
+    # Fallback hierarchy (player×map, player×agent, player, agent/role priors)
+    save_fallback_tables(build_fallback_tables(player_feats))
+
     # Match features
-    match_feats = build_match_features(df)
+    if backend == "duckdb":
+        match_feats = build_match_features_duckdb(player_stats_path)
+    elif chunked:
+        match_feats = build_match_features_chunked(player_stats_path, batch_rows)
+    else:
+        match_feats = build_match_features(df)
     match_feats.to_parquet(MATCH_FEATURES_PARQUET, index=False)
     size_mb = os.path.getsize(MATCH_FEATURES_PARQUET) / (1024 * 1024)
     print(f"💾 Saved match features to {MATCH_FEATURES_PARQUET} ({size_mb:.1f} MB)")
@@ -0,0 +1,206 @@
+"""
+feature_engineering_duckdb.py — Lazy columnar backend for Step 2.
+
+Expresses build_player_features() and build_match_features() as DuckDB SQL
+query plans executed directly over player_stats.parquet. DuckDB only reads the
+columns each query references (projection pushdown), applies filters while
+scanning (predicate pushdown), runs multithreaded, and spills to disk when a
+plan does not fit in memory.
+
+Results are equal to the pandas path (same columns, order and values).
+DuckDB is optional: `pip install duckdb` to enable `--backend duckdb`.
+"""
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+try:
+    import duckdb
+except ImportError:  # optional backend
+    duckdb = None
+
+from ml_pipeline.config import (
+    PLAYER_STATS_PARQUET, ROLES, DISTRIBUTION_STATS, DISTRIBUTION_QUANTILES,
+)
+from ml_pipeline.feature_engineering import (
+    NUMERIC_STAT_COLS, PLAYER_GROUP_COLS,
+    _add_player_derived_features, _quantile_suffix,
+)
+
+
+# Team-level averages / sums, in the same order as _team_features()
+TEAM_AVG_COLS = ["rating_total", "acs_total", "adr_total", "kast_total",
+                 "kd_ratio", "fk_fd_ratio", "hs_pct_total"]
+
+TEAM_SUM_COLS = [
+    ("kills_total",        "kills_sum"),
+    ("deaths_total",       "deaths_sum"),
+    ("first_kills_total",  "fk_sum"),
+    ("first_deaths_total", "fd_sum"),
+]
+
+DELTA_SUFFIXES = ["rating_total_avg", "acs_total_avg", "adr_total_avg",
+                  "kd_ratio_avg", "kills_sum", "fk_sum"]
+
+
+def _connect(threads: int | None = None):
+    """Open an in-memory DuckDB connection."""
+    if duckdb is None:
+        raise ImportError("The DuckDB backend requires duckdb: pip install duckdb")
+    con = duckdb.connect()
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    return con
+
+
+def _q(name: str) -> str:
+    """Quote an SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _source(path: str) -> str:
+    """SQL table expression scanning a Parquet file."""
+    return "read_parquet('" + path.replace("'", "''") + "')"
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PLAYER FEATURES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def player_features_sql(path: str = PLAYER_STATS_PARQUET) -> str:
+    """Build the player feature query for the columns present in `path`."""
+    available = set(pq.read_schema(path).names)
+    stat_cols = [c for c in NUMERIC_STAT_COLS if c in available]
+
+    keys = ", ".join(_q(c) for c in PLAYER_GROUP_COLS)
+    dist_cols = [c for c in DISTRIBUTION_STATS if c in available]
+
+    select = [keys]
+    for c in stat_cols:
+        select.append(f"avg({_q(c)}) AS {_q(c)}")
+        if c in dist_cols:
+            select.append(f"stddev_samp({_q(c)}) AS {_q(c + '_std')}")
+            select.append(f"min({_q(c)}) AS {_q(c + '_min')}")
+            select.append(f"max({_q(c)}) AS {_q(c + '_max')}")
+    select += ["avg(is_winner) AS win_rate", "count(is_winner) AS match_count"]
+    select += [
+        f"quantile_cont({_q(c)}, {q}) AS {_q(c + '_' + _quantile_suffix(q))}"
+        for c in dist_cols for q in DISTRIBUTION_QUANTILES
+    ]
+
+    # pandas groupby drops rows with a null key
+    not_null = " AND ".join(f"{_q(c)} IS NOT NULL" for c in PLAYER_GROUP_COLS)
+
+    return (
+        f"SELECT {', '.join(select)}\n"
+        f"FROM {_source(path)}\n"
+        f"WHERE {not_null}\n"
+        f"GROUP BY {keys}\n"
+        f"ORDER BY {keys}"
+    )
+
+
+def build_player_features_duckdb(
+    path: str = PLAYER_STATS_PARQUET, threads: int | None = None
+) -> pd.DataFrame:
+    """DuckDB equivalent of build_player_features(), reading `path` lazily."""
+    print("🔧 Building player-level features (duckdb)...")
+
+    con = _connect(threads)
+    try:
+        grouped = con.execute(player_features_sql(path)).df()
+    finally:
+        con.close()
+
+    grouped = _add_player_derived_features(grouped)
+
+    print(f"   ✅ Player features: {grouped.shape[0]} rows × {grouped.shape[1]} columns")
+    return grouped
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MATCH FEATURES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def match_features_sql(path: str = PLAYER_STATS_PARQUET) -> str:
+    """Build the match feature query for the columns present in `path`."""
+    available = set(pq.read_schema(path).names)
+
+    # ─── Per (match, map, team) aggregates ───────────────────────────────
+    team_select = ["match_id", "map_id", "team", "count(*) AS n_players"]
+    team_feats = []
+
+    for col in TEAM_AVG_COLS:
+        if col in available:
+            team_select.append(f"avg({_q(col)}) AS {_q(col + '_avg')}")
+            team_feats.append(f"{col}_avg")
+
+    for col, name in TEAM_SUM_COLS:
+        if col in available:
+            team_select.append(f"coalesce(sum({_q(col)}), 0) AS {_q(name)}")
+            team_feats.append(name)
+
+    for role in ROLES:
+        name = f"num_{role.lower()}s"
+        team_select.append(f"count(*) FILTER (WHERE role = '{role}') AS {_q(name)}")
+        team_feats.append(name)
+
+    if "rating_attack" in available:
+        team_select.append("avg(rating_attack) AS rating_attack_avg")
+        team_select.append("avg(rating_defense) AS rating_defense_avg")
+        team_feats += ["rating_attack_avg", "rating_defense_avg"]
+
+    # ─── Final projection ────────────────────────────────────────────────
+    select = ["m.match_id", "m.map_id", "m.map", "m.team_a", "m.team_b"]
+    select += [f"ta.{_q(f)} AS {_q('ta_' + f)}" for f in team_feats]
+    select += [f"tb.{_q(f)} AS {_q('tb_' + f)}" for f in team_feats]
+    for suffix in DELTA_SUFFIXES:
+        if suffix in team_feats:
+            select.append(f"ta.{_q(suffix)} - tb.{_q(suffix)} AS {_q('delta_' + suffix)}")
+        else:
+            select.append(f"0 AS {_q('delta_' + suffix)}")
+    select.append("CAST(CASE WHEN m.winner = m.team_a THEN 1 ELSE 0 END AS BIGINT) AS team_a_wins")
+
+    stat_cols = [c for c in TEAM_AVG_COLS + [c for c, _ in TEAM_SUM_COLS]
+                 + ["rating_attack", "rating_defense"] if c in available]
+    projected = ["match_id", "map_id", "map", "team", "team_a", "team_b",
+                 "winner", "role"] + stat_cols
+
+    return (
+        "WITH rows AS (\n"
+        f"  SELECT {', '.join(_q(c) for c in projected)}\n"
+        f"  FROM {_source(path)}\n"
+        "  WHERE match_id IS NOT NULL AND map_id IS NOT NULL\n"
+        "),\n"
+        "teams AS (\n"
+        f"  SELECT {', '.join(team_select)}\n"
+        "  FROM rows GROUP BY match_id, map_id, team\n"
+        "),\n"
+        "matches AS (\n"
+        "  SELECT match_id, map_id, first(map) AS map, first(team_a) AS team_a,\n"
+        "         first(team_b) AS team_b, first(winner) AS winner\n"
+        "  FROM rows GROUP BY match_id, map_id\n"
+        ")\n"
+        f"SELECT {', '.join(select)}\n"
+        "FROM matches m\n"
+        "JOIN teams ta ON ta.match_id = m.match_id AND ta.map_id = m.map_id AND ta.team = m.team_a\n"
+        "JOIN teams tb ON tb.match_id = m.match_id AND tb.map_id = m.map_id AND tb.team = m.team_b\n"
+        "WHERE ta.n_players >= 5 AND tb.n_players >= 5\n"
+        "ORDER BY m.match_id, m.map_id"
+    )
+
+
+def build_match_features_duckdb(
+    path: str = PLAYER_STATS_PARQUET, threads: int | None = None
+) -> pd.DataFrame:
+    """DuckDB equivalent of build_match_features(), reading `path` lazily."""
+    print("🔧 Building match-level features (duckdb)...")
+
+    con = _connect(threads)
+    try:
+        match_df = con.execute(match_features_sql(path)).df()
+    finally:
+        con.close()
+
+    print(f"   ✅ Match features: {match_df.shape[0]} rows × {match_df.shape[1]} columns")
+    return match_df
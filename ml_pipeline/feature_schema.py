@@ -0,0 +1,97 @@
+"""
+feature_schema.py — The exact model input schema, saved with each model.
+
+Training records the ordered input columns, their dtypes and a default fill
+value per column (training median for numeric columns, most frequent value
+for categorical ones). The schema is stored in the model's registry manifest,
+so prediction builds input rows straight from it — no feature table is read
+to recover column names and no per-call column reconciliation is needed.
+
+Models saved before schemas existed get one derived from the fitted
+preprocessor, with 0 / "" defaults (the previous fill behaviour).
+"""
+
+import pandas as pd
+
+from ml_pipeline.compact_models import CompactModel
+
+
+class FeatureSchema:
+    """Ordered input columns of a model with dtypes and default fill values."""
+
+    def __init__(self, columns: list[str], dtypes: dict[str, str], defaults: dict,
+                 categorical: list[str]):
+        self.columns = list(columns)
+        self.dtypes = dtypes
+        self.defaults = defaults
+        self.categorical = list(categorical)
+        self.numeric = [c for c in self.columns if c not in set(self.categorical)]
+
+    @classmethod
+    def from_frame(cls, X: pd.DataFrame, categorical_features: list[str]) -> "FeatureSchema":
+        """Schema of a training input frame (column order is kept as-is)."""
+        defaults = {}
+        for col in X.columns:
+            values = X[col].dropna()
+            if col in categorical_features:
+                defaults[col] = str(values.mode().iloc[0]) if len(values) else ""
+            elif not len(values):
+                defaults[col] = 0
+            elif pd.api.types.is_integer_dtype(X[col]):
+                defaults[col] = int(round(float(values.median())))
+            else:
+                defaults[col] = float(values.median())
+        return cls(list(X.columns), {c: str(X[c].dtype) for c in X.columns}, defaults,
+                   [c for c in X.columns if c in categorical_features])
+
+    @classmethod
+    def from_model(cls, model) -> "FeatureSchema":
+        """Fallback schema read off a fitted pipeline or CompactModel (0 / "" defaults)."""
+        if isinstance(model, CompactModel):
+            categorical = model.preprocessor.cat_features
+            numeric = model.preprocessor.num_features
+        else:
+            transformers = model.named_steps["preprocessor"].transformers_
+            categorical = next((list(cols) for name, _, cols in transformers if name == "cat"), [])
+            numeric = next((list(cols) for name, _, cols in transformers if name == "num"), [])
+
+        columns = categorical + numeric
+        dtypes = {c: ("object" if c in categorical else "float64") for c in columns}
+        defaults = {c: ("" if c in categorical else 0) for c in columns}
+        return cls(columns, dtypes, defaults, categorical)
+
+    def to_dict(self) -> dict:
+        return {
+            "columns":     self.columns,
+            "dtypes":      self.dtypes,
+            "defaults":    self.defaults,
+            "categorical": self.categorical,
+            "numeric":     self.numeric,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "FeatureSchema":
+        return cls(d["columns"], d["dtypes"], d["defaults"], d["categorical"])
+
+    def row(self, values) -> dict:
+        """One input row in schema order; keys missing from `values` get their default."""
+        return {c: values.get(c, d) for c, d in self.defaults.items()}
+
+    def frame(self, rows: list[dict]) -> pd.DataFrame:
+        """Schema-ordered rows (from row()) as a DataFrame with the training dtypes."""
+        return pd.DataFrame(rows, columns=self.columns).astype(self.dtypes, copy=False)
+
+    def batch_input(self, model, columns: dict, n: int):
+        """
+        n input rows from per-column arrays, in the form `model` predicts on:
+        a column dict for a CompactModel, else a typed frame. Schema columns
+        absent from `columns` take their default; extra keys are ignored.
+        """
+        data = {c: columns[c] if c in columns else [d] * n for c, d in self.defaults.items()}
+        if isinstance(model, CompactModel):
+            return data
+        return pd.DataFrame(data, columns=self.columns).astype(self.dtypes, copy=False)
+
+    def model_input(self, model, rows: list[dict]):
+        """Rows in the form `model` predicts on: dicts for a CompactModel, else a frame."""
+        return rows if isinstance(model, CompactModel) else self.frame(rows)
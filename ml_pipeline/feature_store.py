@@ -0,0 +1,75 @@
+"""
+feature_store.py — O(1) player lookups over player_features.
+
+Per-player queries (agent suggestions, compositions, team and player
+profiles) used to mask the whole table with
+`player_feats["player_name"].str.lower() == name.lower()`, re-lowercasing
+every name on every call. PlayerFeatureStore is built once at load time:
+
+  - rows are sorted (stably) by casefolded player name, so each player's
+    rows form one contiguous block;
+  - a name → (start, stop) dict gives that block without scanning;
+  - a (player, map, agent) → row dict gives the exact row;
+  - every column is kept as a NumPy array, so column(name, col) returns a
+    view into the block rather than a copy.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.fallback_tables import player_key
+
+
+class PlayerFeatureStore:
+    """Casefolded player → row-range index over a player_features frame."""
+
+    def __init__(self, player_feats: pd.DataFrame):
+        keys = player_feats["player_name"].astype(str).str.casefold()
+        order = np.argsort(keys.to_numpy(dtype=object), kind="stable")
+
+        self.frame = player_feats.iloc[order].reset_index(drop=True)
+        sorted_keys = keys.to_numpy(dtype=object)[order]
+        self._columns = {c: self.frame[c].to_numpy() for c in self.frame.columns}
+
+        # Contiguous block per player
+        bounds = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        starts = np.r_[0, bounds] if len(sorted_keys) else bounds
+        stops = np.r_[bounds, len(sorted_keys)] if len(sorted_keys) else bounds
+        self._ranges = {sorted_keys[s]: (int(s), int(e)) for s, e in zip(starts, stops)}
+
+        # First row per (player, map, agent), as hist.iloc[0] would give
+        exact = pd.DataFrame({
+            "key": sorted_keys, "map": self._columns["map"], "agent": self._columns["agent"],
+        }).drop_duplicates(keep="first")
+        self._exact = dict(zip(zip(exact["key"], exact["map"], exact["agent"]), exact.index))
+
+    def __contains__(self, player_name: str) -> bool:
+        return player_key(player_name) in self._ranges
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def player_slice(self, player_name: str) -> slice:
+        """Row range of `player_name` in `frame` (empty if unknown)."""
+        start, stop = self._ranges.get(player_key(player_name), (0, 0))
+        return slice(start, stop)
+
+    def player_rows(self, player_name: str) -> pd.DataFrame:
+        """All rows of `player_name` (any case) — a slice of `frame`, no scan."""
+        return self.frame.iloc[self.player_slice(player_name)]
+
+    def column(self, player_name: str, col: str) -> np.ndarray:
+        """NumPy view of one column over `player_name`'s rows."""
+        return self._columns[col][self.player_slice(player_name)]
+
+    def exact_row(self, player_name: str, map_name: str, agent: str) -> pd.Series | None:
+        """First row for (player, map, agent), or None."""
+        pos = self._exact.get((player_key(player_name), map_name, agent))
+        return None if pos is None else self.frame.iloc[pos]
+
+    def agents(self, player_name: str, map_name: str | None = None) -> np.ndarray:
+        """Agents a player has rows with (on `map_name` if given), in first-seen order."""
+        agents = self.column(player_name, "agent")
+        if map_name is not None:
+            agents = agents[self.column(player_name, "map") == map_name]
+        return pd.unique(agents)
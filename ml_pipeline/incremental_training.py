@@ -0,0 +1,335 @@
+"""
+incremental_training.py — Warm-start model updates when new matches arrive.
+
+Instead of retraining both models from scratch, newly-scraped player-map rows
+are folded into the current models:
+
+  Player model — the forest grows INCREMENTAL_PLAYER_TREES extra trees fitted
+                 on the feature rows of every (player, map, agent) touched by
+                 the new stats (warm_start); the oldest trees are dropped past
+                 MAX_PLAYER_FOREST_TREES.
+  Match model  — "continue": INCREMENTAL_MATCH_ROUNDS more boosting rounds on
+                 the new maps; "window": refit on the most recent
+                 MATCH_UPDATE_WINDOW maps.
+
+The fitted preprocessing is kept as-is in warm-start mode (categories never
+seen at full training time are ignored, as at prediction time).
+
+A share of the new data is held out whole: the player rows of a random
+UPDATE_HOLDOUT_FRACTION of the touched players (as in train_player_model's
+split), and every map of the latest UPDATE_HOLDOUT_FRACTION of the new
+matches. Random rows would leak — a player's other (map, agent) rows share
+their aggregates, and maps of one series share teams and form. The current
+and updated models are both scored on the holdout and the update is
+registered and promoted as a new model version only if it does not regress.
+
+Run `--step features` over the merged player stats first so the player
+feature rows include the new matches.
+"""
+
+import copy
+import os
+import time
+import numpy as np
+import pandas as pd
+import joblib
+
+from sklearn.model_selection import GroupShuffleSplit
+from sklearn.metrics import r2_score, roc_auc_score, accuracy_score
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.ensemble import (
+    RandomForestRegressor, GradientBoostingClassifier, HistGradientBoostingClassifier,
+)
+
+from ml_pipeline.config import (
+    PLAYER_FEATURES_PARQUET, MATCH_FEATURES_PARQUET,
+    DEFAULT_MATCH_BACKEND,
+    INCREMENTAL_PLAYER_TREES, MAX_PLAYER_FOREST_TREES,
+    MATCH_UPDATE_MODES, INCREMENTAL_MATCH_ROUNDS, MATCH_UPDATE_WINDOW,
+    UPDATE_HOLDOUT_FRACTION, PROMOTION_TOLERANCE,
+)
+from ml_pipeline.feature_engineering import build_match_features
+from ml_pipeline.model_training import (
+    prepare_player_data, prepare_match_data, build_match_pipeline, player_groups, PLAYER_TARGETS,
+)
+from ml_pipeline.model_registry import (
+    resolve_model_path, load_manifest, current_version, register_model, promote_model,
+    frame_fingerprint,
+)
+from ml_pipeline.rolling_features import chronological_order
+
+# Fewer held-out rows than this make the promotion check meaningless
+MIN_HOLDOUT_ROWS = 10
+
+
+def _score_player(model, X: pd.DataFrame, y: pd.DataFrame) -> float:
+    """Mean R² over the player targets (higher is better)."""
+    y_pred = np.asarray(model.predict(X)).reshape(len(X), -1)
+    return float(np.mean([r2_score(y.iloc[:, i], y_pred[:, i]) for i in range(len(PLAYER_TARGETS))]))
+
+
+def _score_match(model, X: pd.DataFrame, y: pd.Series) -> float:
+    """AUC on the holdout, or accuracy if it holds a single class (higher is better)."""
+    if y.nunique() < 2:
+        return float(accuracy_score(y, model.predict(X)))
+    return float(roc_auc_score(y, model.predict_proba(X)[:, 1]))
+
+
+def _promote(name: str, candidate, current_score: float, candidate_score: float,
+             X_fit: pd.DataFrame, y_fit, X_check: pd.DataFrame, tolerance: float,
+             started: float, update: dict, backend: str | None = None) -> bool:
+    """Register and promote `candidate` as a new `name` version unless its holdout score regressed."""
+    print(f"   Holdout score: current {current_score:.4f} → updated {candidate_score:.4f}")
+    if candidate_score < current_score - tolerance:
+        print("   ⚠️  Updated model regressed on the holdout — keeping the current model")
+        return False
+
+    # The feature schema is unchanged by an update; carry it over from the parent
+    parent = load_manifest(name) if current_version(name) else {}
+    version = register_model(name, candidate, {
+        "backend": backend or parent.get("backend"),
+        "feature_schema": parent.get("feature_schema"),
+        "data_fingerprint": frame_fingerprint(X_fit, y_fit),
+        "n_rows": {"train": int(X_fit.shape[0]), "test": int(X_check.shape[0])},
+        "update": update,
+        "metrics": {"holdout_current": current_score, "holdout_updated": candidate_score},
+        "training_duration_s": round(time.perf_counter() - started, 2),
+    }, X_check=X_check)
+    promote_model(name, version)
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PLAYER MODEL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _player_forest(model) -> RandomForestRegressor:
+    """The fitted forest inside the player pipeline."""
+    regressor = model.named_steps["regressor"]
+    forest = regressor.regressor_ if isinstance(regressor, TransformedTargetRegressor) else regressor
+    if not isinstance(forest, RandomForestRegressor):
+        raise ValueError(f"Cannot warm-start {type(forest).__name__}; retrain the player model")
+    return forest
+
+
+def grow_player_forest(model, X: pd.DataFrame, y: pd.DataFrame,
+                       n_new_trees: int = INCREMENTAL_PLAYER_TREES,
+                       max_trees: int = MAX_PLAYER_FOREST_TREES):
+    """
+    Return a copy of the player pipeline with `n_new_trees` trees fitted on X, y.
+
+    The fitted preprocessor and target scaler are reused, so the new trees
+    predict on the same scale as the existing ones.
+    """
+    candidate = copy.deepcopy(model)
+    preprocessor = candidate.named_steps["preprocessor"]
+    regressor = candidate.named_steps["regressor"]
+
+    forest = _player_forest(candidate)
+    y_fit = y.to_numpy()
+    if isinstance(regressor, TransformedTargetRegressor):
+        y_fit = regressor.transformer_.transform(y_fit)
+
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new_trees)
+    forest.fit(preprocessor.transform(X), y_fit)
+    forest.set_params(warm_start=False)
+
+    if max_trees and len(forest.estimators_) > max_trees:
+        forest.estimators_ = forest.estimators_[-max_trees:]
+        forest.set_params(n_estimators=max_trees)
+    return candidate
+
+
+def _recent_player_rows(player_feats: pd.DataFrame, new_stats: pd.DataFrame) -> pd.DataFrame:
+    """Feature rows of every (player, map, agent) that appears in the new stats."""
+    keys = ["player_name", "map", "agent"]
+    touched = new_stats[keys].drop_duplicates()
+    return player_feats.merge(touched, on=keys, how="inner")
+
+
+def update_player_model(new_stats: pd.DataFrame,
+                        features_path: str = PLAYER_FEATURES_PARQUET,
+                        tolerance: float = PROMOTION_TOLERANCE):
+    """Warm-start the player forest on the feature rows touched by `new_stats`."""
+    print("=" * 60)
+    print("🔁 Updating Player Performance Model")
+    print("=" * 60)
+
+    model_path = resolve_model_path("player")
+    if not os.path.exists(model_path):
+        print("   ⚠️  No player model found. Run --step train first.")
+        return None
+
+    started = time.perf_counter()
+    recent = _recent_player_rows(pd.read_parquet(features_path), new_stats)
+    X, y, _, _ = prepare_player_data(recent)
+    print(f"   {X.shape[0]} feature rows touched by the new matches")
+
+    # Hold out whole players, so no held-out row shares a player with the fit
+    groups = player_groups(recent, X)
+    if groups.nunique() < 2:
+        print("   ⚠️  Not enough new players for a holdout check. Skipping player model.")
+        return None
+    fit_idx, holdout_idx = next(
+        GroupShuffleSplit(n_splits=1, test_size=UPDATE_HOLDOUT_FRACTION, random_state=42).split(X, y, groups)
+    )
+    if len(holdout_idx) < MIN_HOLDOUT_ROWS:
+        print("   ⚠️  Not enough new rows for a holdout check. Skipping player model.")
+        return None
+    X_fit, X_holdout = X.iloc[fit_idx], X.iloc[holdout_idx]
+    y_fit, y_holdout = y.iloc[fit_idx], y.iloc[holdout_idx]
+
+    model = joblib.load(model_path)
+    try:
+        candidate = grow_player_forest(model, X_fit, y_fit)
+    except ValueError as e:
+        print(f"   ⚠️  {e}")
+        return None
+
+    print(f"   Fitted {INCREMENTAL_PLAYER_TREES} new trees on {X_fit.shape[0]} rows "
+          f"({len(_player_forest(candidate).estimators_)} total)")
+
+    promoted = _promote(
+        "player", candidate,
+        _score_player(model, X_holdout, y_holdout),
+        _score_player(candidate, X_holdout, y_holdout),
+        X_fit, y_fit, X_holdout, tolerance, started,
+        {"mode": "warm_start", "new_trees": INCREMENTAL_PLAYER_TREES},
+    )
+    return candidate if promoted else model
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MATCH MODEL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def continue_match_boosting(model, X: pd.DataFrame, y: pd.Series,
+                            n_rounds: int = INCREMENTAL_MATCH_ROUNDS):
+    """Return a copy of the match pipeline with `n_rounds` more boosting rounds on X, y."""
+    candidate = copy.deepcopy(model)
+    preprocessor = candidate.named_steps["preprocessor"]
+    clf = candidate.named_steps["classifier"]
+    X_fit = preprocessor.transform(X)
+
+    if isinstance(clf, GradientBoostingClassifier):
+        clf.set_params(warm_start=True, n_estimators=clf.n_estimators_ + n_rounds)
+        clf.fit(X_fit, y)
+        clf.set_params(warm_start=False)
+    elif isinstance(clf, HistGradientBoostingClassifier):
+        clf.set_params(warm_start=True, max_iter=clf.n_iter_ + n_rounds)
+        clf.fit(X_fit, y)
+        clf.set_params(warm_start=False)
+    elif type(clf).__name__ == "XGBClassifier":
+        booster = clf.get_booster()
+        total = clf.n_estimators + n_rounds
+        clf.set_params(n_estimators=n_rounds)
+        clf.fit(X_fit, y, xgb_model=booster)
+        clf.set_params(n_estimators=total)
+    else:
+        raise ValueError(f"Cannot continue boosting {type(clf).__name__}; use --match-update window")
+    return candidate
+
+
+def refit_match_window(history: pd.DataFrame, X_new: pd.DataFrame, y_new: pd.Series,
+                       window: int = MATCH_UPDATE_WINDOW, backend: str = DEFAULT_MATCH_BACKEND):
+    """Fit a fresh match pipeline on the latest `window` maps of history plus the new rows."""
+    recent = chronological_order(history).tail(window)
+    X_hist, y_hist, categorical_features, numeric_features = prepare_match_data(recent)
+
+    X = pd.concat([X_hist, X_new[X_hist.columns]], ignore_index=True)
+    y = pd.concat([y_hist, y_new], ignore_index=True)
+
+    model = build_match_pipeline(categorical_features, numeric_features, backend)
+    model.fit(X, y)
+    return model
+
+
+def _latest_matches(new_stats: pd.DataFrame,
+                     fraction: float = UPDATE_HOLDOUT_FRACTION) -> set[str]:
+    """IDs of the most recent `fraction` of the matches in new_stats (at least one)."""
+    match_ids = chronological_order(new_stats)["match_id"].astype(str).drop_duplicates()
+    n_holdout = max(1, round(len(match_ids) * fraction))
+    return set(match_ids.iloc[-n_holdout:])
+
+
+def update_match_model(new_stats: pd.DataFrame, mode: str = "continue",
+                       backend: str = DEFAULT_MATCH_BACKEND,
+                       features_path: str = MATCH_FEATURES_PARQUET,
+                       tolerance: float = PROMOTION_TOLERANCE):
+    """Update the match model with the maps in `new_stats` ("continue" or "window")."""
+    print("=" * 60)
+    print(f"🔁 Updating Match Win Model ({mode})")
+    print("=" * 60)
+
+    if mode not in MATCH_UPDATE_MODES:
+        raise ValueError(f"Unknown match update mode '{mode}'. Choose from {MATCH_UPDATE_MODES}")
+
+    model_path = resolve_model_path("match")
+    if not os.path.exists(model_path):
+        print("   ⚠️  No match model found. Run --step train first.")
+        return None
+
+    started = time.perf_counter()
+    new_matches = build_match_features(new_stats)
+    if new_matches.empty:
+        print("   ⚠️  No complete new maps. Skipping match model.")
+        return None
+
+    # Every map row is built from that map's player rows alone, so splitting
+    # the built rows by match equals splitting new_stats before aggregating
+    held_out = new_matches["match_id"].astype(str).isin(_latest_matches(new_stats))
+    X_fit, y_fit, _, _ = prepare_match_data(new_matches[~held_out])
+    X_holdout, y_holdout, _, _ = prepare_match_data(new_matches[held_out])
+    if len(X_holdout) < MIN_HOLDOUT_ROWS or X_fit.empty:
+        print("   ⚠️  Not enough new maps for a holdout check. Skipping match model.")
+        return None
+
+    model = joblib.load(model_path)
+    if mode == "continue":
+        try:
+            candidate = continue_match_boosting(model, X_fit, y_fit)
+        except ValueError as e:
+            print(f"   ⚠️  {e}")
+            return None
+        print(f"   Fitted {INCREMENTAL_MATCH_ROUNDS} more rounds on {X_fit.shape[0]} new maps")
+    else:
+        # Keep held-out maps (and stale copies of the new maps) out of the window
+        new_keys = new_matches[["match_id", "map_id"]].astype(str).agg("|".join, axis=1)
+        history = pd.read_parquet(features_path)
+        history_keys = history[["match_id", "map_id"]].astype(str).agg("|".join, axis=1)
+        history = history[~history_keys.isin(set(new_keys))]
+
+        candidate = refit_match_window(history, X_fit, y_fit, backend=backend)
+        print(f"   Refitted on the latest {min(MATCH_UPDATE_WINDOW, len(history))} maps "
+              f"+ {X_fit.shape[0]} new maps")
+
+    promoted = _promote(
+        "match", candidate,
+        _score_match(model, X_holdout, y_holdout),
+        _score_match(candidate, X_holdout, y_holdout),
+        X_fit, y_fit, X_holdout, tolerance, started,
+        {"mode": mode}, backend=backend if mode == "window" else None,
+    )
+    return candidate if promoted else model
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RUN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def run_incremental_update(new_stats_path: str, match_mode: str = "continue",
+                           match_backend: str = DEFAULT_MATCH_BACKEND):
+    """Fold the cleaned player-map rows in `new_stats_path` into both models."""
+    print(f"📂 Loading new player stats from {new_stats_path}...")
+    new_stats = pd.read_parquet(new_stats_path)
+    print(f"   {new_stats.shape[0]} rows, {new_stats['match_id'].nunique()} matches")
+
+    player_model = update_player_model(new_stats)
+    match_model = update_match_model(new_stats, mode=match_mode, backend=match_backend)
+    print("\n✅ Incremental update complete.")
+    return player_model, match_model
+
+
+if __name__ == "__main__":
+    import sys
+    run_incremental_update(sys.argv[1])
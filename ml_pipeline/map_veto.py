@@ -0,0 +1,92 @@
+"""
+map_veto.py — Pick/ban orders and optimal vetoes for Bo1/Bo3/Bo5 series.
+
+Given team A's win probability on every map of the pool, a veto is a
+two-player zero-sum game: A bans and picks to maximize its series win
+probability, B to minimize it. Maps are treated as independent, so a
+series' value depends only on which maps are played —
+P(A wins at least best_of // 2 + 1 of them), a Poisson-binomial tail.
+The game is solved exactly by memoized minimax over (maps left, maps
+picked, step); a 7-map pool has at most a few thousand states.
+
+Orders follow VETO_FORMATS (written for a 7-map pool, the last remaining
+map is the decider). Larger pools get extra bans up front, alternating into
+the standard order; smaller pools drop their leading bans.
+"""
+
+from functools import lru_cache
+
+from ml_pipeline.config import VETO_FORMATS
+
+
+def veto_steps(best_of: int, pool_size: int, first: str = "A") -> list[tuple[str, str]]:
+    """
+    (team, "ban" | "pick") steps for a pool of `pool_size` maps. `first`
+    plays team A's part of the standard order (its first ban and first pick).
+    """
+    if best_of not in VETO_FORMATS:
+        raise ValueError(f"No veto format for best-of-{best_of}")
+    if pool_size < best_of:
+        raise ValueError(f"A best-of-{best_of} veto needs at least {best_of} maps, got {pool_size}")
+
+    steps = list(VETO_FORMATS[best_of])
+    extra = pool_size - 1 - len(steps)
+    if extra > 0:
+        steps = [("AB"[(extra - i) % 2], "ban") for i in range(extra)] + steps
+    for _ in range(-extra):
+        steps.remove(next(step for step in steps if step[1] == "ban"))
+
+    if first == "B":
+        steps = [("B" if team == "A" else "A", action) for team, action in steps]
+    return steps
+
+
+def series_win_probability(map_probs: list[float], best_of: int) -> float:
+    """P(team A wins at least best_of // 2 + 1 of the given independent maps)."""
+    dist = [1.0]  # dist[k] = P(A has won k maps so far)
+    for p in map_probs:
+        dist = [a * (1 - p) + b * p for a, b in zip(dist + [0.0], [0.0] + dist)]
+    return sum(dist[best_of // 2 + 1:])
+
+
+def solve_veto(map_probs: dict[str, float], best_of: int, first: str = "A") -> dict:
+    """
+    Optimal veto for both teams given team A's win probability per pool map.
+
+    Returns the veto ({"team", "action", "map"} per step), the maps played in
+    order as (map, picked_by) — picked_by is "A", "B" or "decider" — and
+    team A's series win probability under that veto.
+    """
+    steps = veto_steps(best_of, len(map_probs), first)
+
+    @lru_cache(maxsize=None)
+    def value(remaining: frozenset, picked: frozenset, step: int) -> float:
+        if step == len(steps):
+            return series_win_probability([map_probs[m] for m in picked | remaining], best_of)
+        team, action = steps[step]
+        outcomes = [
+            value(remaining - {m}, picked | {m} if action == "pick" else picked, step + 1)
+            for m in sorted(remaining)
+        ]
+        return max(outcomes) if team == "A" else min(outcomes)
+
+    # Replay the optimal line, ties going to the alphabetically first map
+    remaining, picked = frozenset(map_probs), frozenset()
+    veto, played = [], []
+    for step, (team, action) in enumerate(steps):
+        choose = max if team == "A" else min
+        options = sorted(remaining)
+        best = choose(options, key=lambda m: value(
+            remaining - {m}, picked | {m} if action == "pick" else picked, step + 1))
+        veto.append({"team": team, "action": action, "map": best})
+        remaining = remaining - {best}
+        if action == "pick":
+            picked = picked | {best}
+            played.append((best, team))
+    played += [(m, "decider") for m in sorted(remaining)]
+
+    return {
+        "veto":                   veto,
+        "maps":                   played,
+        "series_win_probability": value(frozenset(map_probs), frozenset(), 0),
+    }
@@ -0,0 +1,268 @@
+"""
+model_registry.py — Versioned model artifacts with atomic promotion.
+
+Every training run writes a new immutable version instead of overwriting
+the served model:
+
+  models/registry/<model>/
+      v0001/model.pkl              — full sklearn pipeline
+      v0001/model.compact.joblib   — memory-mappable inference artifact
+      v0001/manifest.json          — input schema (feature_schema.py), data
+                                     fingerprint, metrics, params, training
+                                     duration
+      CURRENT                      — name of the promoted version
+      history.jsonl                — one line per promotion (rollbacks
+                                     record the version rolled back from)
+
+A version directory is complete before it can be promoted, and promotion
+replaces CURRENT with os.replace, so a loader sees either the old or the
+new version and never a half-written file. Rolling back re-promotes the
+most recently served version that has not itself been rolled back from, so
+repeated rollbacks walk back through history (v3 → v2 → v1) instead of
+bouncing between the last two; `to` picks an explicit version.
+
+Loaders call resolve_model_path(model), which falls back to the legacy
+models/*.pkl files when nothing has been promoted yet.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+import joblib
+import pandas as pd
+import sklearn
+
+from ml_pipeline.config import (
+    MODEL_REGISTRY_DIR, MODEL_REGISTRY_KEEP, PLAYER_MODEL_PATH, MATCH_MODEL_PATH,
+)
+from ml_pipeline.compact_models import save_compact_artifact
+from ml_pipeline.feature_schema import FeatureSchema
+
+
+# Pre-registry locations, still served until a version is promoted
+LEGACY_MODEL_PATHS = {
+    "player": PLAYER_MODEL_PATH,
+    "match":  MATCH_MODEL_PATH,
+}
+
+MODEL_FILENAME = "model.pkl"
+
+
+def _model_dir(model: str, registry_dir: str) -> str:
+    return os.path.join(registry_dir, model)
+
+
+def _write_atomic(path: str, text: str):
+    """Write `text` to `path` via a temp file and os.replace."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def frame_fingerprint(*frames: pd.DataFrame) -> str:
+    """Content hash of one or more DataFrames (values and column names)."""
+    digest = hashlib.sha1()
+    for frame in frames:
+        frame = frame.to_frame() if isinstance(frame, pd.Series) else frame
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+        digest.update(json.dumps([str(c) for c in frame.columns]).encode())
+    return digest.hexdigest()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# READ
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def list_versions(model: str, registry_dir: str = MODEL_REGISTRY_DIR) -> list[str]:
+    """All complete versions of `model`, oldest first."""
+    root = _model_dir(model, registry_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        v for v in os.listdir(root)
+        if v.startswith("v") and os.path.exists(os.path.join(root, v, "manifest.json"))
+    )
+
+
+def current_version(model: str, registry_dir: str = MODEL_REGISTRY_DIR) -> str | None:
+    """The promoted version of `model`, or None."""
+    pointer = os.path.join(_model_dir(model, registry_dir), "CURRENT")
+    try:
+        with open(pointer) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_model_path(model: str, registry_dir: str = MODEL_REGISTRY_DIR) -> str:
+    """Pickle path of the promoted version, else the legacy models/*.pkl path."""
+    version = current_version(model, registry_dir)
+    if version:
+        return os.path.join(_model_dir(model, registry_dir), version, MODEL_FILENAME)
+    return LEGACY_MODEL_PATHS[model]
+
+
+def load_manifest(model: str, version: str | None = None,
+                  registry_dir: str = MODEL_REGISTRY_DIR) -> dict:
+    """Manifest of `version` (default: the promoted version)."""
+    version = version or current_version(model, registry_dir)
+    if version is None:
+        raise FileNotFoundError(f"No promoted version of '{model}' in {registry_dir}")
+    with open(os.path.join(_model_dir(model, registry_dir), version, "manifest.json")) as f:
+        return json.load(f)
+
+
+def load_feature_schema(model_path: str, model) -> FeatureSchema:
+    """
+    Input schema saved with the model at `model_path`.
+
+    Falls back to a schema derived from the fitted `model` for legacy
+    models/*.pkl files and versions registered before schemas were stored.
+    """
+    manifest_path = os.path.join(os.path.dirname(model_path), "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            schema = json.load(f).get("feature_schema") or {}
+        if "columns" in schema:
+            return FeatureSchema.from_dict(schema)
+    return FeatureSchema.from_model(model)
+
+
+def registry_summary(model: str, registry_dir: str = MODEL_REGISTRY_DIR) -> pd.DataFrame:
+    """One row per stored version of `model` with its headline manifest fields."""
+    current = current_version(model, registry_dir)
+    rows = []
+    for version in list_versions(model, registry_dir):
+        manifest = load_manifest(model, version, registry_dir)
+        rows.append({
+            "version":    version,
+            "current":    "*" if version == current else "",
+            "created_at": manifest.get("created_at"),
+            "parent":     manifest.get("parent") or "",
+            "backend":    manifest.get("backend") or "",
+            "update":     (manifest.get("update") or {}).get("mode", ""),
+            "train_s":    manifest.get("training_duration_s"),
+            "data":       (manifest.get("data_fingerprint") or "")[:12],
+        })
+    return pd.DataFrame(rows)
+
+
+def promotion_history(model: str, registry_dir: str = MODEL_REGISTRY_DIR) -> list[dict]:
+    """Promotions of `model`, oldest first."""
+    path = os.path.join(_model_dir(model, registry_dir), "history.jsonl")
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# WRITE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def register_model(model: str, pipeline, manifest: dict, X_check: pd.DataFrame | None = None,
+                   registry_dir: str = MODEL_REGISTRY_DIR) -> str:
+    """
+    Write `pipeline` as a new version of `model` (not yet promoted).
+
+    `manifest` should hold feature_schema, data_fingerprint, metrics,
+    params and training_duration_s; version, timestamps and library
+    versions are added here. Returns the new version name.
+    """
+    root = _model_dir(model, registry_dir)
+    os.makedirs(root, exist_ok=True)
+
+    # Claim the next version number; makedirs fails if another run took it
+    existing = list_versions(model, registry_dir) + [
+        v for v in os.listdir(root) if v.startswith("v")
+    ]
+    number = max((int(v[1:]) for v in existing if v[1:].isdigit()), default=0) + 1
+    while True:
+        version = f"v{number:04d}"
+        try:
+            os.makedirs(os.path.join(root, version))
+            break
+        except FileExistsError:
+            number += 1
+
+    version_dir = os.path.join(root, version)
+    model_path = os.path.join(version_dir, MODEL_FILENAME)
+    joblib.dump(pipeline, model_path)
+    save_compact_artifact(pipeline, model_path, X_check=X_check)
+
+    manifest = {
+        "model":      model,
+        "version":    version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "parent":     current_version(model, registry_dir),
+        "sklearn":    sklearn.__version__,
+        **manifest,
+    }
+    # The manifest is written last: its presence marks the version complete
+    _write_atomic(os.path.join(version_dir, "manifest.json"), json.dumps(manifest, indent=2, default=str))
+    print(f"   💾 Registered {model} model {version} in {root}")
+    return version
+
+
+def promote_model(model: str, version: str, registry_dir: str = MODEL_REGISTRY_DIR,
+                  rolled_back_from: str | None = None):
+    """Atomically make `version` the served version of `model`."""
+    if version not in list_versions(model, registry_dir):
+        raise ValueError(f"Unknown or incomplete version '{version}' of '{model}'")
+
+    root = _model_dir(model, registry_dir)
+    entry = {
+        "version":     version,
+        "promoted_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    if rolled_back_from:
+        entry["rolled_back_from"] = rolled_back_from
+    _write_atomic(os.path.join(root, "CURRENT"), version + "\n")
+    with open(os.path.join(root, "history.jsonl"), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    print(f"   🚀 Promoted {model} model {version}" + (f" (rolled back from {rolled_back_from})"
+                                                        if rolled_back_from else ""))
+    _prune_versions(model, registry_dir)
+
+
+def rollback_model(model: str, to: str | None = None, registry_dir: str = MODEL_REGISTRY_DIR) -> str:
+    """
+    Re-promote `to`, or by default the most recently served version that has
+    not been rolled back from since it was last promoted. Returns the version.
+    """
+    current = current_version(model, registry_dir)
+    available = set(list_versions(model, registry_dir))
+    if to is not None:
+        if to not in available:
+            raise ValueError(f"Unknown or incomplete version '{to}' of '{model}'")
+        if to == current:
+            raise ValueError(f"'{model}' is already serving {to}")
+        promote_model(model, to, registry_dir, rolled_back_from=current)
+        return to
+
+    # A version rolled back from stays skipped until it is promoted again
+    history = promotion_history(model, registry_dir)
+    rolled_back = set()
+    for entry in history:
+        rolled_back.discard(entry["version"])
+        if entry.get("rolled_back_from"):
+            rolled_back.add(entry["rolled_back_from"])
+    for entry in reversed(history):
+        version = entry["version"]
+        if version != current and version not in rolled_back and version in available:
+            promote_model(model, version, registry_dir, rolled_back_from=current)
+            return version
+    raise ValueError(f"No earlier promoted version of '{model}' to roll back to (use --to VERSION)")
+
+
+def _prune_versions(model: str, registry_dir: str, keep: int = MODEL_REGISTRY_KEEP):
+    """Delete all but the newest `keep` versions, never the promoted one."""
+    current = current_version(model, registry_dir)
+    stale = [v for v in list_versions(model, registry_dir) if v != current][:-keep or None]
+    for version in stale:
+        shutil.rmtree(os.path.join(_model_dir(model, registry_dir), version), ignore_errors=True)
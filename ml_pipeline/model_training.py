@@ -3,20 +3,29 @@ model_training.py — Step 3: Train ML models for prediction.
 
 Model 1: Player Performance Predictor (RandomForestRegressor)
   - Predicts rating_total and acs_total given map, agent, role, historical stats
+  - One native multi-output forest (targets standardized so both weigh equally)
 
-Model 2: Match Win Predictor (GradientBoostingClassifier)
+Model 2: Match Win Predictor (gradient boosting, pluggable backend)
   - Predicts probability of team_a winning given team features
+  - Backends: sklearn GradientBoosting (default), HistGradientBoosting, XGBoost hist
+
+Each trained model is registered as a new version (with a manifest) in the
+model registry and promoted — see model_registry.py.
 """
 
 import os
+import json
+import time
 import numpy as np
 import pandas as pd
-import joblib
 
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingClassifier
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, cross_val_score, GroupShuffleSplit
+from sklearn.ensemble import (
+    RandomForestRegressor, GradientBoostingClassifier, HistGradientBoostingClassifier,
+)
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.compose import ColumnTransformer
+from sklearn.compose import ColumnTransformer, TransformedTargetRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.multioutput import MultiOutputRegressor
 from sklearn.metrics import (
@@ -26,38 +35,46 @@ from sklearn.metrics import (
 
 from ml_pipeline.config import (
     PLAYER_FEATURES_PARQUET, MATCH_FEATURES_PARQUET,
-    PLAYER_MODEL_PATH, MATCH_MODEL_PATH, MODEL_DIR,
+    MATCH_MODEL_BACKENDS, DEFAULT_MATCH_BACKEND, TUNED_PARAMS_PATH,
+    PLAYER_CV_FOLDS, PLAYER_CV_THREADS_PER_FOLD, PLAYER_CV_PROXY_TREES,
 )
+from ml_pipeline.model_registry import register_model, promote_model, frame_fingerprint
+from ml_pipeline.feature_schema import FeatureSchema
+from ml_pipeline.design_matrix import cached_design_matrix
+from ml_pipeline.evaluation import grouped_cv_report, print_cv_report
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # MODEL 1: PLAYER PERFORMANCE
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def train_player_model(features_path: str = PLAYER_FEATURES_PARQUET):
+PLAYER_TARGETS = ["rating_total", "acs_total"]
+
+
+def load_tuned_params(model: str, backend: str | None = None) -> dict:
     """
-    Train a RandomForest model to predict player rating and ACS.
-    
-    Input features: map, agent, role, historical averages, match_count
-    Targets: rating_total, acs_total
+    Best hyperparameters found by --tune for "player" or "match", or {}.
+
+    Match parameters only apply to the backend they were tuned for.
     """
-    print("=" * 60)
-    print("🤖 Training Player Performance Model")
-    print("=" * 60)
+    if not os.path.exists(TUNED_PARAMS_PATH):
+        return {}
+    with open(TUNED_PARAMS_PATH) as f:
+        entry = json.load(f).get(model)
+    if not entry or (backend is not None and entry.get("backend") != backend):
+        return {}
+    return entry["params"]
 
-    df = pd.read_parquet(features_path)
-    print(f"   Loaded {df.shape[0]} player feature rows")
 
+def prepare_player_data(df: pd.DataFrame, min_matches: int = 3):
+    """
+    Select player model features from a player_features frame.
+
+    Returns (X, y, categorical_features, numeric_features).
+    """
     # Filter: need minimum sample size
-    min_matches = 3
     df = df[df["match_count"] >= min_matches].copy()
-    print(f"   After filtering (>={min_matches} matches): {df.shape[0]} rows")
-
-    if df.shape[0] < 100:
-        print("   ⚠️  Not enough data to train. Skipping player model.")
-        return None
 
-    # ─── Feature & Target Selection ──────────────────────────────────────
     categorical_features = ["map", "agent", "role"]
 
     numeric_features = [
@@ -76,15 +93,26 @@ def train_player_model(features_path: str = PLAYER_FEATURES_PARQUET):
     # Only keep columns that actually exist
     numeric_features = [c for c in numeric_features if c in df.columns]
 
-    targets = ["rating_total", "acs_total"]
-
     # Drop rows with NaN in targets
-    df = df.dropna(subset=targets)
+    df = df.dropna(subset=PLAYER_TARGETS)
 
     X = df[categorical_features + numeric_features]
-    y = df[targets]
+    y = df[PLAYER_TARGETS]
+    return X, y, categorical_features, numeric_features
 
-    # ─── Preprocessing Pipeline ──────────────────────────────────────────
+
+def build_player_pipeline(categorical_features: list[str], numeric_features: list[str],
+                          multioutput: str = "native", params: dict | None = None) -> Pipeline:
+    """
+    Preprocessing (one-hot + scaling) followed by the RandomForest regressor.
+
+    multioutput="native" fits a single forest whose leaves predict both
+    targets; the targets are standardized first so the split criterion does
+    not favour ACS (~200) over rating (~1). "wrapped" is the previous
+    MultiOutputRegressor with one independent forest per target.
+
+    `params` overrides the forest hyperparameters (e.g. from --tune).
+    """
     preprocessor = ColumnTransformer(
         transformers=[
             ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), categorical_features),
@@ -93,54 +121,144 @@ def train_player_model(features_path: str = PLAYER_FEATURES_PARQUET):
         remainder="drop",
     )
 
-    model = Pipeline([
+    forest = RandomForestRegressor(
+        n_estimators=200,
+        max_depth=15,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+        n_jobs=-1,
+    )
+    if params:
+        forest.set_params(**params)
+
+    if multioutput == "native":
+        regressor = TransformedTargetRegressor(regressor=forest, transformer=StandardScaler())
+    elif multioutput == "wrapped":
+        regressor = MultiOutputRegressor(forest)
+    else:
+        raise ValueError(f"Unknown multioutput mode '{multioutput}'. Choose 'native' or 'wrapped'")
+
+    return Pipeline([
         ("preprocessor", preprocessor),
-        ("regressor", MultiOutputRegressor(
-            RandomForestRegressor(
-                n_estimators=200,
-                max_depth=15,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1,
-            )
-        )),
+        ("regressor", regressor),
     ])
 
-    # ─── Train / Test Split ──────────────────────────────────────────────
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
+
+def player_groups(df: pd.DataFrame, X: pd.DataFrame) -> pd.Series:
+    """CV group (case-insensitive player name) of every row of X."""
+    return df.loc[X.index, "player_name"].str.lower()
+
+
+def evaluate_player_model(
+    df: pd.DataFrame,
+    params: dict | None = None,
+    proxy_trees: int | None = PLAYER_CV_PROXY_TREES,
+    n_splits: int = PLAYER_CV_FOLDS,
+    threads_per_fold: int = PLAYER_CV_THREADS_PER_FOLD,
+) -> pd.DataFrame:
+    """
+    GroupKFold-by-player CV of the player model on a player_features frame.
+
+    proxy_trees caps the forest size for a quick estimate (None = use the
+    configured forest). Returns the evaluation.grouped_cv_report() frame.
+    """
+    X, y, categorical_features, numeric_features = prepare_player_data(df)
+    pipeline = build_player_pipeline(categorical_features, numeric_features, params=params)
+
+    estimator = pipeline.named_steps["regressor"].set_params(regressor__n_jobs=threads_per_fold)
+    if proxy_trees:
+        estimator.set_params(regressor__n_estimators=proxy_trees)
+    n_trees = estimator.get_params()["regressor__n_estimators"]
+
+    print(f"\n   Running {n_splits}-fold GroupKFold CV by player ({n_trees} trees per fold)...")
+    report = grouped_cv_report(
+        estimator, pipeline.named_steps["preprocessor"], X, y, player_groups(df, X),
+        n_splits=n_splits, threads_per_fold=threads_per_fold, cache_name="player",
     )
+    print_cv_report(report)
+    return report
 
-    print(f"   Train: {X_train.shape[0]} | Test: {X_test.shape[0]}")
+
+def train_player_model(features_path: str = PLAYER_FEATURES_PARQUET):
+    """
+    Train a RandomForest model to predict player rating and ACS.
+    
+    Input features: map, agent, role, historical averages, match_count
+    Targets: rating_total, acs_total (one multi-output forest)
+    """
+    print("=" * 60)
+    print("🤖 Training Player Performance Model")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    df = pd.read_parquet(features_path)
+    print(f"   Loaded {df.shape[0]} player feature rows")
+
+    # ─── Feature & Target Selection ──────────────────────────────────────
+    min_matches = 3
+    X, y, categorical_features, numeric_features = prepare_player_data(df, min_matches)
+    targets = PLAYER_TARGETS
+    print(f"   After filtering (>={min_matches} matches): {X.shape[0]} rows")
+
+    if X.shape[0] < 100:
+        print("   ⚠️  Not enough data to train. Skipping player model.")
+        return None
+
+    # ─── Preprocessing Pipeline ──────────────────────────────────────────
+    params = load_tuned_params("player")
+    if params:
+        print(f"   🎛️  Using tuned hyperparameters: {params}")
+    model = build_player_pipeline(categorical_features, numeric_features, params=params)
+
+    # ─── Train / Test Split (by player, so no player is in both) ─────────
+    groups = player_groups(df, X)
+    train_idx, test_idx = next(
+        GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42).split(X, y, groups)
+    )
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+
+    print(f"   Train: {X_train.shape[0]} | Test: {X_test.shape[0]} (split by player)")
     print("   Training...")
 
     model.fit(X_train, y_train)
 
     # ─── Evaluation ──────────────────────────────────────────────────────
     y_pred = model.predict(X_test)
+    metrics = {}
 
     for i, target in enumerate(targets):
         mae = mean_absolute_error(y_test.iloc[:, i], y_pred[:, i])
         rmse = np.sqrt(mean_squared_error(y_test.iloc[:, i], y_pred[:, i]))
         r2 = r2_score(y_test.iloc[:, i], y_pred[:, i])
+        metrics[target] = {"mae": float(mae), "rmse": float(rmse), "r2": float(r2)}
         print(f"\n   📈 {target}:")
         print(f"      MAE:  {mae:.4f}")
         print(f"      RMSE: {rmse:.4f}")
         print(f"      R²:   {r2:.4f}")
 
     # ─── Cross Validation ────────────────────────────────────────────────
-    # print("\n   Running 5-fold cross-validation (on rating)...")
-    # cv_scores = cross_val_score(
-    #     model, X, y, cv=5, scoring="r2", n_jobs=-1
-    # )
-    # print(f"   CV R² scores: {[f'{s:.4f}' for s in cv_scores]}")
-    # print(f"   CV R² mean:   {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
-
-    # ─── Save ────────────────────────────────────────────────────────────
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    joblib.dump(model, PLAYER_MODEL_PATH)
-    print(f"\n   💾 Saved player model to {PLAYER_MODEL_PATH}")
+    report = evaluate_player_model(df, params=params)
+    metrics["grouped_cv"] = {
+        f"{row.target}/{row.metric}": {"mean": row.mean, "ci_low": row.ci_low, "ci_high": row.ci_high}
+        for row in report.itertuples()
+    }
+
+    # ─── Register & Promote ──────────────────────────────────────────────
+    version = register_model("player", model, {
+        "feature_schema": {
+            **FeatureSchema.from_frame(X_train, categorical_features).to_dict(),
+            "targets": targets,
+        },
+        "data_fingerprint": frame_fingerprint(X, y),
+        "data_path": features_path,
+        "n_rows": {"train": int(X_train.shape[0]), "test": int(X_test.shape[0])},
+        "params": model.named_steps["regressor"].regressor.get_params(),
+        "metrics": metrics,
+        "training_duration_s": round(time.perf_counter() - started, 2),
+    }, X_check=X_test)
+    promote_model("player", version)
 
     return model
 
@@ -149,25 +267,60 @@ def train_player_model(features_path: str = PLAYER_FEATURES_PARQUET):
 # MODEL 2: MATCH WIN PREDICTION
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def train_match_model(features_path: str = MATCH_FEATURES_PARQUET):
+def make_match_classifier(backend: str = DEFAULT_MATCH_BACKEND):
     """
-    Train a GradientBoosting classifier to predict match winner.
-    
-    Input: team_a features, team_b features, delta features
-    Target: team_a_wins (binary)
+    Create the match win classifier for a backend.
+
+    All backends use the same tree budget (300 rounds, depth 5, lr 0.1)
+    so they can be compared like for like.
     """
-    print("\n" + "=" * 60)
-    print("🤖 Training Match Win Prediction Model")
-    print("=" * 60)
+    if backend == "gb":
+        return GradientBoostingClassifier(
+            n_estimators=300,
+            max_depth=5,
+            learning_rate=0.1,
+            min_samples_split=10,
+            min_samples_leaf=5,
+            subsample=0.8,
+            random_state=42,
+        )
 
-    df = pd.read_parquet(features_path)
-    print(f"   Loaded {df.shape[0]} match feature rows")
+    if backend == "hist":
+        return HistGradientBoostingClassifier(
+            max_iter=300,
+            max_depth=5,
+            learning_rate=0.1,
+            min_samples_leaf=5,
+            early_stopping=False,
+            random_state=42,
+        )
+
+    if backend == "xgboost":
+        try:
+            from xgboost import XGBClassifier
+        except ImportError as e:
+            raise ImportError("The xgboost backend requires xgboost: pip install xgboost") from e
+        return XGBClassifier(
+            n_estimators=300,
+            max_depth=5,
+            learning_rate=0.1,
+            subsample=0.8,
+            min_child_weight=5,
+            tree_method="hist",
+            eval_metric="logloss",
+            n_jobs=-1,
+            random_state=42,
+        )
 
-    if df.shape[0] < 100:
-        print("   ⚠️  Not enough data to train. Skipping match model.")
-        return None
+    raise ValueError(f"Unknown match model backend '{backend}'. Choose from {MATCH_MODEL_BACKENDS}")
 
-    # ─── Feature Selection ───────────────────────────────────────────────
+
+def prepare_match_data(df: pd.DataFrame):
+    """
+    Select match model features from a match_features frame.
+
+    Returns (X, y, categorical_features, numeric_features).
+    """
     # Use all ta_*, tb_*, delta_* columns as features
     feature_cols = [
         c for c in df.columns
@@ -183,15 +336,23 @@ def train_match_model(features_path: str = MATCH_FEATURES_PARQUET):
 
     target = "team_a_wins"
 
-    df = df.dropna(subset=[target])
+    df = df.dropna(subset=[target]).copy()
 
     # Fill NaN in features with 0
     df[numeric_features] = df[numeric_features].fillna(0)
 
     X = df[categorical_features + numeric_features]
     y = df[target]
+    return X, y, categorical_features, numeric_features
 
-    # ─── Preprocessing Pipeline ──────────────────────────────────────────
+
+def build_match_pipeline(categorical_features: list[str], numeric_features: list[str],
+                         backend: str = DEFAULT_MATCH_BACKEND, params: dict | None = None) -> Pipeline:
+    """
+    Preprocessing (one-hot + scaling) followed by the backend classifier.
+
+    `params` overrides the classifier hyperparameters (e.g. from --tune).
+    """
     preprocessor = ColumnTransformer(
         transformers=[
             ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), categorical_features),
@@ -200,19 +361,46 @@ def train_match_model(features_path: str = MATCH_FEATURES_PARQUET):
         remainder="drop",
     )
 
-    model = Pipeline([
+    classifier = make_match_classifier(backend)
+    if params:
+        classifier.set_params(**params)
+
+    return Pipeline([
         ("preprocessor", preprocessor),
-        ("classifier", GradientBoostingClassifier(
-            n_estimators=300,
-            max_depth=5,
-            learning_rate=0.1,
-            min_samples_split=10,
-            min_samples_leaf=5,
-            subsample=0.8,
-            random_state=42,
-        )),
+        ("classifier", classifier),
     ])
 
+
+def train_match_model(features_path: str = MATCH_FEATURES_PARQUET,
+                      backend: str = DEFAULT_MATCH_BACKEND):
+    """
+    Train a gradient boosting classifier to predict match winner.
+    
+    Input: team_a features, team_b features, delta features
+    Target: team_a_wins (binary)
+    Backend: "gb" (GradientBoosting), "hist" (HistGradientBoosting), "xgboost"
+    """
+    print("\n" + "=" * 60)
+    print(f"🤖 Training Match Win Prediction Model ({backend})")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    df = pd.read_parquet(features_path)
+    print(f"   Loaded {df.shape[0]} match feature rows")
+
+    if df.shape[0] < 100:
+        print("   ⚠️  Not enough data to train. Skipping match model.")
+        return None
+
+    # ─── Feature Selection ───────────────────────────────────────────────
+    X, y, categorical_features, numeric_features = prepare_match_data(df)
+
+    # ─── Preprocessing Pipeline ──────────────────────────────────────────
+    params = load_tuned_params("match", backend)
+    if params:
+        print(f"   🎛️  Using tuned hyperparameters: {params}")
+    model = build_match_pipeline(categorical_features, numeric_features, backend, params)
+
     # ─── Train / Test Split ──────────────────────────────────────────────
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
@@ -238,9 +426,12 @@ def train_match_model(features_path: str = MATCH_FEATURES_PARQUET):
     print(classification_report(y_test, y_pred, target_names=["Team B wins", "Team A wins"]))
 
     # ─── Cross Validation ────────────────────────────────────────────────
+    # Folds share one encoded, memory-mapped design matrix instead of
+    # re-running the ColumnTransformer per fold
     print("   Running 5-fold cross-validation...")
+    X_encoded, _ = cached_design_matrix("match", X, model.named_steps["preprocessor"])
     cv_scores = cross_val_score(
-        model, X, y, cv=5, scoring="roc_auc", n_jobs=-1
+        clone(model.named_steps["classifier"]), X_encoded, y, cv=5, scoring="roc_auc", n_jobs=-1
     )
     print(f"   CV AUC scores: {[f'{s:.4f}' for s in cv_scores]}")
     print(f"   CV AUC mean:   {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
@@ -261,10 +452,27 @@ def train_match_model(features_path: str = MATCH_FEATURES_PARQUET):
     except Exception:
         pass
 
-    # ─── Save ────────────────────────────────────────────────────────────
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    joblib.dump(model, MATCH_MODEL_PATH)
-    print(f"\n   💾 Saved match model to {MATCH_MODEL_PATH}")
+    # ─── Register & Promote ──────────────────────────────────────────────
+    print()
+    version = register_model("match", model, {
+        "backend": backend,
+        "feature_schema": {
+            **FeatureSchema.from_frame(X_train, categorical_features).to_dict(),
+            "target": y.name,
+        },
+        "data_fingerprint": frame_fingerprint(X, y),
+        "data_path": features_path,
+        "n_rows": {"train": int(X_train.shape[0]), "test": int(X_test.shape[0])},
+        "params": model.named_steps["classifier"].get_params(),
+        "metrics": {
+            "accuracy": float(accuracy),
+            "auc": float(auc),
+            "cv_auc_mean": float(cv_scores.mean()),
+            "cv_auc_std": float(cv_scores.std()),
+        },
+        "training_duration_s": round(time.perf_counter() - started, 2),
+    }, X_check=X_test)
+    promote_model("match", version)
 
     return model
 
@@ -273,10 +481,10 @@ def train_match_model(features_path: str = MATCH_FEATURES_PARQUET):
 # RUN
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def run_training():
+def run_training(match_backend: str = DEFAULT_MATCH_BACKEND):
     """Train both models."""
     player_model = train_player_model()
-    match_model = train_match_model()
+    match_model = train_match_model(backend=match_backend)
     print("\n✅ All models trained and saved.")
     return player_model, match_model
 
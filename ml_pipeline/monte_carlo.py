@@ -0,0 +1,119 @@
+"""
+monte_carlo.py — Vectorized Monte Carlo simulation of maps and series.
+
+Point predictions hide how much a result depends on the players' form. Here
+each simulated map draws one historical stat line (a real row of
+player_stats.parquet) per player and team features are built from those
+lines, which is exactly how the match model's training rows were built.
+Team A's win probability then varies from draw to draw, and each simulated
+map is won with that probability.
+
+  - PerformanceSampler resamples a player's stat lines on their agent
+    (given at least MC_MIN_AGENT_MAPS of them), else all their lines, else
+    the agent's or the role's lines across all players.
+  - play_series() plays out many Bo1/Bo3/Bo5 series at once from a matrix
+    of per-map win probabilities and tallies series wins and score lines.
+
+All randomness comes from one np.random.Generator, so a seed reproduces a run.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ml_pipeline.config import AGENT_ROLE_MAP, MC_MIN_AGENT_MAPS
+from ml_pipeline.fallback_tables import player_key
+
+
+class PerformanceSampler:
+    """Historical per-map stat lines per player×agent, player, agent and role."""
+
+    def __init__(self, player_stats: pd.DataFrame, stats: list[str], defaults: list[float],
+                 min_agent_maps: int = MC_MIN_AGENT_MAPS):
+        self.stats = list(stats)
+        self.defaults = np.asarray(defaults, dtype=np.float64)
+        self.min_agent_maps = min_agent_maps
+
+        values = player_stats.reindex(columns=self.stats).to_numpy(dtype=np.float64, copy=True)
+        values[~np.isfinite(values)] = np.nan
+        self._values = values
+
+        keys = player_stats["player_name"].astype(str).str.casefold()
+        agents = player_stats["agent"].astype(str)
+        roles = agents.map(lambda a: AGENT_ROLE_MAP.get(a, "Unknown"))
+        self._rows = {
+            "player_agent": self._group(keys, agents),
+            "player":       self._group(keys),
+            "agent":        self._group(agents),
+            "role":         self._group(roles),
+        }
+
+    @staticmethod
+    def _group(*columns: pd.Series) -> dict[tuple, np.ndarray]:
+        """Key tuple → positions of its rows."""
+        groups = pd.DataFrame({i: c.to_numpy() for i, c in enumerate(columns)}).groupby(
+            list(range(len(columns))), sort=False).indices
+        return {(k if isinstance(k, tuple) else (k,)): v for k, v in groups.items()}
+
+    def rows_for(self, player_name: str, agent: str) -> tuple[str | None, np.ndarray | None]:
+        """The (level, row positions) a player on an agent is sampled from."""
+        key = player_key(player_name)
+        chain = [
+            ("player_agent", (key, agent)),
+            ("player",       (key,)),
+            ("agent",        (agent,)),
+            ("role",         (AGENT_ROLE_MAP.get(agent, "Unknown"),)),
+        ]
+        for level, k in chain:
+            rows = self._rows[level].get(k)
+            if rows is None or (level == "player_agent" and len(rows) < self.min_agent_maps):
+                continue
+            return level, rows
+        return None, None
+
+    def sample(self, players: list[dict], n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        `n` draws of a stat line for each {"name", "agent"} player, shape
+        (n, len(players), len(stats)). Players without any history get the
+        defaults in every draw.
+        """
+        out = np.empty((n, len(players), len(self.stats)))
+        for j, p in enumerate(players):
+            _, rows = self.rows_for(p["name"], p["agent"])
+            if rows is None:
+                out[:, j] = self.defaults
+            else:
+                out[:, j] = self._values[rows[rng.integers(0, len(rows), n)]]
+        return out
+
+
+def play_series(map_probs: np.ndarray, rng: np.random.Generator) -> dict:
+    """
+    Play out simulated series. `map_probs` is (n_sims, best_of): team A's win
+    probability on each map of each simulated series, in play order.
+
+    A series stops as soon as one team has won best_of // 2 + 1 maps, so
+    later maps only count when they are reached. Returns team A's series win
+    rate with a 95% Monte Carlo confidence interval, the score-line
+    distribution (team A's maps first) and the expected number of maps.
+    """
+    n_sims, best_of = map_probs.shape
+    need = best_of // 2 + 1
+
+    wins_a = rng.random(map_probs.shape) < map_probs
+    score_a = np.cumsum(wins_a, axis=1)
+    score_b = np.cumsum(~wins_a, axis=1)
+    last = ((score_a == need) | (score_b == need)).argmax(axis=1)
+
+    rows = np.arange(n_sims)
+    final_a, final_b = score_a[rows, last], score_b[rows, last]
+    p = float((final_a == need).mean())
+    half_width = 1.96 * np.sqrt(p * (1 - p) / n_sims)
+
+    lines, counts = np.unique(np.column_stack([final_a, final_b]), axis=0, return_counts=True)
+    order = np.lexsort((lines[:, 1], -lines[:, 0]))
+    return {
+        "win_probability": p,
+        "ci95":            (max(p - half_width, 0.0), min(p + half_width, 1.0)),
+        "score_lines":     {f"{a}-{b}": float(c / n_sims) for (a, b), c in zip(lines[order], counts[order])},
+        "expected_maps":   float((last + 1).mean()),
+    }
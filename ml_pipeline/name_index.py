@@ -0,0 +1,187 @@
+"""
+name_index.py — Typo-tolerant player name resolution.
+
+Player lookups key on the casefolded name (player_key), so "tenz" finds TenZ
+but "TenZ." or "aspa" find nothing. PlayerNameIndex is built once from the
+player names in player_features and resolves a query in three steps:
+
+  1. exact casefolded name;
+  2. normalized name — accents, punctuation and spaces stripped, so
+     "TenZ." and "ten z" both become "tenz";
+  3. fuzzy — names sharing character trigrams with the normalized query
+     come from an inverted index, and the NAME_MATCH_SHORTLIST with the most
+     overlap are verified with a bounded edit distance (an adjacent
+     transposition counts as one edit).
+
+A fuzzy match may be NAME_MATCH_MAX_EDIT_RATIO edits per character of the
+query away (at least one). candidates() ranks ties by trigram overlap, then
+by matches played, but resolve() only substitutes a fuzzy match that is
+strictly closer than every other candidate: "jet" between "Jett" and "Jeto"
+is ambiguous and resolves to nothing, so callers keep the typed name (and
+its fallback priors) and can offer suggest() instead.
+"""
+
+import unicodedata
+from collections import defaultdict
+
+import pandas as pd
+
+from ml_pipeline.config import NAME_MATCH_MAX_EDIT_RATIO, NAME_MATCH_SHORTLIST, NAME_MATCH_SUGGESTIONS
+from ml_pipeline.fallback_tables import player_key
+
+
+def normalize_name(name: str) -> str:
+    """Casefolded name with accents and every non-alphanumeric character removed."""
+    decomposed = unicodedata.normalize("NFKD", str(name).casefold())
+    return "".join(c for c in decomposed if c.isalnum())
+
+
+def _trigrams(norm: str) -> set[str]:
+    """Character trigrams of a normalized name, padded so short names have some."""
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance between `a` and `b` (insertions,
+    deletions, substitutions and adjacent transpositions), or limit + 1 as
+    soon as it is certain to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d = min(d, before[j - 2] + 1)
+            cur[j] = d
+        if min(cur) > limit:
+            return limit + 1
+        before, prev = prev, cur
+    return min(prev[-1], limit + 1)
+
+
+class PlayerNameIndex:
+    """Exact, normalized and trigram indexes over the known player names."""
+
+    def __init__(self, names, weights=None):
+        weights = [1.0] * len(names) if weights is None else list(weights)
+        self._names: list[str] = []
+        self._norms: list[str] = []
+        self._weights: list[float] = []
+        self._by_key: dict[str, int] = {}
+        self._spellings: set[str] = set()
+        self._by_norm: dict[str, list[int]] = defaultdict(list)
+        self._postings: dict[str, list[int]] = defaultdict(list)
+
+        for name, weight in zip(names, weights):
+            name = str(name)
+            key = player_key(name)
+            self._spellings.add(name)
+            if key in self._by_key:  # spelling variant of a known player
+                self._weights[self._by_key[key]] += float(weight)
+                continue
+            i = len(self._names)
+            norm = normalize_name(name)
+            self._names.append(name)
+            self._norms.append(norm)
+            self._weights.append(float(weight))
+            self._by_key[key] = i
+            self._by_norm[norm].append(i)
+            for gram in _trigrams(norm):
+                self._postings[gram].append(i)
+
+    @classmethod
+    def from_player_features(cls, player_feats: pd.DataFrame) -> "PlayerNameIndex":
+        """Index every player in a player_features frame, weighted by matches played."""
+        names = player_feats["player_name"].astype(str)
+        if "match_count" in player_feats.columns:
+            weights = player_feats["match_count"].groupby(names, sort=False).sum()
+        else:
+            weights = names.groupby(names, sort=False).size()
+        return cls(weights.index.tolist(), weights.to_numpy())
+
+    def __contains__(self, name: str) -> bool:
+        return player_key(name) in self._by_key
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def candidates(self, query: str, limit: int = NAME_MATCH_SUGGESTIONS) -> list[tuple[str, int]]:
+        """
+        Up to `limit` known players matching `query`, best first, as
+        (name, edits). Exact and normalized matches have 0 edits.
+        """
+        norm = normalize_name(query)
+        if not norm:
+            return []
+        exact = self._by_key.get(player_key(query))
+        found = {exact: 0} if exact is not None else {}
+        for i in self._by_norm.get(norm, ()):
+            found.setdefault(i, 0)
+
+        # Shortlist by shared trigrams. One edit changes at most three of the
+        # query's trigrams, which bounds the overlap of any acceptable name.
+        max_edits = max(1, int(len(norm) * NAME_MATCH_MAX_EDIT_RATIO))
+        grams = _trigrams(norm)
+        overlap: dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                overlap[i] += 1
+        min_shared = max(1, len(grams) - 3 * max_edits)
+        shortlist = sorted(
+            (i for i, shared in overlap.items()
+             if shared >= min_shared and abs(len(self._norms[i]) - len(norm)) <= max_edits and i not in found),
+            key=lambda i: (-overlap[i], -self._weights[i]),
+        )[:NAME_MATCH_SHORTLIST]
+        for i in shortlist:
+            edits = edit_distance(norm, self._norms[i], max_edits)
+            if edits <= max_edits:
+                found[i] = edits
+
+        ranked = sorted(found, key=lambda i: (i != exact, found[i], -overlap.get(i, 0),
+                                               -self._weights[i], self._names[i]))
+        return [(self._names[i], found[i]) for i in ranked[:limit]]
+
+    def suggest(self, query: str, limit: int = NAME_MATCH_SUGGESTIONS) -> list[str]:
+        """Names of the known players closest to `query`, best first."""
+        return [name for name, _ in self.candidates(query, limit)]
+
+    def resolve_word(self, word: str) -> str | None:
+        """
+        The known player an ordinary (not proper-noun) word of free text
+        names, or None. Only words spelled exactly like a stored name, or
+        shaped like a handle — a digit, or a capital after the first letter
+        ("Demon1", "cNed") — are looked up, and only exact and normalized
+        matches count, so "best" in "who is the best..." never finds a
+        player called Best.
+        """
+        if (word in self._spellings or any(c.isdigit() for c in word)
+                or any(c.isupper() for c in word[1:])):
+            return self.resolve(word, fuzzy=False)
+        return None
+
+    def resolve(self, query: str, fuzzy: bool = True) -> str | None:
+        """
+        The known player `query` refers to, or None: the exact or normalized
+        match, else (with fuzzy=True) the fuzzy match with strictly fewer
+        edits than the runner-up.
+        """
+        norm = normalize_name(query)
+        if not norm:
+            return None
+        exact = self._by_key.get(player_key(query))
+        if exact is not None:
+            return self._names[exact]
+        same = self._by_norm.get(norm)
+        if same:
+            return self._names[max(same, key=self._weights.__getitem__)]
+        if not fuzzy:
+            return None
+        best = self.candidates(query, limit=2)
+        if best and (len(best) == 1 or best[0][1] < best[1][1]):
+            return best[0][0]
+        return None
@@ -3,215 +3,404 @@ prediction.py — Step 4: Prediction, simulation, and recommendation engine.
 
 Provides:
   1. predict_player()      — Predicted rating/ACS for a player on a map with an agent
+     predict_players_batch() — The same for many (player, map, agent) triples in one model call
   2. predict_match()       — Win probability for team A vs team B
+     predict_match_all_maps() — The same on every map of a pool in one model call
   3. simulate_team()       — Predicted team performance + win prob
+     simulate_series()     — Monte Carlo Bo1/Bo3/Bo5 win probability and score lines
   4. suggest_best_agent()  — Rank agents by predicted rating for a player on a map
   5. suggest_best_comp()   — Optimal agent assignment for 5 players on a map
+  6. suggest_best_roster() — Best 5 players + agents from a pool vs an opponent
+  7. predict_series()      — Optimal map veto and series win prob for Bo1/Bo3/Bo5
+  8. simulate_tournament() — Monte Carlo advancement probabilities for a whole event
 """
 
-import os
-import itertools
 import numpy as np
 import pandas as pd
-import joblib
 
 from ml_pipeline.config import (
-    PLAYER_MODEL_PATH, MATCH_MODEL_PATH,
     PLAYER_FEATURES_PARQUET, PLAYER_STATS_PARQUET,
-    MATCH_FEATURES_PARQUET,
-    AGENT_ROLE_MAP, ROLES,
+    AGENT_ROLE_MAP, ROLES, COMPOSITION_AGENT_POOL, ROSTER_AGENT_POOL,
+    MC_SIMULATIONS, MC_SEED, MC_INTERVAL_PERCENTILES, SERIES_FORMATS,
+    ACTIVE_MAP_POOL, ACTIVE_MAP_POOL_SIZE, TOURNAMENT_SIMULATIONS,
+    PREDICTION_INTERVAL_PERCENTILES, ATTRIBUTION_TOP_FEATURES,
 )
+from ml_pipeline.fallback_tables import PlayerFallbackIndex, player_key
+from ml_pipeline.feature_store import PlayerFeatureStore
+from ml_pipeline.name_index import PlayerNameIndex
+from ml_pipeline.compact_models import load_model_artifact
+from ml_pipeline.model_registry import resolve_model_path, load_feature_schema
+from ml_pipeline.composition_solver import solve_compositions
+from ml_pipeline.roster_search import beam_search_rosters
+from ml_pipeline.monte_carlo import PerformanceSampler, play_series
+from ml_pipeline.map_veto import solve_veto
+from ml_pipeline.tournament import PairwiseWinMatrix, simulate_stages
 
 
 from functools import lru_cache
 
 @lru_cache(maxsize=2)
-def _load_model(path):
-    """Load a saved sklearn pipeline from disk."""
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Model not found: {path}. Run model_training first.")
-    return joblib.load(path)
+def _load_model_at(path):
+    """Load a saved model from disk (memory-mapped compact artifact if present)."""
+    return load_model_artifact(path)
+
+@lru_cache(maxsize=2)
+def _load_schema_at(path):
+    """Input schema saved with the model at `path`."""
+    return load_feature_schema(path, _load_model_at(path))
+
+def _load_model(name):
+    """Promoted (model, input schema) of "player" or "match" (reloads after a promotion)."""
+    path = resolve_model_path(name)
+    return _load_model_at(path), _load_schema_at(path)
 
 @lru_cache(maxsize=1)
 def _load_player_features():
     """Load the player feature DataFrame."""
     return pd.read_parquet(PLAYER_FEATURES_PARQUET)
 
+@lru_cache(maxsize=1)
+def _load_feature_store():
+    """Load the per-player row index over the player features."""
+    return PlayerFeatureStore(_load_player_features())
+
+@lru_cache(maxsize=1)
+def _load_fallback_index():
+    """Load the keyed fallback hierarchy over the player features."""
+    return PlayerFallbackIndex.load(_load_player_features())
+
+@lru_cache(maxsize=1)
+def _load_name_index():
+    """Load the typo-tolerant player name index over the player features."""
+    return PlayerNameIndex.from_player_features(_load_player_features())
+
 @lru_cache(maxsize=1)
 def _load_player_stats():
-    """Load the raw player stats DataFrame."""
-    return pd.read_parquet(PLAYER_STATS_PARQUET)
+    """Load the raw player stats the performance sampler draws from."""
+    return pd.read_parquet(PLAYER_STATS_PARQUET, columns=["player_name", "agent", *_MATCH_PLAYER_STATS])
+
+@lru_cache(maxsize=1)
+def _most_played_maps() -> tuple[str, ...]:
+    """Maps by number of player rows, most played first (ties alphabetical)."""
+    counts = _load_player_features()["map"].value_counts().sort_index()
+    return tuple(counts.sort_values(ascending=False, kind="stable").index)
+
+def active_map_pool() -> list[str]:
+    """The veto map pool: ACTIVE_MAP_POOL if set, else the most played maps."""
+    return list(ACTIVE_MAP_POOL) or list(_most_played_maps()[:ACTIVE_MAP_POOL_SIZE])
+
+@lru_cache(maxsize=1)
+def _load_performance_sampler():
+    """Load the per-player stat-line sampler over the raw player stats."""
+    return PerformanceSampler(_load_player_stats(), list(_MATCH_PLAYER_STATS),
+                              list(_MATCH_PLAYER_STATS.values()))
+
+
+# Readable names of model inputs, for the reasoning attached to predictions
+_FEATURE_LABELS = {
+    "rating_total": "rating", "acs_total": "ACS", "adr_total": "ADR", "kast_total": "KAST",
+    "kd_ratio": "K/D ratio", "fk_fd_ratio": "first kill/death ratio", "hs_pct_total": "headshot %",
+    "rating_attack": "attack-side rating", "rating_defense": "defense-side rating",
+    "kills": "kills", "deaths": "deaths", "fk": "first kills", "fd": "first deaths",
+    "acs_attack": "attack-side ACS", "acs_defense": "defense-side ACS",
+    "match_count": "matches played", "win_rate": "win rate", "map": "map",
+    "num_duelists": "duelists", "num_controllers": "controllers",
+    "num_initiators": "initiators", "num_sentinels": "sentinels",
+}
+
+
+def _feature_label(feature: str) -> str:
+    """"ta_kd_ratio_avg" → "Team A avg K/D ratio", "delta_fk_sum" → "first kills (sum) A − B"."""
+    prefix, _, rest = feature.partition("_")
+    side = {"ta": "Team A ", "tb": "Team B ", "delta": ""}.get(prefix)
+    if side is None:
+        side, rest = "", feature
+    stat, _, agg = rest.rpartition("_")
+    if agg == "sum" and stat in _FEATURE_LABELS:
+        label = f"{_FEATURE_LABELS[stat]} (sum)"
+    elif agg == "avg" and stat in _FEATURE_LABELS:
+        label = f"avg {_FEATURE_LABELS[stat]}"
+    else:
+        label = _FEATURE_LABELS.get(rest, rest.replace("_", " "))
+    return f"{label} A − B" if prefix == "delta" else f"{side}{label}"
+
+
+def model_reasoning(model, X, top_k: int = ATTRIBUTION_TOP_FEATURES) -> list[list[list[dict]]] | None:
+    """
+    The features that drove each prediction: per row and model output, the
+    `top_k` inputs by absolute path attribution (see compact_models), with
+    their value and contribution in the model's raw units (log-odds for the
+    match model, rating/ACS for the player model). None when the model
+    cannot attribute (a pickled pipeline, or an artifact compiled before
+    node expectations were stored).
+    """
+    if not getattr(model, "supports_attribution", False):
+        return None
+
+    def plain(value):
+        value = value.item() if isinstance(value, np.generic) else value
+        return round(value, 3) if isinstance(value, float) else value
+
+    return [
+        [
+            [{"feature": f, "label": _feature_label(f), "value": plain(v), "contribution": round(c, 4)}
+             for f, v, c in top]
+            for top in outputs
+        ]
+        for outputs in model.explain(X, top_k)
+    ]
+
+
+def match_reasoning(model, X) -> list[dict] | None:
+    """
+    model_reasoning() of a single match row, each feature tagged with the
+    team it "favours": "Team A" for a positive contribution (log-odds
+    towards A), "Team B" for a negative one, "neither" for zero.
+    """
+    reasoning = model_reasoning(model, X)
+    if reasoning is None:
+        return None
+    reasoning = reasoning[0][0]
+    for r in reasoning:
+        r["favours"] = "Team A" if r["contribution"] > 0 else "Team B" if r["contribution"] < 0 else "neither"
+    return reasoning
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 1. PLAYER PREDICTION
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _as_player_queries(queries) -> list[tuple[str, str, str]]:
+    """Normalize (player, map, agent) queries: a frame, tuples, or dicts with name/map/agent."""
+    if isinstance(queries, pd.DataFrame):
+        name_col = "player_name" if "player_name" in queries.columns else "name"
+        return list(zip(queries[name_col], queries["map"], queries["agent"]))
+    return [
+        (q.get("player_name", q.get("name")), q["map"], q["agent"]) if isinstance(q, dict) else tuple(q)
+        for q in queries
+    ]
+
+
+def predict_players_batch(queries) -> list[dict]:
+    """
+    Predict rating/ACS for many (player, map, agent) triples with one model call.
+
+    `queries` is a DataFrame with player_name (or name), map and agent
+    columns, or a list of (player, map, agent) tuples or dicts. Player names
+    are resolved with typo tolerance: the result's "player" is the known
+    name, with "resolved_from" the typed one when they differ. Returns one
+    predict_player()-style dict per query, in order; queries without any
+    history get an {"error": ..., "suggestions": [...]} dict. With a compact
+    forest model each result also carries a prediction_interval: the
+    PREDICTION_INTERVAL_PERCENTILES of the individual trees' predictions.
+    """
+    queries = _as_player_queries(queries)
+    if not queries:
+        return []
+
+    model, schema = _load_model("player")
+    fallback = _load_fallback_index()
+
+    name_index = _load_name_index()
+    names = [name_index.resolve(name) or name for name, _, _ in queries]
+    keys = [player_key(name) for name in names]
+
+    # Historical data for this player+map+agent, else player+map (any agent),
+    # else player (any map/agent) — coarser levels are precomputed averages
+    levels, refs = fallback.resolve_many([
+        ("exact",      [(k, m, a) for k, (_, m, a) in zip(keys, queries)]),
+        ("player_map", [(k, m) for k, (_, m, _) in zip(keys, queries)]),
+        ("player",     [(k,) for k in keys]),
+    ])
+    found = [i for i, level in enumerate(levels) if level is not None]
+
+    predictions, intervals, reasons = {}, {}, {}
+    if found:
+        # One input frame in the model's saved schema: numeric features from
+        # the reference rows, anything they lack from the training defaults
+        columns = dict(zip(fallback.columns, refs[found].T))
+        columns["map"] = [queries[i][1] for i in found]
+        columns["agent"] = [queries[i][2] for i in found]
+        columns["role"] = [AGENT_ROLE_MAP.get(queries[i][2], "Unknown") for i in found]
+        X = schema.batch_input(model, columns, len(found))
+        if hasattr(model, "predict_interval"):
+            # Same tree pass as predict(), plus the spread of the trees' predictions
+            prediction, bounds = model.predict_interval(X, PREDICTION_INTERVAL_PERCENTILES)
+            intervals = dict(zip(found, bounds.transpose(1, 0, 2)))
+        else:
+            prediction = model.predict(X)
+        predictions = dict(zip(found, np.asarray(prediction).reshape(len(found), -1)))
+        reasons = dict(zip(found, model_reasoning(model, X) or []))
+
+    results = []
+    for i, (player_name, map_name, agent) in enumerate(queries):
+        if i not in predictions:
+            error = {"error": f"No historical data found for player '{player_name}'"}
+            suggestions = name_index.suggest(player_name)
+            if suggestions:
+                error["suggestions"] = suggestions
+            results.append(error)
+            continue
+        ref = dict(zip(fallback.columns, refs[i].tolist()))
+        pred_rating, pred_acs = float(predictions[i][0]), float(predictions[i][1])
+
+        # Get attack/defense breakdown from historical data
+        result = {
+            "player":          names[i],
+            "map":             map_name,
+            "agent":           agent,
+            "role":            AGENT_ROLE_MAP.get(agent, "Unknown"),
+            "predicted_rating": round(pred_rating, 2),
+            "predicted_acs":    round(pred_acs, 1),
+            "historical": {
+                "matches_played":   int(ref.get("match_count", 0)),
+                "avg_rating":       round(float(ref.get("rating_total", 0)), 2),
+                "avg_acs":          round(float(ref.get("acs_total", 0)), 1),
+                "win_rate":         round(float(ref.get("win_rate", 0)) * 100, 1),
+                "avg_kd_ratio":     round(float(ref.get("kd_ratio", 0)), 2),
+                "rating_attack":    round(float(ref.get("rating_attack", 0)), 2),
+                "rating_defense":   round(float(ref.get("rating_defense", 0)), 2),
+                "acs_attack":       round(float(ref.get("acs_attack", 0)), 1),
+                "acs_defense":      round(float(ref.get("acs_defense", 0)), 1),
+            },
+            "attack_vs_defense": {
+                "stronger_side": "attack" if ref.get("rating_attack", 0) > ref.get("rating_defense", 0) else "defense",
+                "rating_differential": round(
+                    float(ref.get("rating_attack", 0)) - float(ref.get("rating_defense", 0)), 2
+                ),
+            },
+        }
+        if player_key(names[i]) != player_key(player_name):
+            result["resolved_from"] = player_name
+        if i in intervals:
+            lo, hi = intervals[i][0], intervals[i][-1]
+            result["prediction_interval"] = {
+                "percentiles": list(PREDICTION_INTERVAL_PERCENTILES),
+                "rating":      [round(float(lo[0]), 2), round(float(hi[0]), 2)],
+                "acs":         [round(float(lo[1]), 1), round(float(hi[1]), 1)],
+            }
+        if i in reasons:
+            result["model_reasoning"] = {"rating": reasons[i][0], "acs": reasons[i][1]}
+        results.append(result)
+
+    return results
+
+
 def predict_player(player_name: str, map_name: str, agent: str) -> dict:
     """
     Predict a player's performance (rating, ACS) on a given map with a given agent.
     
-    Returns dict with predicted rating, ACS, attack/defense breakdown,
-    and historical context.
-    """
-    model = _load_model(PLAYER_MODEL_PATH)
-    player_feats = _load_player_features()
-
-    role = AGENT_ROLE_MAP.get(agent, "Unknown")
-
-    # Find historical data for this player+map+agent
-    mask = (
-        (player_feats["player_name"].str.lower() == player_name.lower()) &
-        (player_feats["map"] == map_name) &
-        (player_feats["agent"] == agent)
-    )
-    hist = player_feats[mask]
-
-    # If no exact match, try player+map (any agent)
-    if hist.empty:
-        mask_any = (
-            (player_feats["player_name"].str.lower() == player_name.lower()) &
-            (player_feats["map"] == map_name)
-        )
-        hist = player_feats[mask_any]
-
-    # If still nothing, try player (any map/agent) — use averages
-    if hist.empty:
-        mask_all = player_feats["player_name"].str.lower() == player_name.lower()
-        hist = player_feats[mask_all]
-
-    if hist.empty:
-        return {"error": f"No historical data found for player '{player_name}'"}
-
-    # Use the first/best match row to build input features
-    ref = hist.iloc[0].copy()
-
-    # Build input DataFrame matching model's expected columns
-    input_row = {
-        "map": map_name,
-        "agent": agent,
-        "role": role,
-    }
+    Returns dict with predicted rating, ACS (and their per-tree prediction
+    interval), attack/defense breakdown, and historical context.
+    """
+    return predict_players_batch([(player_name, map_name, agent)])[0]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 2. MATCH WIN PREDICTION
+# ═══════════════════════════════════════════════════════════════════════════════
 
-    # Add numeric features from historical data
-    numeric_cols = [c for c in hist.columns if c not in 
-                    ["player_name", "map", "agent", "role", "rating_total", "acs_total"]]
-    for col in numeric_cols:
-        input_row[col] = ref[col] if col in ref.index else 0
+# Per-player stats behind the team features, with the defaults used for a
+# player without any history
+_MATCH_PLAYER_STATS = {
+    "rating_total": 1.0, "acs_total": 200, "adr_total": 130, "kast_total": 65,
+    "kd_ratio": 1.0, "fk_fd_ratio": 1.0, "hs_pct_total": 20,
+    "kills_total": 15, "deaths_total": 15,
+    "first_kills_total": 2, "first_deaths_total": 2,
+    "rating_attack": 1.0, "rating_defense": 1.0,
+}
+_TEAM_AVG_STATS = [
+    "rating_total", "acs_total", "adr_total", "kast_total",
+    "kd_ratio", "fk_fd_ratio", "hs_pct_total", "rating_attack", "rating_defense",
+]
+_TEAM_SUM_STATS = {
+    "kills": "kills_total", "deaths": "deaths_total",
+    "fk": "first_kills_total", "fd": "first_deaths_total",
+}
+_MATCH_DELTA_FEATURES = [
+    "rating_total_avg", "acs_total_avg", "adr_total_avg", "kd_ratio_avg", "kills_sum", "fk_sum",
+]
+
+
+def _player_match_stats(players: list[dict], fallback: PlayerFallbackIndex) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Stats of each {"name", "agent"} player dict, in _MATCH_PLAYER_STATS order,
+    and their role indices into ROLES (-1 for an unknown role).
 
-    input_df = pd.DataFrame([input_row])
+    Looks up historical stats from the precomputed fallback tables:
+    player×agent, then player, then agent/role priors. Names are resolved
+    like predict_players_batch's; an unresolved name falls to the priors.
+    """
+    agents = [p["agent"] for p in players]
+    roles = [AGENT_ROLE_MAP.get(agent, "Unknown") for agent in agents]
+    name_index = _load_name_index()
+    keys = [player_key(name_index.resolve(p["name"]) or p["name"]) for p in players]
 
-    # Predict
-    prediction = model.predict(input_df)
-    pred_rating = float(prediction[0][0])
-    pred_acs = float(prediction[0][1])
+    levels, refs = fallback.resolve_many([
+        ("player_agent", list(zip(keys, agents))),
+        ("player",       [(k,) for k in keys]),
+        ("agent_prior",  [(a,) for a in agents]),
+        ("role_prior",   [(r,) for r in roles]),
+    ])
 
-    # Get attack/defense breakdown from historical data
-    result = {
-        "player":          player_name,
-        "map":             map_name,
-        "agent":           agent,
-        "role":            role,
-        "predicted_rating": round(pred_rating, 2),
-        "predicted_acs":    round(pred_acs, 1),
-        "historical": {
-            "matches_played":   int(ref.get("match_count", 0)),
-            "avg_rating":       round(float(ref.get("rating_total", 0)), 2),
-            "avg_acs":          round(float(ref.get("acs_total", 0)), 1),
-            "win_rate":         round(float(ref.get("win_rate", 0)) * 100, 1),
-            "avg_kd_ratio":     round(float(ref.get("kd_ratio", 0)), 2),
-            "rating_attack":    round(float(ref.get("rating_attack", 0)), 2),
-            "rating_defense":   round(float(ref.get("rating_defense", 0)), 2),
-            "acs_attack":       round(float(ref.get("acs_attack", 0)), 1),
-            "acs_defense":      round(float(ref.get("acs_defense", 0)), 1),
-        },
-        "attack_vs_defense": {
-            "stronger_side": "attack" if ref.get("rating_attack", 0) > ref.get("rating_defense", 0) else "defense",
-            "rating_differential": round(
-                float(ref.get("rating_attack", 0)) - float(ref.get("rating_defense", 0)), 2
-            ),
-        },
-    }
+    # Default stats for unknown players (and stats the tables lack)
+    stats = np.tile(np.array(list(_MATCH_PLAYER_STATS.values()), dtype=np.float64), (len(players), 1))
+    found = [i for i, level in enumerate(levels) if level is not None]
+    for j, stat in enumerate(_MATCH_PLAYER_STATS):
+        if stat in fallback.columns:
+            stats[found, j] = refs[found, fallback.columns.index(stat)]
 
-    return result
+    return stats, _role_indices(players)
 
 
-# ═══════════════════════════════════════════════════════════════════════════════
-# 2. MATCH WIN PREDICTION
-# ═══════════════════════════════════════════════════════════════════════════════
+def _role_indices(players: list[dict]) -> np.ndarray:
+    """Index into ROLES of each player's agent role (-1 for an unknown role)."""
+    roles = [AGENT_ROLE_MAP.get(p["agent"], "Unknown") for p in players]
+    return np.array([ROLES.index(r) if r in ROLES else -1 for r in roles], dtype=np.int64)
+
 
-def _build_team_feature_vector(players: list[dict], prefix: str, player_feats: pd.DataFrame) -> dict:
+def _team_features(stats: np.ndarray, roles: np.ndarray, prefix: str) -> dict[str, np.ndarray]:
     """
-    Build team-level features from a list of player dicts.
-    
-    Each player dict: {"name": str, "agent": str}
-    Looks up historical stats from player_features.parquet.
-    """
-    stats = []
-
-    for p in players:
-        name = p["name"]
-        agent = p["agent"]
-        role = AGENT_ROLE_MAP.get(agent, "Unknown")
-
-        mask = (
-            (player_feats["player_name"].str.lower() == name.lower()) &
-            (player_feats["agent"] == agent)
-        )
-        hist = player_feats[mask]
-
-        if hist.empty:
-            mask_any = player_feats["player_name"].str.lower() == name.lower()
-            hist = player_feats[mask_any]
-
-        if not hist.empty:
-            row = hist.iloc[0]
-            stats.append({
-                "rating_total": row.get("rating_total", 1.0),
-                "acs_total":    row.get("acs_total", 200),
-                "adr_total":    row.get("adr_total", 130),
-                "kast_total":   row.get("kast_total", 65),
-                "kd_ratio":     row.get("kd_ratio", 1.0),
-                "fk_fd_ratio":  row.get("fk_fd_ratio", 1.0),
-                "hs_pct_total": row.get("hs_pct_total", 20),
-                "kills_total":  row.get("kills_total", 15),
-                "deaths_total": row.get("deaths_total", 15),
-                "first_kills_total": row.get("first_kills_total", 2),
-                "first_deaths_total": row.get("first_deaths_total", 2),
-                "role":         role,
-                "rating_attack": row.get("rating_attack", 1.0),
-                "rating_defense": row.get("rating_defense", 1.0),
-            })
-        else:
-            # Default stats for unknown player
-            stats.append({
-                "rating_total": 1.0, "acs_total": 200, "adr_total": 130,
-                "kast_total": 65, "kd_ratio": 1.0, "fk_fd_ratio": 1.0,
-                "hs_pct_total": 20, "kills_total": 15, "deaths_total": 15,
-                "first_kills_total": 2, "first_deaths_total": 2,
-                "role": role,
-                "rating_attack": 1.0, "rating_defense": 1.0,
-            })
+    Team-level features of many lineups at once.
 
-    stats_df = pd.DataFrame(stats)
+    `stats` is (n_lineups, team_size, len(_MATCH_PLAYER_STATS)) and `roles`
+    the matching (n_lineups, team_size) role indices. Averages and sums skip
+    missing stats, like pandas.
+    """
+    names = list(_MATCH_PLAYER_STATS)
+    present = ~np.isnan(stats)
+    sums = np.where(present, stats, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / present.sum(axis=1)
 
     features = {}
-    for col in ["rating_total", "acs_total", "adr_total", "kast_total",
-                 "kd_ratio", "fk_fd_ratio", "hs_pct_total"]:
-        features[f"{prefix}_{col}_avg"] = stats_df[col].mean()
+    for stat in _TEAM_AVG_STATS:
+        features[f"{prefix}_{stat}_avg"] = means[:, names.index(stat)]
+    for short, stat in _TEAM_SUM_STATS.items():
+        features[f"{prefix}_{short}_sum"] = sums[:, names.index(stat)]
+    for k, role in enumerate(ROLES):
+        features[f"{prefix}_num_{role.lower()}s"] = (roles == k).sum(axis=1)
+    return features
 
-    features[f"{prefix}_kills_sum"] = stats_df["kills_total"].sum()
-    features[f"{prefix}_deaths_sum"] = stats_df["deaths_total"].sum()
-    features[f"{prefix}_fk_sum"] = stats_df["first_kills_total"].sum()
-    features[f"{prefix}_fd_sum"] = stats_df["first_deaths_total"].sum()
 
-    role_counts = stats_df["role"].value_counts()
-    for role in ROLES:
-        features[f"{prefix}_num_{role.lower()}s"] = role_counts.get(role, 0)
+def _build_team_feature_vector(players: list[dict], prefix: str, fallback: PlayerFallbackIndex) -> dict:
+    """
+    Build team-level features from a list of player dicts.
+    
+    Each player dict: {"name": str, "agent": str}
+    """
+    stats, roles = _player_match_stats(players, fallback)
+    features = _team_features(stats[None], roles[None], prefix)
+    return {name: values[0].item() for name, values in features.items()}
 
-    features[f"{prefix}_rating_attack_avg"] = stats_df["rating_attack"].mean()
-    features[f"{prefix}_rating_defense_avg"] = stats_df["rating_defense"].mean()
 
-    return features
+def _match_features(ta_feats: dict, tb_feats: dict, map_name) -> dict:
+    """Match model input: the map, both teams' features and team A − team B deltas."""
+    row = {"map": map_name}
+    row.update(ta_feats)
+    row.update(tb_feats)
+    for feat in _MATCH_DELTA_FEATURES:
+        row[f"delta_{feat}"] = ta_feats[f"ta_{feat}"] - tb_feats[f"tb_{feat}"]
+    return row
 
 
 def predict_match(
@@ -226,49 +415,56 @@ def predict_match(
         map_name: Map name (e.g. "Bind")
     
     Returns:
-        Dict with win probabilities, strengths, weaknesses.
+        Dict with win probabilities, strengths, weaknesses and, for compact
+        models, the model_reasoning behind the prediction (top features by
+        path attribution, in log-odds towards team A).
     """
-    model = _load_model(MATCH_MODEL_PATH)
-    player_feats = _load_player_features()
+    model, schema = _load_model("match")
+    fallback = _load_fallback_index()
 
-    ta_feats = _build_team_feature_vector(team_a, "ta", player_feats)
-    tb_feats = _build_team_feature_vector(team_b, "tb", player_feats)
+    ta_feats = _build_team_feature_vector(team_a, "ta", fallback)
+    tb_feats = _build_team_feature_vector(team_b, "tb", fallback)
 
-    row = {"map": map_name}
-    row.update(ta_feats)
-    row.update(tb_feats)
+    row = _match_features(ta_feats, tb_feats, map_name)
 
-    # Delta features
-    delta_cols = [
-        ("rating_total_avg", "rating_total_avg"),
-        ("acs_total_avg",    "acs_total_avg"),
-        ("adr_total_avg",    "adr_total_avg"),
-        ("kd_ratio_avg",     "kd_ratio_avg"),
-        ("kills_sum",        "kills_sum"),
-        ("fk_sum",           "fk_sum"),
-    ]
-    for ta_suffix, tb_suffix in delta_cols:
-        row[f"delta_{ta_suffix}"] = ta_feats.get(f"ta_{ta_suffix}", 0) - tb_feats.get(f"tb_{tb_suffix}", 0)
-
-    input_df = pd.DataFrame([row])
-
-    # Ensure columns match what the model was trained on
-    match_df = pd.read_parquet(MATCH_FEATURES_PARQUET)
-    model_cols = [c for c in match_df.columns if c.startswith(("ta_", "tb_", "delta_")) or c == "map"]
+    # Columns, order and fill values come from the schema saved at training
+    X = schema.model_input(model, [schema.row(row)])
+    proba = model.predict_proba(X)[0]
+    team_a_win_prob = float(proba[1])
+    team_b_win_prob = float(proba[0])
 
-    # Add missing columns with 0
-    for col in model_cols:
-        if col not in input_df.columns:
-            input_df[col] = 0
+    # Strengths are the inputs that pushed the model towards each team
+    reasoning = match_reasoning(model, X)
+    if reasoning is not None:
+        strengths_a = [f"{r['label']} ({r['value']})" for r in reasoning if r["favours"] == "Team A"]
+        strengths_b = [f"{r['label']} ({r['value']})" for r in reasoning if r["favours"] == "Team B"]
+    else:
+        strengths_a, strengths_b = _compare_team_averages(ta_feats, tb_feats)
 
-    # Reorder to match training
-    input_df = input_df[model_cols]
+    result = {
+        "map": map_name,
+        "team_a": {
+            "players": team_a,
+            "win_probability": round(team_a_win_prob * 100, 1),
+            "avg_rating":      round(ta_feats.get("ta_rating_total_avg", 0), 2),
+            "strengths":       strengths_a,
+        },
+        "team_b": {
+            "players": team_b,
+            "win_probability": round(team_b_win_prob * 100, 1),
+            "avg_rating":      round(tb_feats.get("tb_rating_total_avg", 0), 2),
+            "strengths":       strengths_b,
+        },
+        "prediction": "Team A" if team_a_win_prob > 0.5 else "Team B",
+        "confidence":  round(max(team_a_win_prob, team_b_win_prob) * 100, 1),
+    }
+    if reasoning is not None:
+        result["model_reasoning"] = reasoning
+    return result
 
-    proba = model.predict_proba(input_df)[0]
-    team_a_win_prob = float(proba[1])
-    team_b_win_prob = float(proba[0])
 
-    # Analyze strengths
+def _compare_team_averages(ta_feats: dict, tb_feats: dict) -> tuple[list[str], list[str]]:
+    """Strengths by comparing team averages, for models without attributions."""
     strengths_a = []
     strengths_b = []
     if ta_feats.get("ta_rating_total_avg", 0) > tb_feats.get("tb_rating_total_avg", 0):
@@ -296,23 +492,59 @@ def predict_match(
     else:
         strengths_b.append("Stronger defense side")
 
-    return {
-        "map": map_name,
-        "team_a": {
-            "players": team_a,
-            "win_probability": round(team_a_win_prob * 100, 1),
-            "avg_rating":      round(ta_feats.get("ta_rating_total_avg", 0), 2),
-            "strengths":       strengths_a,
-        },
-        "team_b": {
-            "players": team_b,
-            "win_probability": round(team_b_win_prob * 100, 1),
-            "avg_rating":      round(tb_feats.get("tb_rating_total_avg", 0), 2),
-            "strengths":       strengths_b,
-        },
-        "prediction": "Team A" if team_a_win_prob > 0.5 else "Team B",
-        "confidence":  round(max(team_a_win_prob, team_b_win_prob) * 100, 1),
-    }
+    return strengths_a, strengths_b
+
+
+def predict_match_all_maps(
+    team_a: list[dict], team_b: list[dict], maps: list[str] | None = None
+) -> dict[str, float]:
+    """
+    Team A's win probability against team B on each of `maps` (default: the
+    active map pool), from one batched model call. Team features do not
+    depend on the map, so they are built once and only the map column varies.
+    """
+    maps = list(maps) if maps else active_map_pool()
+    model, schema = _load_model("match")
+    fallback = _load_fallback_index()
+
+    n = len(maps)
+    ta_feats = _build_team_feature_vector(team_a, "ta", fallback)
+    tb_feats = _build_team_feature_vector(team_b, "tb", fallback)
+    columns = _match_features({k: np.full(n, v) for k, v in ta_feats.items()},
+                              {k: np.full(n, v) for k, v in tb_feats.items()}, maps)
+
+    proba = model.predict_proba(schema.batch_input(model, columns, n))[:, 1]
+    return dict(zip(maps, proba.tolist()))
+
+
+def pairwise_map_probabilities(lineups: list[list[dict]], maps: list[str]) -> np.ndarray:
+    """
+    P(lineup i beats lineup j on map m) for every ordered pair, shape
+    (n_lineups, n_lineups, n_maps), from one batched model call. Team
+    features are built once per lineup; each pair is scored in both team
+    slots and averaged, so p[i, j] = 1 − p[j, i].
+    """
+    model, schema = _load_model("match")
+    fallback = _load_fallback_index()
+
+    per_team = [_player_match_stats(lineup, fallback) for lineup in lineups]
+
+    def stacked(prefix):
+        feats = [_team_features(stats[None], roles[None], prefix) for stats, roles in per_team]
+        return {name: np.concatenate([f[name] for f in feats]) for name in feats[0]}
+
+    ta_all, tb_all = stacked("ta"), stacked("tb")
+    n, n_maps = len(lineups), len(maps)
+    i, j, m = np.meshgrid(np.arange(n), np.arange(n), np.arange(n_maps), indexing="ij")
+    pair = i != j
+    i, j, m = i[pair], j[pair], m[pair]
+    columns = _match_features({k: v[i] for k, v in ta_all.items()},
+                              {k: v[j] for k, v in tb_all.items()},
+                              np.asarray(maps, dtype=object)[m])
+
+    probs = np.full((n, n, n_maps), 0.5)
+    probs[i, j, m] = model.predict_proba(schema.batch_input(model, columns, len(i)))[:, 1]
+    return (probs + 1 - probs.transpose(1, 0, 2)) / 2
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -327,11 +559,8 @@ def simulate_team(
     
     Each dict: {"name": str, "agent": str}
     """
-    # Individual predictions
-    player_predictions = []
-    for p in players:
-        pred = predict_player(p["name"], map_name, p["agent"])
-        player_predictions.append(pred)
+    # Individual predictions (one model call for the whole team)
+    player_predictions = predict_players_batch([(p["name"], map_name, p["agent"]) for p in players])
 
     # Team match prediction
     match_pred = predict_match(players, opponent, map_name)
@@ -351,6 +580,85 @@ def simulate_team(
     }
 
 
+def _simulated_map_probs(
+    team_a: list[dict], team_b: list[dict], maps: list[str], n_sims: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Team A's win probability on each map for `n_sims` draws of both teams'
+    stat lines, shape (n_sims, len(maps)), from one model call.
+    """
+    model, schema = _load_model("match")
+    sampler = _load_performance_sampler()
+    n = n_sims * len(maps)
+
+    # Rows are map-major: row m * n_sims + s is simulation s on maps[m]
+    ta_feats = _team_features(sampler.sample(team_a, n, rng),
+                              np.broadcast_to(_role_indices(team_a), (n, len(team_a))), "ta")
+    tb_feats = _team_features(sampler.sample(team_b, n, rng),
+                              np.broadcast_to(_role_indices(team_b), (n, len(team_b))), "tb")
+    columns = _match_features(ta_feats, tb_feats, np.repeat(maps, n_sims).astype(object))
+
+    proba = model.predict_proba(schema.batch_input(model, columns, n))[:, 1]
+    return proba.reshape(len(maps), n_sims).T
+
+
+def simulate_series(
+    team_a: list[dict], team_b: list[dict], maps: list[str], best_of: int | None = None,
+    n_sims: int = MC_SIMULATIONS, seed: int | None = MC_SEED,
+) -> dict:
+    """
+    Monte Carlo simulation of a Bo1/Bo3/Bo5 series between two lineups.
+
+    `maps` are the series maps in play order (at least `best_of` of them;
+    best_of defaults to len(maps)). Each simulation samples every player's
+    stat line per map from their history (see monte_carlo), scores it with
+    the match model and plays the map out. The same seed reproduces the
+    same result.
+
+    Returns per-map win probabilities with the MC_INTERVAL_PERCENTILES
+    interval of the simulated probabilities, plus the series win
+    probability with a 95% confidence interval and the score-line
+    distribution.
+    """
+    maps = [maps] if isinstance(maps, str) else list(maps)
+    best_of = best_of or len(maps)
+    if best_of not in SERIES_FORMATS:
+        raise ValueError(f"best_of must be one of {SERIES_FORMATS}, got {best_of}")
+    if len(maps) < best_of:
+        raise ValueError(f"A best-of-{best_of} series needs {best_of} maps, got {len(maps)}")
+    maps = maps[:best_of]
+
+    rng = np.random.default_rng(seed)
+    map_probs = _simulated_map_probs(team_a, team_b, maps, n_sims, rng)
+    series = play_series(map_probs, rng)
+
+    lo, hi = np.percentile(map_probs, MC_INTERVAL_PERCENTILES, axis=0)
+    team_a_win_prob = series["win_probability"]
+
+    return {
+        "maps":     maps,
+        "best_of":  best_of,
+        "n_sims":   n_sims,
+        "seed":     seed,
+        "map_predictions": [
+            {
+                "map":                     map_name,
+                "team_a_win_probability":  round(float(map_probs[:, m].mean()) * 100, 1),
+                "interval":                [round(float(lo[m]) * 100, 1), round(float(hi[m]) * 100, 1)],
+            }
+            for m, map_name in enumerate(maps)
+        ],
+        "series": {
+            "team_a_win_probability": round(team_a_win_prob * 100, 1),
+            "team_b_win_probability": round((1 - team_a_win_prob) * 100, 1),
+            "ci95":          [round(p * 100, 1) for p in series["ci95"]],
+            "score_lines":   {line: round(p * 100, 1) for line, p in series["score_lines"].items()},
+            "expected_maps": round(series["expected_maps"], 2),
+        },
+        "prediction": "Team A" if team_a_win_prob > 0.5 else "Team B",
+    }
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # 4. AGENT SUGGESTION
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -359,115 +667,300 @@ def suggest_best_agent(player_name: str, map_name: str, top_n: int = 5) -> dict:
     """
     Suggest the best agent for a player on a given map.
     
-    Ranks all agents the player has history with by predicted rating.
+    Ranks all agents the player has history with by predicted rating. The
+    name is resolved like predict_players_batch's; an unknown name gets an
+    {"error": ..., "suggestions": [...]} dict of close player names.
     """
-    player_feats = _load_player_features()
-
-    # Find all agents this player has used
-    mask = player_feats["player_name"].str.lower() == player_name.lower()
-    player_data = player_feats[mask]
-
-    if player_data.empty:
-        return {"error": f"No data found for player '{player_name}'"}
+    store = _load_feature_store()
+    name_index = _load_name_index()
+
+    typed_name = player_name
+    player_name = name_index.resolve(typed_name)
+    if player_name is None or player_name not in store:
+        error = {"error": f"No data found for player '{typed_name}'"}
+        suggestions = name_index.suggest(typed_name)
+        if suggestions:
+            error["suggestions"] = suggestions
+        return error
 
     # Get agents played on this map, or all maps
-    map_mask = player_data["map"] == map_name
-    if map_mask.any():
-        agents = player_data[map_mask]["agent"].unique()
-    else:
-        agents = player_data["agent"].unique()
+    agents = store.agents(player_name, map_name)
+    if not len(agents):
+        agents = store.agents(player_name)
+
+    # All candidate agents in one model call
+    predictions = predict_players_batch([(player_name, map_name, agent) for agent in agents])
 
     suggestions = []
-    for agent in agents:
-        try:
-            pred = predict_player(player_name, map_name, agent)
-            if "error" not in pred:
-                suggestions.append({
-                    "agent":            agent,
-                    "role":             AGENT_ROLE_MAP.get(agent, "Unknown"),
-                    "predicted_rating": pred["predicted_rating"],
-                    "predicted_acs":    pred["predicted_acs"],
-                    "matches_played":   pred["historical"]["matches_played"],
-                    "historical_rating": pred["historical"]["avg_rating"],
-                })
-        except Exception:
-            continue
+    for agent, pred in zip(agents, predictions):
+        if "error" not in pred:
+            suggestions.append({
+                "agent":            agent,
+                "role":             AGENT_ROLE_MAP.get(agent, "Unknown"),
+                "predicted_rating": pred["predicted_rating"],
+                "predicted_acs":    pred["predicted_acs"],
+                "matches_played":   pred["historical"]["matches_played"],
+                "historical_rating": pred["historical"]["avg_rating"],
+            })
 
     # Sort by predicted rating
     suggestions.sort(key=lambda x: x["predicted_rating"], reverse=True)
 
-    return {
+    result = {
         "player":      player_name,
         "map":         map_name,
         "suggestions": suggestions[:top_n],
     }
+    if player_key(player_name) != player_key(typed_name):
+        result["resolved_from"] = typed_name
+    return result
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 5. COMPOSITION SUGGESTION
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _agent_options(store: PlayerFeatureStore, player_name: str, map_name: str, pool: int) -> dict[str, float]:
+    """
+    A player's `pool` best agents → historical rating, best first: on this
+    map if they have rated rows there, else on any map, else {"Jett": 1.0}.
+    """
+    agents = store.column(player_name, "agent")
+    ratings = store.column(player_name, "rating_total").astype(float)
+    rated = ~np.isnan(ratings)
+    on_map = rated & (store.column(player_name, "map") == map_name)
+    keep = on_map if on_map.any() else rated
+
+    options = {}
+    for i in np.flatnonzero(keep)[np.argsort(-ratings[keep], kind="stable")]:
+        if len(options) == pool:
+            break
+        options.setdefault(agents[i], float(ratings[i]))
+
+    return options or {"Jett": 1.0}
+
+
 def suggest_best_composition(
-    player_names: list[str], map_name: str, top_n: int = 5
+    player_names: list[str], map_name: str, top_n: int = 5,
+    agent_pool: int = COMPOSITION_AGENT_POOL,
+    role_limits: dict[str, tuple[int, int]] | None = None,
 ) -> dict:
     """
     Suggest optimal agent assignments for a team of 5 players on a map.
     
-    Tries combinations of each player's top agents and ranks by
-    total predicted team rating.
+    Each player's `agent_pool` best agents (by historical rating on this
+    map, else on any map) are assigned exactly — see composition_solver —
+    and the top_n distinct compositions are ranked by total rating plus a
+    bonus per role covered. `role_limits` optionally bounds players per
+    role, e.g. {"Duelist": (1, 2)}.
     """
-    player_feats = _load_player_features()
-
-    # For each player, get their top agents on this map
-    player_agent_options = []
-    for name in player_names:
-        mask = (
-            (player_feats["player_name"].str.lower() == name.lower()) &
-            (player_feats["map"] == map_name)
-        )
-        options = player_feats[mask].nlargest(5, "rating_total")[["agent", "rating_total"]].to_dict("records")
-
-        if not options:
-            # Fall back to any map
-            mask_any = player_feats["player_name"].str.lower() == name.lower()
-            options = player_feats[mask_any].nlargest(5, "rating_total")[["agent", "rating_total"]].to_dict("records")
+    store = _load_feature_store()
 
-        if not options:
-            options = [{"agent": "Jett", "rating_total": 1.0}]
+    # For each player, their best rating per agent on this map
+    player_agent_options = [_agent_options(store, name, map_name, agent_pool) for name in player_names]
 
-        player_agent_options.append(options)
-
-    # Generate combinations (limit to avoid explosion)
     compositions = []
-    for combo in itertools.product(*player_agent_options):
-        agents = [c["agent"] for c in combo]
-
-        # Check we don't have duplicate agents (each agent can only be picked once)
-        if len(set(agents)) < len(agents):
-            continue
-
-        # Role distribution
+    for score, agents in solve_compositions(player_agent_options, top_k=top_n,
+                                            role_limits=role_limits):
         roles = [AGENT_ROLE_MAP.get(a, "Unknown") for a in agents]
-        role_dist = {r: roles.count(r) for r in ROLES}
-
-        # Total predicted rating
-        total_rating = sum(c["rating_total"] for c in combo)
-
-        # Bonus for balanced composition (at least 1 of each role)
-        balance_bonus = sum(1 for v in role_dist.values() if v >= 1) * 0.1
+        total_rating = sum(opts[a] for opts, a in zip(player_agent_options, agents))
 
         compositions.append({
             "players":    list(zip(player_names, agents)),
             "roles":      roles,
-            "role_dist":  role_dist,
+            "role_dist":  {r: roles.count(r) for r in ROLES},
             "total_rating": round(total_rating, 2),
-            "score":       round(total_rating + balance_bonus, 2),
+            "score":       round(score, 2),
         })
 
-    compositions.sort(key=lambda x: x["score"], reverse=True)
-
     return {
         "map":            map_name,
         "player_names":   player_names,
-        "compositions":   compositions[:top_n],
+        "compositions":   compositions,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 6. ROSTER SEARCH
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def suggest_best_roster(
+    pool: list[str], map_name: str, opponent: list[dict], top_n: int = 5,
+    agent_pool: int = ROSTER_AGENT_POOL,
+) -> dict:
+    """
+    Pick 5 players out of `pool` (e.g. a roster with subs) and an agent for
+    each to maximize the match model's win probability against `opponent`
+    (5 {"name", "agent"} dicts) on a map.
+
+    Each player's `agent_pool` best agents are candidates; lineups are found
+    by beam search (see roster_search) and scored in batches of thousands.
+    Stats of every candidate (player, agent) pick are resolved once, so a
+    lineup's team features are a NumPy aggregation over cached rows.
+    """
+    model, schema = _load_model("match")
+    fallback = _load_fallback_index()
+    store = _load_feature_store()
+
+    options = [_agent_options(store, name, map_name, agent_pool) for name in pool]
+
+    # One stats row per candidate pick, plus a placeholder row (pool average,
+    # no role) for the open slots of partial lineups
+    picks = [(i, agent) for i, opts in enumerate(options) for agent in opts]
+    row_of = {pick: r for r, pick in enumerate(picks)}
+    stats, roles = _player_match_stats([{"name": pool[i], "agent": a} for i, a in picks], fallback)
+    stats = np.vstack([stats, np.nanmean(stats, axis=0)])
+    roles = np.append(roles, -1)
+    placeholder = len(picks)
+
+    tb_feats = _build_team_feature_vector(opponent, "tb", fallback)
+
+    def score_batch(lineups) -> np.ndarray:
+        n = len(lineups)
+        idx = np.full((n, 5), placeholder)
+        for r, lineup in enumerate(lineups):
+            idx[r, :len(lineup)] = [row_of[pick] for pick in lineup]
+
+        ta_feats = _team_features(stats[idx], roles[idx], "ta")
+        columns = _match_features(ta_feats, {k: np.full(n, v) for k, v in tb_feats.items()},
+                                  [map_name] * n)
+        return model.predict_proba(schema.batch_input(model, columns, n))[:, 1]
+
+    results, evaluated = beam_search_rosters(options, score_batch, team_size=5, top_k=top_n)
+
+    rosters = []
+    for win_prob, lineup in results:
+        starters = {i for i, _ in lineup}
+        roster_roles = [AGENT_ROLE_MAP.get(agent, "Unknown") for _, agent in lineup]
+        rosters.append({
+            "players":         [{"name": pool[i], "agent": agent} for i, agent in lineup],
+            "bench":           [name for i, name in enumerate(pool) if i not in starters],
+            "roles":           roster_roles,
+            "role_dist":       {r: roster_roles.count(r) for r in ROLES},
+            "win_probability": round(win_prob * 100, 1),
+        })
+
+    return {
+        "map":               map_name,
+        "pool":              pool,
+        "opponent":          opponent,
+        "rosters":           rosters,
+        "lineups_evaluated": evaluated,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 7. SERIES PREDICTION (MAP VETO)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def predict_series(
+    team_a: list[dict], team_b: list[dict], best_of: int = 3,
+    map_pool: list[str] | None = None, first: str = "A",
+) -> dict:
+    """
+    Predict a Bo1/Bo3/Bo5 series between two lineups.
+
+    Team A's win probability is evaluated on every pool map at once, then the
+    standard pick/ban order is played out with both teams vetoing optimally
+    (see map_veto); `first` ("A" or "B") has the first ban and pick. Returns the
+    per-map probabilities, the veto, the maps played and team A's series win
+    probability.
+    """
+    if best_of not in SERIES_FORMATS:
+        raise ValueError(f"best_of must be one of {SERIES_FORMATS}, got {best_of}")
+    if first not in ("A", "B"):
+        raise ValueError(f'first must be "A" or "B", got {first!r}')
+
+    map_probs = predict_match_all_maps(team_a, team_b, map_pool)
+    veto = solve_veto(map_probs, best_of, first=first)
+    team_a_win_prob = veto["series_win_probability"]
+
+    return {
+        "best_of": best_of,
+        "map_pool": [
+            {"map": m, "team_a_win_probability": round(p * 100, 1)}
+            for m, p in sorted(map_probs.items(), key=lambda kv: kv[1], reverse=True)
+        ],
+        "veto": veto["veto"],
+        "maps": [
+            {"map": m, "picked_by": picked_by, "team_a_win_probability": round(map_probs[m] * 100, 1)}
+            for m, picked_by in veto["maps"]
+        ],
+        "series": {
+            "team_a_win_probability": round(team_a_win_prob * 100, 1),
+            "team_b_win_probability": round((1 - team_a_win_prob) * 100, 1),
+        },
+        "prediction": "Team A" if team_a_win_prob > 0.5 else "Team B",
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 8. TOURNAMENT SIMULATION
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def simulate_tournament(
+    teams: dict[str, list[dict]], stages: list[dict],
+    n_sims: int = TOURNAMENT_SIMULATIONS, seed: int | None = MC_SEED,
+    map_pool: list[str] | None = None,
+) -> dict:
+    """
+    Monte Carlo an event of one or more stages (see tournament for the stage
+    definitions) between named lineups.
+
+    Every team pair's map win probabilities are predicted in one batched
+    pass, series probabilities follow from optimal vetoes over the map pool,
+    and the bracket is then replayed `n_sims` times. Returns, per stage, each
+    entrant's probability of entering and advancing with the format's
+    details, plus — when the last stage is an elimination bracket — every
+    team's probability of winning the event ("champion").
+    """
+    if len(teams) < 2:
+        raise ValueError("A tournament needs at least two teams")
+    if not stages:
+        raise ValueError("A tournament needs at least one stage")
+    if n_sims < 1:
+        raise ValueError(f"n_sims must be positive, got {n_sims}")
+
+    names = list(teams)
+    maps = list(map_pool) if map_pool else active_map_pool()
+    matrix = PairwiseWinMatrix(pairwise_map_probabilities([teams[t] for t in names], maps), maps)
+    results = simulate_stages(stages, names, matrix, n_sims, np.random.default_rng(seed))
+
+    def pct(x) -> float:
+        return round(float(x) * 100, 1)
+
+    out_stages = []
+    for stage in results:
+        rows = []
+        for t in np.flatnonzero(stage["entered"]):
+            row = {
+                "team":     names[t],
+                "entered":  pct(stage["entered"][t]),
+                "advanced": pct(stage["advanced"][t]),
+            }
+            for detail in ("reached", "records", "placements"):
+                if detail in stage:
+                    row[detail] = {k: pct(v[t]) for k, v in stage[detail].items()}
+            rows.append(row)
+        rows.sort(key=lambda r: (r["advanced"], r["entered"]), reverse=True)
+        out_stages.append({
+            "name":    stage["name"],
+            "format":  stage["format"],
+            "best_of": stage["best_of"],
+            "teams":   rows,
+        })
+
+    out = {
+        "n_sims":   n_sims,
+        "seed":     seed,
+        "map_pool": maps,
+        "stages":   out_stages,
     }
+    # An event only has a champion when it ends in a bracket
+    if "won" in results[-1]:
+        winner = results[-1]["won"]
+        out["champion"] = [
+            {"team": names[t], "probability": pct(winner[t])}
+            for t in np.argsort(-winner, kind="stable") if winner[t] > 0
+        ]
+    return out
@@ -0,0 +1,301 @@
+"""
+rolling_features.py — Recency-weighted player form features.
+
+build_player_features() weighs a player's whole history equally. This module
+orders every map chronologically (scraped date when available, otherwise
+match ID / map ID as a proxy) and computes, per player and per player×agent:
+
+  - last-N averages      ({stat}_last{N})
+  - exponentially-decayed averages with a half-life in maps ({stat}_ewm)
+  - number of prior maps ({prefix}matches)
+
+Everything is produced in one sorted pass. The per-row output is *as-of*:
+each row only sees maps played strictly before it, so it is leakage-free for
+training. The engine state (EWM numerators/denominators and last-N ring
+buffers) is persisted, so new matches can be folded in incrementally without
+reprocessing history.
+
+Outputs:
+  player_rolling_features/   — as-of features per (match, map, player) row
+  player_form.parquet        — current form per player
+  player_agent_form.parquet  — current form per (player, agent)
+"""
+
+import os
+import glob
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import joblib
+
+from ml_pipeline.config import (
+    PLAYER_STATS_PARQUET, PLAYER_ROLLING_FEATURES_DIR,
+    PLAYER_FORM_PARQUET, PLAYER_AGENT_FORM_PARQUET, ROLLING_STATE_PATH,
+    ROLLING_STATS, ROLLING_WINDOW, ROLLING_HALFLIFE,
+)
+from ml_pipeline.fallback_tables import player_key
+
+
+ROW_KEYS = ["match_id", "map_id", "player_name", "agent"]
+
+# scope name → (group key columns, output column prefix)
+SCOPES = {
+    "player":       (["player_key"],          "form_"),
+    "player_agent": (["player_key", "agent"], "agent_form_"),
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CHRONOLOGY
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def chronological_order(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sort rows chronologically.
+
+    Uses the scraped `date` column when present, then match ID and map ID
+    (numeric where possible — vlr IDs increase over time).
+    """
+    sort_cols = []
+    frame = pd.DataFrame(index=df.index)
+
+    if "date" in df.columns:
+        frame["_date"] = pd.to_datetime(df["date"], errors="coerce")
+        sort_cols.append("_date")
+
+    for col in ["match_id", "map_id"]:
+        frame[f"_{col}_num"] = pd.to_numeric(df[col], errors="coerce")
+        frame[f"_{col}"] = df[col].astype(str)
+        sort_cols += [f"_{col}_num", f"_{col}"]
+
+    order = frame.sort_values(sort_cols, kind="mergesort").index
+    return df.loc[order].reset_index(drop=True)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# ENGINE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class RollingState:
+    """
+    Streaming last-N / EWM accumulator for one grouping scope.
+
+    Per group it keeps an EWM numerator/denominator per stat, a ring buffer
+    of the last N values and the number of maps seen.
+    """
+
+    def __init__(self, stats: list[str], window: int, halflife: float):
+        self.stats = list(stats)
+        self.window = window
+        self.halflife = halflife
+        self.decay = 0.5 ** (1.0 / halflife)
+
+        n_stats = len(self.stats)
+        self.group_index: dict[tuple, int] = {}
+        self.num = np.zeros((0, n_stats))
+        self.den = np.zeros((0, n_stats))
+        self.ring = np.full((0, window, n_stats), np.nan)
+        self.seen = np.zeros(0, dtype=np.int64)
+
+    def _group_ids(self, keys: list[tuple]) -> np.ndarray:
+        """Map group keys to row ids, growing the state for unseen groups."""
+        ids = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            gid = self.group_index.get(key)
+            if gid is None:
+                gid = self.group_index[key] = len(self.group_index)
+            ids[i] = gid
+
+        n_new = len(self.group_index) - len(self.seen)
+        if n_new > 0:
+            n_stats = len(self.stats)
+            self.num = np.vstack([self.num, np.zeros((n_new, n_stats))])
+            self.den = np.vstack([self.den, np.zeros((n_new, n_stats))])
+            self.ring = np.concatenate([self.ring, np.full((n_new, self.window, n_stats), np.nan)])
+            self.seen = np.concatenate([self.seen, np.zeros(n_new, dtype=np.int64)])
+        return ids
+
+    def _snapshot(self, gids: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Current last-N mean, EWM mean and map count for the given groups."""
+        ring = self.ring[gids]
+        valid = ~np.isnan(ring)
+        cnt = valid.sum(axis=1)
+        total = np.where(valid, ring, 0.0).sum(axis=1)
+        num, den = self.num[gids], self.den[gids]
+        last_n = np.where(cnt > 0, total / np.maximum(cnt, 1), np.nan)
+        ewm = np.where(den > 0, num / np.where(den > 0, den, 1.0), np.nan)
+        return last_n, ewm, self.seen[gids]
+
+    def advance(self, keys: list[tuple], values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fold chronologically-ordered rows into the state.
+
+        Returns the as-of (before this row) last-N mean, EWM mean and
+        prior-map count for every row.
+        """
+        gids = self._group_ids(keys)
+        n_rows, n_stats = values.shape
+        last_n = np.full((n_rows, n_stats), np.nan)
+        ewm = np.full((n_rows, n_stats), np.nan)
+        count = np.zeros(n_rows, dtype=np.int64)
+
+        # Occurrence index of each row within its group: rows with the same
+        # index touch distinct groups and can be updated together
+        occurrence = pd.Series(gids).groupby(gids).cumcount().to_numpy()
+
+        for step in range(occurrence.max() + 1 if n_rows else 0):
+            rows = np.flatnonzero(occurrence == step)
+            g = gids[rows]
+            x = values[rows]
+
+            last_n[rows], ewm[rows], count[rows] = self._snapshot(g)
+
+            valid = ~np.isnan(x)
+            self.ring[g, self.seen[g] % self.window] = x
+            self.num[g] = self.decay * self.num[g] + np.where(valid, x, 0.0)
+            self.den[g] = self.decay * self.den[g] + valid
+            self.seen[g] += 1
+
+        return last_n, ewm, count
+
+    def current(self) -> tuple[list[tuple], np.ndarray, np.ndarray, np.ndarray]:
+        """Inclusive (after all processed rows) form for every group."""
+        keys = list(self.group_index)
+        last_n, ewm, count = self._snapshot(np.arange(len(keys)))
+        return keys, last_n, ewm, count
+
+
+def _feature_frame(prefix: str, stats: list[str], window: int,
+                   last_n: np.ndarray, ewm: np.ndarray, count: np.ndarray) -> pd.DataFrame:
+    """Name the engine outputs: {prefix}{stat}_last{N}, {prefix}{stat}_ewm, {prefix}matches."""
+    data = {f"{prefix}matches": count}
+    for j, stat in enumerate(stats):
+        data[f"{prefix}{stat}_last{window}"] = last_n[:, j]
+        data[f"{prefix}{stat}_ewm"] = ewm[:, j]
+    return pd.DataFrame(data)
+
+
+class RollingFeatureEngine:
+    """Per-player and per-player×agent rolling form over chronologically-sorted maps."""
+
+    def __init__(self, stats: list[str] = ROLLING_STATS,
+                 window: int = ROLLING_WINDOW, halflife: float = ROLLING_HALFLIFE):
+        self.stats = list(stats)
+        self.window = window
+        self.halflife = halflife
+        self.states = {scope: RollingState(self.stats, window, halflife) for scope in SCOPES}
+        self.processed: set[tuple[str, str]] = set()
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Process new player-map rows and return their as-of features.
+
+        Rows for (match_id, map_id) pairs that were already processed are
+        skipped, so re-running an update with overlapping data is safe.
+        """
+        df = df[[c for c in ROW_KEYS + ["date"] + self.stats if c in df.columns]]
+        map_keys = list(zip(df["match_id"].astype(str), df["map_id"].astype(str)))
+        fresh = np.array([k not in self.processed for k in map_keys], dtype=bool)
+        df = chronological_order(df[fresh]) if len(df) else df
+
+        values = np.column_stack([
+            pd.to_numeric(df[s], errors="coerce").to_numpy(dtype=float) if s in df.columns
+            else np.full(len(df), np.nan)
+            for s in self.stats
+        ]) if len(df) else np.zeros((0, len(self.stats)))
+
+        pkeys = df["player_name"].astype(str).map(player_key)
+        out = [df[ROW_KEYS].reset_index(drop=True)]
+
+        for scope, (key_cols, prefix) in SCOPES.items():
+            if key_cols == ["player_key"]:
+                keys = [(k,) for k in pkeys]
+            else:
+                keys = list(zip(pkeys, df["agent"]))
+            last_n, ewm, count = self.states[scope].advance(keys, values)
+            out.append(_feature_frame(prefix, self.stats, self.window, last_n, ewm, count))
+
+        self.processed.update(zip(df["match_id"].astype(str), df["map_id"].astype(str)))
+        return pd.concat(out, axis=1)
+
+    def form_table(self, scope: str) -> pd.DataFrame:
+        """Current (inclusive) form per group for `scope`."""
+        key_cols, prefix = SCOPES[scope]
+        keys, last_n, ewm, count = self.states[scope].current()
+        table = pd.DataFrame(keys, columns=key_cols)
+        return pd.concat([table, _feature_frame(prefix, self.stats, self.window, last_n, ewm, count)], axis=1)
+
+    def save(self, path: str = ROLLING_STATE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str = ROLLING_STATE_PATH) -> "RollingFeatureEngine":
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Rolling state not found: {path}. Run the rolling step first.")
+        return joblib.load(path)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RUN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def load_rolling_features(features_dir: str = PLAYER_ROLLING_FEATURES_DIR) -> pd.DataFrame:
+    """Load all as-of rolling feature parts."""
+    return pd.read_parquet(features_dir)
+
+
+def _save_outputs(engine: RollingFeatureEngine, rows: pd.DataFrame, part: int):
+    os.makedirs(PLAYER_ROLLING_FEATURES_DIR, exist_ok=True)
+    path = os.path.join(PLAYER_ROLLING_FEATURES_DIR, f"part-{part:04d}.parquet")
+    rows.to_parquet(path, index=False)
+    print(f"💾 Saved {rows.shape[0]} as-of rows to {path}")
+
+    engine.form_table("player").to_parquet(PLAYER_FORM_PARQUET, index=False)
+    engine.form_table("player_agent").to_parquet(PLAYER_AGENT_FORM_PARQUET, index=False)
+    engine.save()
+    print(f"💾 Saved current form to {PLAYER_FORM_PARQUET} and {PLAYER_AGENT_FORM_PARQUET}")
+
+
+def run_rolling_features(player_stats_path: str = PLAYER_STATS_PARQUET):
+    """Full rebuild: one sorted pass over all player stats."""
+    print("📂 Loading player stats for rolling form features...")
+    df = _read_columns(player_stats_path, ROW_KEYS + ["date"] + ROLLING_STATS)
+    print(f"   Loaded {df.shape[0]} rows")
+
+    print(f"🔧 Building rolling form (last {ROLLING_WINDOW}, half-life {ROLLING_HALFLIFE} maps)...")
+    engine = RollingFeatureEngine()
+    rows = engine.update(df)
+    print(f"   ✅ Rolling features: {rows.shape[0]} rows × {rows.shape[1]} columns")
+
+    for old in glob.glob(os.path.join(PLAYER_ROLLING_FEATURES_DIR, "part-*.parquet")):
+        os.remove(old)
+    _save_outputs(engine, rows, part=0)
+    return rows
+
+
+def update_rolling_features(new_rows_path: str):
+    """Incremental update: fold newly-scraped player-map rows into the saved state."""
+    print(f"📂 Loading new player stats from {new_rows_path}...")
+    df = _read_columns(new_rows_path, ROW_KEYS + ["date"] + ROLLING_STATS)
+
+    engine = RollingFeatureEngine.load()
+    rows = engine.update(df)
+    print(f"   ✅ {rows.shape[0]} new rows ({df.shape[0] - rows.shape[0]} already processed)")
+
+    if rows.empty:
+        return rows
+
+    part = len(glob.glob(os.path.join(PLAYER_ROLLING_FEATURES_DIR, "part-*.parquet")))
+    _save_outputs(engine, rows, part=part)
+    return rows
+
+
+def _read_columns(path: str, columns: list[str]) -> pd.DataFrame:
+    """Read only the requested columns that exist in the Parquet file."""
+    available = set(pq.read_schema(path).names)
+    return pd.read_parquet(path, columns=[c for c in columns if c in available])
+
+
+if __name__ == "__main__":
+    run_rolling_features()
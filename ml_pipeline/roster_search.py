@@ -0,0 +1,109 @@
+"""
+roster_search.py — Beam search for a roster and its agents from a player pool.
+
+Picks `team_size` players out of a pool of N and an agent for each, maximizing
+a batched scoring function — in prediction.suggest_best_roster(), the match
+model's win probability against a fixed opponent lineup. Exhaustive search
+would score C(N, 5) · pool⁵ lineups, so instead:
+
+  1. Construction — lineups grow by one (player, agent) pick per step. Every
+     beam lineup is extended by every unused player/agent pair, all new
+     candidates are scored in one batch and the best `beam_width` are kept.
+     The scorer fills the open slots of a partial lineup with neutral
+     placeholders, so candidates at the same step compare on equal terms.
+  2. Refinement — complete lineups are improved by single moves (switch one
+     player's agent, or bring in a bench player on one of their agents),
+     again scoring each round's neighbours in one batch, until the best
+     lineup stops improving or `refine_rounds` is reached.
+
+Lineups are kept canonical (sorted (player, agent) pairs) and every score is
+memoized, so a lineup reached along several paths is scored once.
+"""
+
+import heapq
+
+from ml_pipeline.config import ROSTER_BEAM_WIDTH, ROSTER_REFINE_ROUNDS
+
+# A lineup is a sorted tuple of (player index, agent) picks
+Lineup = tuple[tuple[int, str], ...]
+
+
+def _canonical(picks) -> Lineup:
+    return tuple(sorted(picks))
+
+
+def _extensions(lineup: Lineup, options: list[dict[str, float]]):
+    """Lineups one pick longer: an unused player on an agent nobody has."""
+    players = {p for p, _ in lineup}
+    agents = {a for _, a in lineup}
+    for p, opts in enumerate(options):
+        if p in players:
+            continue
+        for agent in opts:
+            if agent not in agents:
+                yield _canonical(lineup + ((p, agent),))
+
+
+def _neighbours(lineup: Lineup, options: list[dict[str, float]]):
+    """Lineups differing in one pick: a new agent for a player, or a bench player in."""
+    players = {p for p, _ in lineup}
+    for slot, pick in enumerate(lineup):
+        others = lineup[:slot] + lineup[slot + 1:]
+        agents = {a for _, a in others}
+        for q, opts in enumerate(options):
+            if q in players and q != pick[0]:
+                continue
+            for agent in opts:
+                if agent not in agents and (q, agent) != pick:
+                    yield _canonical(others + ((q, agent),))
+
+
+def beam_search_rosters(
+    options: list[dict[str, float]],
+    score_batch,
+    team_size: int = 5,
+    top_k: int = 5,
+    beam_width: int = ROSTER_BEAM_WIDTH,
+    refine_rounds: int = ROSTER_REFINE_ROUNDS,
+) -> tuple[list[tuple[float, Lineup]], int]:
+    """
+    Best `top_k` complete lineups found by beam search.
+
+    `options[i]` holds the agents player i may play (their values are not
+    used). `score_batch(lineups)` returns one score per lineup, higher is
+    better; lineups may be partial during construction. Returns
+    [(score, lineup)] best first and the number of lineups scored.
+    """
+    if len(options) < team_size or top_k <= 0:
+        return [], 0
+
+    scores: dict[Lineup, float] = {}
+
+    def score(candidates) -> list[Lineup]:
+        candidates = sorted(set(candidates))
+        new = [c for c in candidates if c not in scores]
+        if new:
+            scores.update(zip(new, map(float, score_batch(new))))
+        return candidates
+
+    def best(lineups, k) -> list[Lineup]:
+        return heapq.nlargest(k, lineups, key=scores.__getitem__)
+
+    # 1. Construction, one pick per step
+    beam: list[Lineup] = [()]
+    for _ in range(team_size):
+        candidates = score(c for lineup in beam for c in _extensions(lineup, options))
+        if not candidates:
+            return [], len(scores)
+        beam = best(candidates, beam_width)
+
+    # 2. Refinement by single-pick moves
+    for _ in range(refine_rounds):
+        incumbent = scores[beam[0]]
+        candidates = score(n for lineup in beam for n in _neighbours(lineup, options))
+        beam = best(sorted(set(beam).union(candidates)), beam_width)
+        if scores[beam[0]] <= incumbent:
+            break
+
+    complete = sorted(l for l in scores if len(l) == team_size)
+    return [(scores[l], l) for l in best(complete, top_k)], len(scores)
@@ -5,11 +5,32 @@ Usage:
     python -m ml_pipeline.run_pipeline --step all
     python -m ml_pipeline.run_pipeline --step clean
     python -m ml_pipeline.run_pipeline --step features
+    python -m ml_pipeline.run_pipeline --step features --chunked
+    python -m ml_pipeline.run_pipeline --step features --backend duckdb
+    python -m ml_pipeline.run_pipeline --step rolling
+    python -m ml_pipeline.run_pipeline --update-rolling new_player_stats.parquet
     python -m ml_pipeline.run_pipeline --step train
+    python -m ml_pipeline.run_pipeline --step train --match-backend hist
+    python -m ml_pipeline.run_pipeline --update-models new_player_stats.parquet
+    python -m ml_pipeline.run_pipeline --list-models
+    python -m ml_pipeline.run_pipeline --rollback player
+    python -m ml_pipeline.run_pipeline --rollback match --to v0001
+    python -m ml_pipeline.run_pipeline --evaluate-player --cv-trees 50
+    python -m ml_pipeline.run_pipeline --tune
+    python -m ml_pipeline.run_pipeline --tune match --match-backend hist
+    python -m ml_pipeline.run_pipeline --benchmark match-backends
+    python -m ml_pipeline.run_pipeline --benchmark player-forest
+    python -m ml_pipeline.run_pipeline --benchmark model-loading
+    python -m ml_pipeline.run_pipeline --benchmark inference
+    python -m ml_pipeline.run_pipeline --benchmark series-simulation
     python -m ml_pipeline.run_pipeline --predict-player "TenZ" --map Lotus --agent Jett
     python -m ml_pipeline.run_pipeline --predict-match teamA.json teamB.json
+    python -m ml_pipeline.run_pipeline --simulate-series teamA.json teamB.json --maps Bind,Haven,Lotus
+    python -m ml_pipeline.run_pipeline --predict-series teamA.json teamB.json --best-of 3
+    python -m ml_pipeline.run_pipeline --simulate-bracket event.json
     python -m ml_pipeline.run_pipeline --suggest-agent "TenZ" --map Bind
     python -m ml_pipeline.run_pipeline --suggest-comp "player1,player2,player3,player4,player5" --map Pearl
+    python -m ml_pipeline.run_pipeline --suggest-roster "p1,p2,p3,p4,p5,p6,p7,p8" --opponent teamB.json --map Bind
 """
 
 import argparse
@@ -17,12 +38,22 @@ import json
 import sys
 import time
 
+import pandas as pd
+
 from ml_pipeline.data_cleaning import run_cleaning
 from ml_pipeline.feature_engineering import run_feature_engineering
-from ml_pipeline.model_training import run_training
+from ml_pipeline.rolling_features import run_rolling_features, update_rolling_features
+from ml_pipeline.model_training import run_training, evaluate_player_model, load_tuned_params
+from ml_pipeline.incremental_training import run_incremental_update
+from ml_pipeline.model_registry import registry_summary, rollback_model
+from ml_pipeline.config import (
+    MATCH_MODEL_BACKENDS, DEFAULT_MATCH_BACKEND, MATCH_UPDATE_MODES, TUNING_CANDIDATES,
+    PLAYER_FEATURES_PARQUET, PLAYER_CV_PROXY_TREES, MC_SIMULATIONS, MC_SEED, SERIES_FORMATS,
+    TOURNAMENT_SIMULATIONS,
+)
 from ml_pipeline.prediction import (
-    predict_player, predict_match, simulate_team,
-    suggest_best_agent, suggest_best_composition,
+    predict_player, predict_match, simulate_team, simulate_series, predict_series, simulate_tournament,
+    suggest_best_agent, suggest_best_composition, suggest_best_roster,
 )
 
 
@@ -45,20 +76,101 @@ Examples:
   python -m ml_pipeline.run_pipeline --step features
   python -m ml_pipeline.run_pipeline --step train
 
+  # Build features out-of-core (bounded memory, for very large player_stats)
+  python -m ml_pipeline.run_pipeline --step features --chunked
+
+  # Build features with the lazy DuckDB query engine (pip install duckdb)
+  python -m ml_pipeline.run_pipeline --step features --backend duckdb
+
+  # Train the match model with a faster histogram-based backend
+  python -m ml_pipeline.run_pipeline --step train --match-backend hist
+
+  # Compare match model backends (fit time, latency, size, AUC)
+  python -m ml_pipeline.run_pipeline --benchmark match-backends
+
+  # Compare the native multi-output player forest with per-target forests
+  python -m ml_pipeline.run_pipeline --benchmark player-forest
+
+  # Monte Carlo series throughput (simulated Bo1/Bo3/Bo5 series per second)
+  python -m ml_pipeline.run_pipeline --benchmark series-simulation
+
+  # Recency-weighted form features (full rebuild / incremental update)
+  python -m ml_pipeline.run_pipeline --step rolling
+  python -m ml_pipeline.run_pipeline --update-rolling new_player_stats.parquet
+
+  # Grouped-by-player CV of the player model (quick 50-tree proxy / full forest)
+  python -m ml_pipeline.run_pipeline --evaluate-player --cv-trees 50
+  python -m ml_pipeline.run_pipeline --evaluate-player --cv-trees 0
+
+  # Successive-halving hyperparameter search (best configs used by --step train)
+  python -m ml_pipeline.run_pipeline --tune
+  python -m ml_pipeline.run_pipeline --tune match --match-backend hist --tune-candidates 81
+
+  # Daily refresh: warm-start both models on new rows, promote if not worse
+  python -m ml_pipeline.run_pipeline --update-models new_player_stats.parquet
+  python -m ml_pipeline.run_pipeline --update-models new_player_stats.parquet --match-update window
+
+  # Inspect the model registry / re-promote the previously served version
+  python -m ml_pipeline.run_pipeline --list-models
+  python -m ml_pipeline.run_pipeline --rollback match
+  python -m ml_pipeline.run_pipeline --rollback match --to v0001
+
   # Predict player performance
   python -m ml_pipeline.run_pipeline --predict-player "TenZ" --map Lotus --agent Jett
 
+  # Monte Carlo Bo3: series win probability, intervals and score lines
+  python -m ml_pipeline.run_pipeline --simulate-series teamA.json teamB.json --maps Bind,Haven,Lotus --seed 7
+
+  # Series prediction: optimal Bo3 veto over the active map pool (or --maps)
+  python -m ml_pipeline.run_pipeline --predict-series teamA.json teamB.json --best-of 3
+  python -m ml_pipeline.run_pipeline --predict-series teamA.json teamB.json --best-of 5 --maps Ascent,Bind,Haven,Lotus,Pearl,Split,Sunset
+
+  # Whole event: advancement probabilities per stage (event.json = {"teams": {name: lineup}, "stages": [...]})
+  python -m ml_pipeline.run_pipeline --simulate-bracket event.json --sims 200000
+
   # Suggest best agent for a player
   python -m ml_pipeline.run_pipeline --suggest-agent "TenZ" --map Bind
 
   # Suggest best team composition
   python -m ml_pipeline.run_pipeline --suggest-comp "player1,player2,player3,player4,player5" --map Pearl
+
+  # Best 5 players + agents from a roster with subs against a known opponent
+  python -m ml_pipeline.run_pipeline --suggest-roster "p1,p2,p3,p4,p5,p6,p7,p8" --opponent teamB.json --map Bind
         """,
     )
 
     # Pipeline steps
-    parser.add_argument("--step", choices=["all", "clean", "features", "train"],
+    parser.add_argument("--step", choices=["all", "clean", "features", "rolling", "train"],
                         help="Pipeline step to run")
+    parser.add_argument("--chunked", action="store_true",
+                        help="Build features out-of-core from streamed row batches")
+    parser.add_argument("--backend", choices=["pandas", "duckdb"], default="pandas",
+                        help="Feature engineering engine (default: pandas)")
+    parser.add_argument("--match-backend", choices=MATCH_MODEL_BACKENDS, default=DEFAULT_MATCH_BACKEND,
+                        help=f"Classifier backend for the match model (default: {DEFAULT_MATCH_BACKEND})")
+    parser.add_argument("--benchmark", choices=["match-backends", "player-forest", "model-loading", "inference",
+                                                  "series-simulation"],
+                        help="Run a performance benchmark")
+    parser.add_argument("--evaluate-player", action="store_true",
+                        help="GroupKFold-by-player CV of the player model with confidence intervals")
+    parser.add_argument("--cv-trees", type=int, default=PLAYER_CV_PROXY_TREES,
+                        help=f"Trees per fold for --evaluate-player, 0 = full forest (default: {PLAYER_CV_PROXY_TREES})")
+    parser.add_argument("--tune", nargs="?", const="all", choices=["all", "player", "match"],
+                        help="Successive-halving hyperparameter search (default: all)")
+    parser.add_argument("--tune-candidates", type=int, default=TUNING_CANDIDATES,
+                        help=f"Configurations sampled per model for --tune (default: {TUNING_CANDIDATES})")
+    parser.add_argument("--update-rolling", metavar="NEW_STATS_PARQUET",
+                        help="Fold new cleaned player-map rows into the rolling form state")
+    parser.add_argument("--update-models", metavar="NEW_STATS_PARQUET",
+                        help="Warm-start both models on new cleaned player-map rows (promoted if not worse)")
+    parser.add_argument("--match-update", choices=MATCH_UPDATE_MODES, default="continue",
+                        help="How --update-models updates the match model (default: continue)")
+    parser.add_argument("--list-models", action="store_true",
+                        help="List the versions in the model registry (* = promoted)")
+    parser.add_argument("--rollback", choices=["player", "match"],
+                        help="Re-promote the previously served version of a model")
+    parser.add_argument("--to", metavar="VERSION",
+                        help="Version --rollback re-promotes (e.g. v0001; default: the previous one)")
 
     # Prediction
     parser.add_argument("--predict-player", metavar="NAME",
@@ -75,6 +187,22 @@ Examples:
                         help="Simulate team performance from JSON file")
     parser.add_argument("--opponent", metavar="OPPONENT_JSON",
                         help="Opponent team JSON file (for simulation)")
+    parser.add_argument("--simulate-series", nargs=2, metavar=("TEAM_A_JSON", "TEAM_B_JSON"),
+                        help="Monte Carlo series simulation (best-of-N over the --maps given)")
+    parser.add_argument("--predict-series", nargs=2, metavar=("TEAM_A_JSON", "TEAM_B_JSON"),
+                        help="Optimal map veto and series win probability over the map pool")
+    parser.add_argument("--best-of", type=int, choices=SERIES_FORMATS, default=3,
+                        help="Series length for --predict-series (default: 3)")
+    parser.add_argument("--maps", help="Comma-separated maps: series maps in play order for --simulate-series, "
+                                       "the veto pool for --predict-series (e.g. Bind,Haven,Lotus)")
+    parser.add_argument("--simulate-bracket", metavar="EVENT_JSON",
+                        help="Monte Carlo a tournament: {\"teams\": {name: lineup}, \"stages\": [...], "
+                             "\"map_pool\": [...] (optional)}")
+    parser.add_argument("--sims", type=int,
+                        help=f"Simulated runs for --simulate-series (default: {MC_SIMULATIONS}) "
+                             f"or --simulate-bracket (default: {TOURNAMENT_SIMULATIONS})")
+    parser.add_argument("--seed", type=int, default=MC_SEED,
+                        help=f"RNG seed for --simulate-series / --simulate-bracket (default: {MC_SEED})")
 
     # Agent suggestion
     parser.add_argument("--suggest-agent", metavar="NAME",
@@ -84,6 +212,11 @@ Examples:
     parser.add_argument("--suggest-comp", metavar="PLAYERS",
                         help="Suggest best composition (comma-separated player names)")
 
+    # Roster search
+    parser.add_argument("--suggest-roster", metavar="PLAYERS",
+                        help="Pick the best 5 players and agents from a pool (comma-separated) "
+                             "against --opponent")
+
     args = parser.parse_args()
 
     # ─── Pipeline Steps ──────────────────────────────────────────────────
@@ -100,18 +233,78 @@ Examples:
             print("\n" + "═" * 60)
             print("STEP 2: FEATURE ENGINEERING")
             print("═" * 60)
-            run_feature_engineering()
+            run_feature_engineering(chunked=args.chunked, backend=args.backend)
+
+        if args.step in ("all", "rolling"):
+            print("\n" + "═" * 60)
+            print("STEP 2b: ROLLING FORM FEATURES")
+            print("═" * 60)
+            run_rolling_features()
 
         if args.step in ("all", "train"):
             print("\n" + "═" * 60)
             print("STEP 3: MODEL TRAINING")
             print("═" * 60)
-            run_training()
+            run_training(match_backend=args.match_backend)
 
         elapsed = time.time() - start
         print(f"\n⏱️  Pipeline completed in {elapsed:.1f}s")
         return
 
+    # ─── Benchmarks ──────────────────────────────────────────────────────
+    if args.benchmark:
+        from ml_pipeline import benchmarks
+        if args.benchmark == "match-backends":
+            benchmarks.benchmark_match_backends()
+        elif args.benchmark == "player-forest":
+            benchmarks.benchmark_player_forest()
+        elif args.benchmark == "model-loading":
+            benchmarks.benchmark_model_loading()
+        elif args.benchmark == "inference":
+            benchmarks.benchmark_inference()
+        elif args.benchmark == "series-simulation":
+            benchmarks.benchmark_series_simulation()
+        return
+
+    # ─── Player Model Evaluation ─────────────────────────────────────────
+    if args.evaluate_player:
+        df = pd.read_parquet(PLAYER_FEATURES_PARQUET)
+        evaluate_player_model(df, params=load_tuned_params("player"), proxy_trees=args.cv_trees or None)
+        return
+
+    # ─── Hyperparameter Tuning ───────────────────────────────────────────
+    if args.tune:
+        from ml_pipeline.tuning import run_tuning
+        run_tuning(args.tune, match_backend=args.match_backend, n_candidates=args.tune_candidates)
+        return
+
+    # ─── Incremental Rolling Update ──────────────────────────────────────
+    if args.update_rolling:
+        update_rolling_features(args.update_rolling)
+        return
+
+    # ─── Incremental Model Update ────────────────────────────────────────
+    if args.update_models:
+        run_incremental_update(args.update_models, match_mode=args.match_update,
+                               match_backend=args.match_backend)
+        return
+
+    # ─── Model Registry ──────────────────────────────────────────────────
+    if args.list_models:
+        for name in ("player", "match"):
+            summary = registry_summary(name)
+            print(f"\n📦 {name} model")
+            print(summary.to_string(index=False) if not summary.empty else "   (no registered versions)")
+        return
+
+    if args.rollback:
+        try:
+            rollback_model(args.rollback, to=args.to)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+
     # ─── Player Prediction ───────────────────────────────────────────────
     if args.predict_player:
         if not args.map or not args.agent:
@@ -148,6 +341,57 @@ Examples:
         _print_json(result)
         return
 
+    # ─── Series Prediction ───────────────────────────────────────────────
+    if args.predict_series:
+        team_a_file, team_b_file = args.predict_series
+        with open(team_a_file) as f:
+            team_a = json.load(f)
+        with open(team_b_file) as f:
+            team_b = json.load(f)
+        map_pool = [m.strip() for m in args.maps.split(",")] if args.maps else None
+        try:
+            result = predict_series(team_a, team_b, args.best_of, map_pool)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        _print_json(result)
+        return
+
+    # ─── Series Simulation ───────────────────────────────────────────────
+    if args.simulate_series:
+        if not args.maps:
+            print("❌ --maps is required for series simulation")
+            sys.exit(1)
+        team_a_file, team_b_file = args.simulate_series
+        with open(team_a_file) as f:
+            team_a = json.load(f)
+        with open(team_b_file) as f:
+            team_b = json.load(f)
+        maps = [m.strip() for m in args.maps.split(",")]
+        if len(maps) not in SERIES_FORMATS:
+            print(f"❌ Give {', '.join(map(str, SERIES_FORMATS))} maps for a Bo1/Bo3/Bo5, got {len(maps)}")
+            sys.exit(1)
+        result = simulate_series(team_a, team_b, maps, n_sims=args.sims or MC_SIMULATIONS, seed=args.seed)
+        _print_json(result)
+        return
+
+    # ─── Tournament Simulation ───────────────────────────────────────────
+    if args.simulate_bracket:
+        with open(args.simulate_bracket) as f:
+            event = json.load(f)
+        if "teams" not in event or "stages" not in event:
+            print("❌ The event file needs \"teams\" and \"stages\"")
+            sys.exit(1)
+        try:
+            result = simulate_tournament(event["teams"], event["stages"],
+                                         n_sims=args.sims or TOURNAMENT_SIMULATIONS, seed=args.seed,
+                                         map_pool=event.get("map_pool"))
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        _print_json(result)
+        return
+
     # ─── Agent Suggestion ────────────────────────────────────────────────
     if args.suggest_agent:
         if not args.map:
@@ -170,6 +414,21 @@ Examples:
         _print_json(result)
         return
 
+    # ─── Roster Search ───────────────────────────────────────────────────
+    if args.suggest_roster:
+        if not args.opponent or not args.map:
+            print("❌ --opponent and --map are required for roster search")
+            sys.exit(1)
+        pool = [p.strip() for p in args.suggest_roster.split(",")]
+        if len(pool) < 5:
+            print(f"❌ Need at least 5 players, got {len(pool)}")
+            sys.exit(1)
+        with open(args.opponent) as f:
+            opponent = json.load(f)
+        result = suggest_best_roster(pool, args.map, opponent)
+        _print_json(result)
+        return
+
     # No action specified
     parser.print_help()
 
@@ -0,0 +1,328 @@
+"""
+tournament.py — Monte Carlo simulation of multi-stage tournament brackets.
+
+An event is a list of stages — single elimination, double elimination, Swiss
+or round-robin groups. Each stage's entrants are named teams or the previous
+stage's advancers, in seed order (optionally behind invited teams). Every
+stage is played for all simulations at once: entrants are an
+(n_sims, n_entrants) array of team ids and each round of matches is one
+vectorized draw against the pairwise series win-probability matrix.
+
+PairwiseWinMatrix holds team i's win probability against team j on every map
+(predicted once for all pairs) and derives series probabilities from it with
+optimal vetoes (see map_veto), computed once per series length.
+
+Stage definitions (dicts):
+  {"format": "single_elim", "teams": [...], "best_of": 3, "final_best_of": 5}
+  {"format": "double_elim", "best_of": 3, "final_best_of": 5, "advance": 2}
+  {"format": "swiss", "teams": [...], "wins": 3, "losses": 3, "best_of": 1}
+  {"format": "groups", "groups": [[...], [...]] or 2, "advance": 2}
+"teams" may be omitted after the first stage; "invited" teams are seeded
+ahead of the previous stage's advancers. Elimination stages need a power
+of two entrants; Swiss pairs the top half of each record group against the
+bottom half by seed, without rematch avoidance; group ties are broken at
+random.
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+from ml_pipeline.config import TOURNAMENT_FORMATS
+from ml_pipeline.map_veto import solve_veto
+
+
+class PairwiseWinMatrix:
+    """Map-level win probabilities of every team pair and the series probabilities derived from them."""
+
+    def __init__(self, map_probs: np.ndarray, maps: list[str]):
+        self.map_probs = map_probs  # (n_teams, n_teams, n_maps), p[i, j] = 1 − p[j, i]
+        self.maps = list(maps)
+        self._series: dict[int, np.ndarray] = {}
+
+    def series(self, best_of: int) -> np.ndarray:
+        """
+        P(team i beats team j in a best-of series with optimal vetoes), shape
+        (n_teams, n_teams). Each pair is vetoed with either team going first
+        and the two results are averaged.
+        """
+        if best_of not in self._series:
+            n = len(self.map_probs)
+            probs = np.full((n, n), 0.5)
+            for i, j in combinations(range(n), 2):
+                p = solve_veto(dict(zip(self.maps, self.map_probs[i, j])), best_of)
+                q = solve_veto(dict(zip(self.maps, self.map_probs[j, i])), best_of)
+                probs[i, j] = (p["series_win_probability"] + 1 - q["series_win_probability"]) / 2
+                probs[j, i] = 1 - probs[i, j]
+            self._series[best_of] = probs
+        return self._series[best_of]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PRIMITIVES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _play(a: np.ndarray, b: np.ndarray, probs: np.ndarray, rng: np.random.Generator):
+    """Winners and losers of the series a[k] vs b[k] (arrays of team ids)."""
+    a_wins = rng.random(a.shape) < probs[a, b]
+    return np.where(a_wins, a, b), np.where(a_wins, b, a)
+
+
+def _share(teams: np.ndarray, n_teams: int) -> np.ndarray:
+    """Fraction of simulations (rows) each team id appears in."""
+    return np.bincount(teams.ravel(), minlength=n_teams) / len(teams)
+
+
+def _bracket_order(n: int) -> np.ndarray:
+    """Seeds in bracket slot order: 1 v n, then 2 v n−1 in the other half, and so on."""
+    order = [0]
+    while len(order) < n:
+        size = 2 * len(order)
+        order = [s for seed in order for s in (seed, size - 1 - seed)]
+    return np.array(order)
+
+
+def _round_name(n_left: int) -> str:
+    return {2: "Final", 4: "Semifinals", 8: "Quarterfinals"}.get(n_left, f"Round of {n_left}")
+
+
+def _check_bracket_size(n: int, minimum: int, fmt: str):
+    if n < minimum or n & (n - 1):
+        raise ValueError(f"{fmt} needs a power-of-two number of teams (at least {minimum}), got {n}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# STAGES
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _single_elim(entrants, probs, final_probs, rng, n_teams, advance=1):
+    """Champion (and runner-up if advance=2) per simulation; share reaching each round."""
+    _check_bracket_size(entrants.shape[1], 2, "Single elimination")
+    slots = entrants[:, _bracket_order(entrants.shape[1])]
+    reached = {}
+    while slots.shape[1] > 1:
+        reached[_round_name(slots.shape[1])] = _share(slots, n_teams)
+        round_probs = final_probs if slots.shape[1] == 2 else probs
+        slots, losers = _play(slots[:, 0::2], slots[:, 1::2], round_probs, rng)
+    advancers = slots if advance == 1 else np.column_stack([slots, losers])
+    return advancers, {"reached": reached}
+
+
+def _double_elim(entrants, probs, final_probs, rng, n_teams, advance=1):
+    """
+    Upper bracket as single elimination; its first-round losers seed the
+    lower bracket and later losers drop in round by round (crossed, to
+    delay rematches). Grand final: upper vs lower bracket winner.
+    """
+    _check_bracket_size(entrants.shape[1], 4, "Double elimination")
+    slots = entrants[:, _bracket_order(entrants.shape[1])]
+    reached, upper_losers = {}, []
+    while slots.shape[1] > 1:
+        reached[f"Upper {_round_name(slots.shape[1])}"] = _share(slots, n_teams)
+        slots, losers = _play(slots[:, 0::2], slots[:, 1::2], probs, rng)
+        upper_losers.append(losers)
+
+    lower, _ = _play(upper_losers[0][:, 0::2], upper_losers[0][:, 1::2], probs, rng)
+    for dropped in upper_losers[1:]:
+        if dropped.shape[1] == 1:
+            reached["Lower Final"] = _share(np.column_stack([lower, dropped]), n_teams)
+        lower, _ = _play(lower, dropped[:, ::-1], probs, rng)
+        if lower.shape[1] > 1:
+            lower, _ = _play(lower[:, 0::2], lower[:, 1::2], probs, rng)
+
+    reached["Grand Final"] = _share(np.column_stack([slots, lower]), n_teams)
+    champion, runner_up = _play(slots, lower, final_probs, rng)
+    advancers = champion if advance == 1 else np.column_stack([champion, runner_up])
+    return advancers, {"reached": reached}
+
+
+def _swiss(entrants, probs, rng, n_teams, wins_needed=3, losses_out=3):
+    """
+    Swiss rounds until every team has `wins_needed` wins or `losses_out`
+    losses. Each round splits the teams on the same record, in seed order,
+    into a top and bottom half and pairs them across (1 v n/2+1, 2 v n/2+2,
+    ...). A group with an odd count floats its lowest seed down to the next
+    record group; an odd team out at the bottom gets a bye win. Advancers
+    are ordered by record, then seed.
+    """
+    n_sims, n = entrants.shape
+    if n % 2:
+        raise ValueError(f"Swiss needs an even number of teams, got {n}")
+    rows = np.arange(n_sims)[:, None]
+    seed = np.arange(n)
+    position = np.broadcast_to(seed, (n_sims, n))
+    wins = np.zeros((n_sims, n), dtype=np.int64)
+    losses = np.zeros((n_sims, n), dtype=np.int64)
+    done = n * (wins_needed + 1) * (losses_out + 1)
+
+    while True:
+        active = (wins < wins_needed) & (losses < losses_out)
+        if not active.any():
+            break
+        standing = ((wins_needed - wins) * (losses_out + 1) + losses) * n + seed
+        keyed = np.where(active, standing, done + seed)
+        order = np.argsort(keyed, axis=1, kind="stable")
+
+        # Record groups in standings order; finished teams form the last one.
+        # Moving each group boundary down to an even position floats the
+        # lowest seed of an odd group into the next group.
+        record = np.take_along_axis(keyed, order, axis=1) // n
+        starts = np.zeros((n_sims, n), dtype=bool)
+        starts[:, 0] = True
+        bound = np.flatnonzero((record[:, 1:] != record[:, :-1]).ravel())
+        starts[bound // (n - 1), (bound % (n - 1) + 1) & ~1] = True
+        group_start = np.maximum.accumulate(np.where(starts, position, 0), axis=1)
+        group_end = np.minimum.accumulate(
+            np.where(np.roll(starts, -1, axis=1), position + 1, n)[:, ::-1], axis=1)[:, ::-1]
+        half = (group_end - group_start) // 2
+        top = np.argsort(position - group_start >= half, axis=1, kind="stable")[:, :n // 2]
+        a_pos = order[rows, top]
+        b_pos = order[rows, top + half[rows, top]]
+
+        a_active, b_active = active[rows, a_pos], active[rows, b_pos]
+        both, bye = a_active & b_active, a_active & ~b_active
+        a_won = rng.random(a_pos.shape) < probs[entrants[rows, a_pos], entrants[rows, b_pos]]
+        a_won |= bye
+
+        wins[rows, np.where(a_won, a_pos, b_pos)] += both | bye
+        losses[rows, np.where(a_won, b_pos, a_pos)] += both
+
+    advanced = wins == wins_needed
+    counts = advanced.sum(axis=1)
+    if (counts != counts[0]).any():
+        raise ValueError("This Swiss format does not advance a fixed number of teams")
+    order = np.argsort(np.where(advanced, losses * n + seed, done + seed), axis=1, kind="stable")
+    advancers = entrants[rows, order[:, :counts[0]]]
+
+    # Final record distribution per team
+    n_records = (wins_needed + 1) * (losses_out + 1)
+    code = wins * (losses_out + 1) + losses
+    tally = np.bincount((entrants * n_records + code).ravel(), minlength=n_teams * n_records)
+    tally = tally.reshape(n_teams, n_records) / n_sims
+    records = {
+        f"{w}-{l}": tally[:, w * (losses_out + 1) + l]
+        for w in range(wins_needed, -1, -1) for l in range(losses_out + 1)
+        if (w == wins_needed) != (l == losses_out) and tally[:, w * (losses_out + 1) + l].any()
+    }
+    return advancers, {"records": records}
+
+
+def _groups(entrants, members, probs, rng, n_teams, advance=2):
+    """
+    Round-robin groups (members = entrant positions per group). Standings by
+    series wins, ties broken at random. Advancers: every group winner in
+    group order, then every runner-up, and so on.
+    """
+    n_sims = len(entrants)
+    size = len(members[0])
+    if any(len(group) != size for group in members) or advance > size:
+        raise ValueError("Groups must be the same size and at least `advance` teams each")
+
+    placed = [[] for _ in range(advance)]
+    placements = np.zeros((size, n_teams))
+    for group in members:
+        teams = entrants[:, group]
+        wins = np.zeros(teams.shape)
+        for i, j in combinations(range(size), 2):
+            i_won = rng.random(n_sims) < probs[teams[:, i], teams[:, j]]
+            wins[:, i] += i_won
+            wins[:, j] += ~i_won
+        # Random jitter below one win breaks ties
+        ranked = np.take_along_axis(teams, np.argsort(-(wins + 0.5 * rng.random(wins.shape)), axis=1), axis=1)
+        for place in range(size):
+            placements[place] += np.bincount(ranked[:, place], minlength=n_teams)
+        for place in range(advance):
+            placed[place].append(ranked[:, place])
+
+    advancers = np.column_stack([team for place in placed for team in place])
+    return advancers, {"placements": {place + 1: placements[place] / n_sims for place in range(size)}}
+
+
+def _snake_groups(n: int, n_groups: int) -> list[list[int]]:
+    """Seed positions per group, seeded in snake order (A B C D D C B A ...)."""
+    if n % n_groups:
+        raise ValueError(f"{n} teams cannot be split into {n_groups} equal groups")
+    groups = [[] for _ in range(n_groups)]
+    for s in range(n):
+        r, c = divmod(s, n_groups)
+        groups[c if r % 2 == 0 else n_groups - 1 - c].append(s)
+    return groups
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# EVENT
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def simulate_stages(
+    stages: list[dict], team_names: list[str], matrix: PairwiseWinMatrix,
+    n_sims: int, rng: np.random.Generator,
+) -> list[dict]:
+    """
+    Play every stage `n_sims` times. Returns per stage its name, format and
+    best_of, plus per-team arrays (indexed like `team_names`): the share of
+    simulations entering and advancing, winning ("won", elimination stages
+    only) and the format's details (rounds reached, Swiss records or group
+    placements).
+    """
+    index = {name: i for i, name in enumerate(team_names)}
+    n_teams = len(team_names)
+
+    def team_ids(names: list[str]) -> np.ndarray:
+        unknown = [n for n in names if n not in index]
+        if unknown:
+            raise ValueError(f"Unknown teams: {', '.join(unknown)}")
+        return np.broadcast_to(np.array([index[n] for n in names]), (n_sims, len(names)))
+
+    results, previous = [], None
+    for k, stage in enumerate(stages):
+        fmt = stage.get("format")
+        name = stage.get("name", f"Stage {k + 1}")
+        if fmt not in TOURNAMENT_FORMATS:
+            raise ValueError(f"Stage {name!r}: format must be one of {TOURNAMENT_FORMATS}, got {fmt!r}")
+        best_of = stage.get("best_of", 3)
+        probs = matrix.series(best_of)
+        final_probs = matrix.series(stage.get("final_best_of", best_of))
+
+        # Entrants in seed order
+        explicit_groups = fmt == "groups" and isinstance(stage.get("groups"), list)
+        names = [n for g in stage["groups"] for n in g] if explicit_groups else stage.get("teams")
+        if names:
+            entrants = team_ids(names)
+        elif previous is not None:
+            invited = stage.get("invited", [])
+            entrants = np.column_stack([team_ids(invited), previous]) if invited else previous
+        else:
+            raise ValueError(f"Stage {name!r} needs 'teams' (it is the first stage)")
+
+        if fmt == "single_elim":
+            advancers, details = _single_elim(entrants, probs, final_probs, rng, n_teams,
+                                              stage.get("advance", 1))
+        elif fmt == "double_elim":
+            advancers, details = _double_elim(entrants, probs, final_probs, rng, n_teams,
+                                              stage.get("advance", 1))
+        elif fmt == "swiss":
+            advancers, details = _swiss(entrants, probs, rng, n_teams,
+                                        stage.get("wins", 3), stage.get("losses", 3))
+        else:
+            if explicit_groups:
+                sizes = np.cumsum([0] + [len(g) for g in stage["groups"]])
+                members = [list(range(a, b)) for a, b in zip(sizes[:-1], sizes[1:])]
+            else:
+                members = _snake_groups(entrants.shape[1], stage.get("groups", 2))
+            advancers, details = _groups(entrants, members, probs, rng, n_teams, stage.get("advance", 2))
+
+        result = {
+            "name":     name,
+            "format":   fmt,
+            "best_of":  best_of,
+            "entered":  _share(entrants, n_teams),
+            "advanced": _share(advancers, n_teams),
+            **details,
+        }
+        # Only a bracket has a single winner; Swiss and group advancers are
+        # ordered by record, which does not make the first one the winner.
+        if fmt in ("single_elim", "double_elim"):
+            result["won"] = _share(advancers[:, :1], n_teams)
+        results.append(result)
+        previous = advancers
+    return results
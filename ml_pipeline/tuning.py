@@ -0,0 +1,219 @@
+"""
+tuning.py — Successive-halving hyperparameter search for both models.
+
+`--tune` samples TUNING_CANDIDATES random configurations per model and races
+them with successive halving: every candidate is cross-validated on a small
+tree budget, the best 1/TUNING_HALVING_FACTOR advance with
+TUNING_HALVING_FACTOR× more trees, and the last round runs at
+TUNING_MAX_TREES. Weak configurations are dropped after costing only a few
+trees each.
+
+Each model's encoded design matrix is materialized once (design_matrix.py)
+and the CV fits run in a joblib process pool that memory-maps it. No worker
+receives a pickled copy and no fold re-runs the one-hot encoding.
+
+The best configuration, with its per-fold CV scores and the halving
+schedule, is written to tuned_params.json. train_player_model() and
+train_match_model() pick it up automatically.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+from scipy.stats import randint, uniform, loguniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, GroupKFold, StratifiedKFold
+
+from ml_pipeline.config import (
+    PLAYER_FEATURES_PARQUET, MATCH_FEATURES_PARQUET, TUNED_PARAMS_PATH,
+    DEFAULT_MATCH_BACKEND,
+    TUNING_CANDIDATES, TUNING_HALVING_FACTOR, TUNING_MAX_TREES, TUNING_CV_FOLDS,
+)
+from ml_pipeline.model_training import (
+    prepare_player_data, build_player_pipeline, player_groups,
+    prepare_match_data, build_match_pipeline,
+)
+from ml_pipeline.design_matrix import cached_design_matrix
+
+
+# ─── Search Spaces ───────────────────────────────────────────────────────────
+
+# RandomForest inside the player pipeline's TransformedTargetRegressor
+PLAYER_SEARCH_SPACE = {
+    "max_depth":         [8, 10, 12, 15, 20, None],
+    "min_samples_split": randint(2, 21),
+    "min_samples_leaf":  randint(1, 11),
+    "max_features":      [1.0, 0.7, 0.5, "sqrt"],
+}
+
+# Match classifier per backend
+MATCH_SEARCH_SPACES = {
+    "gb": {
+        "max_depth":         randint(2, 8),
+        "learning_rate":     loguniform(0.01, 0.3),
+        "subsample":         uniform(0.5, 0.5),
+        "min_samples_leaf":  randint(1, 31),
+    },
+    "hist": {
+        "max_depth":         [3, 4, 5, 6, 8, None],
+        "learning_rate":     loguniform(0.01, 0.3),
+        "max_leaf_nodes":    randint(8, 64),
+        "min_samples_leaf":  randint(5, 51),
+        "l2_regularization": loguniform(1e-4, 10.0),
+    },
+    "xgboost": {
+        "max_depth":         randint(2, 9),
+        "learning_rate":     loguniform(0.01, 0.3),
+        "subsample":         uniform(0.5, 0.5),
+        "colsample_bytree":  uniform(0.5, 0.5),
+        "min_child_weight":  randint(1, 21),
+    },
+}
+
+# Parameter that sets each match backend's tree budget (the halving resource)
+MATCH_BUDGET_PARAM = {"gb": "n_estimators", "hist": "max_iter", "xgboost": "n_estimators"}
+
+
+def _jsonable(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _run_halving(estimator, space: dict, budget_param: str, X, y, cv, scoring: str,
+                 n_candidates: int, groups=None) -> dict:
+    """Race `n_candidates` configs from `space`; returns the tuned_params entry."""
+    search = HalvingRandomSearchCV(
+        estimator,
+        space,
+        n_candidates=n_candidates,
+        factor=TUNING_HALVING_FACTOR,
+        resource=budget_param,
+        min_resources="exhaust",
+        max_resources=TUNING_MAX_TREES,
+        cv=cv,
+        scoring=scoring,
+        refit=False,
+        random_state=42,
+        n_jobs=-1,
+    )
+    search.fit(X, y, groups=groups)
+
+    rounds = [
+        {"candidates": int(c), "trees": int(r)}
+        for c, r in zip(search.n_candidates_, search.n_resources_)
+    ]
+    for i, r in enumerate(rounds):
+        print(f"   Round {i + 1}: {r['candidates']:3d} candidates × {r['trees']} trees")
+
+    best = search.best_index_
+    cv_scores = [float(search.cv_results_[f"split{k}_test_score"][best]) for k in range(cv.n_splits)]
+    return {
+        "params":    {k: _jsonable(v) for k, v in search.best_params_.items()},
+        "scoring":   scoring,
+        "cv_scores": cv_scores,
+        "cv_mean":   float(np.mean(cv_scores)),
+        "cv_std":    float(np.std(cv_scores)),
+        "rounds":    rounds,
+        "n_rows":    int(X.shape[0]),
+        "tuned_at":  datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_tuned_params(model: str, entry: dict, path: str = TUNED_PARAMS_PATH):
+    """Store `entry` under `model` in tuned_params.json, keeping the other model's entry."""
+    tuned = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            tuned = json.load(f)
+    tuned[model] = entry
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(tuned, f, indent=2)
+    os.replace(path + ".tmp", path)
+    print(f"   💾 Saved best {model} config to {path}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PLAYER MODEL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def tune_player_model(features_path: str = PLAYER_FEATURES_PARQUET,
+                      n_candidates: int = TUNING_CANDIDATES) -> dict:
+    """Successive-halving search over the player forest (scored by mean R²)."""
+    print("=" * 60)
+    print("🎛️  Tuning Player Performance Model")
+    print("=" * 60)
+
+    df = pd.read_parquet(features_path)
+    X, y, categorical_features, numeric_features = prepare_player_data(df)
+    pipeline = build_player_pipeline(categorical_features, numeric_features)
+    X_encoded, _ = cached_design_matrix("player", X, pipeline.named_steps["preprocessor"])
+
+    # Parallelism comes from the search's process pool, not the forest
+    estimator = pipeline.named_steps["regressor"].set_params(regressor__n_jobs=1)
+    space = {f"regressor__{k}": v for k, v in PLAYER_SEARCH_SPACE.items()}
+    # Whole players are held out, as in evaluate_player_model()
+    cv = GroupKFold(n_splits=TUNING_CV_FOLDS)
+
+    entry = _run_halving(estimator, space, "regressor__n_estimators", X_encoded, y.to_numpy(),
+                         cv, "r2", n_candidates, groups=player_groups(df, X).to_numpy())
+    entry["params"] = {k.removeprefix("regressor__"): v for k, v in entry["params"].items()}
+
+    print(f"   ✅ Best: {entry['params']}")
+    print(f"      CV R² {entry['cv_mean']:.4f} ± {entry['cv_std']:.4f}")
+    save_tuned_params("player", entry)
+    return entry
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# MATCH MODEL
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def tune_match_model(features_path: str = MATCH_FEATURES_PARQUET,
+                     backend: str = DEFAULT_MATCH_BACKEND,
+                     n_candidates: int = TUNING_CANDIDATES) -> dict:
+    """Successive-halving search over the match classifier (scored by AUC)."""
+    print("=" * 60)
+    print(f"🎛️  Tuning Match Win Model ({backend})")
+    print("=" * 60)
+
+    X, y, categorical_features, numeric_features = prepare_match_data(pd.read_parquet(features_path))
+    pipeline = build_match_pipeline(categorical_features, numeric_features, backend)
+    X_encoded, _ = cached_design_matrix("match", X, pipeline.named_steps["preprocessor"])
+
+    estimator = pipeline.named_steps["classifier"]
+    if "n_jobs" in estimator.get_params():
+        estimator.set_params(n_jobs=1)
+    cv = StratifiedKFold(n_splits=TUNING_CV_FOLDS, shuffle=True, random_state=42)
+
+    entry = _run_halving(estimator, MATCH_SEARCH_SPACES[backend], MATCH_BUDGET_PARAM[backend],
+                         X_encoded, y.to_numpy(), cv, "roc_auc", n_candidates)
+    entry["backend"] = backend
+
+    print(f"   ✅ Best: {entry['params']}")
+    print(f"      CV AUC {entry['cv_mean']:.4f} ± {entry['cv_std']:.4f}")
+    save_tuned_params("match", entry)
+    return entry
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RUN
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def run_tuning(target: str = "all", match_backend: str = DEFAULT_MATCH_BACKEND,
+               n_candidates: int = TUNING_CANDIDATES):
+    """Tune "player", "match" or "all" models."""
+    results = {}
+    if target in ("all", "player"):
+        results["player"] = tune_player_model(n_candidates=n_candidates)
+    if target in ("all", "match"):
+        results["match"] = tune_match_model(backend=match_backend, n_candidates=n_candidates)
+    print("\n✅ Tuning complete. Retrain with --step train to use the tuned configs.")
+    return results
+
+
+if __name__ == "__main__":
+    run_tuning()
@@ -0,0 +1,146 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.pipeline import Pipeline
+
+from ml_pipeline.compact_models import (
+    compact_path_for, compile_pipeline, load_model_artifact, parity_error, save_compact_artifact,
+)
+from ml_pipeline.model_training import build_match_pipeline, build_player_pipeline
+
+MAPS = ["Ascent", "Bind", "Haven", "Lotus"]
+AGENTS = ["Jett", "Omen", "Sova", "Killjoy", "Raze"]
+CATEGORICAL = ["map", "agent"]
+NUMERIC = ["kd_ratio", "adr_total", "kast_total", "hs_pct_total"]
+
+
+def synthetic_frame(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "map":          rng.choice(MAPS, n),
+        "agent":        rng.choice(AGENTS, n),
+        "kd_ratio":     rng.gamma(4, 0.25, n),
+        "adr_total":    rng.normal(140, 25, n),
+        "kast_total":   rng.uniform(55, 85, n),
+        "hs_pct_total": rng.uniform(15, 35, n),
+    })
+    map_effect = X["map"].map(dict(zip(MAPS, [0.05, -0.03, 0.0, 0.02])))
+    rating = 0.4 * X["kd_ratio"] + 0.003 * X["adr_total"] + map_effect + rng.normal(0, 0.05, n)
+    y_player = pd.DataFrame({"rating_total": rating, "acs_total": 120 * rating + rng.normal(0, 8, n)})
+    y_match = (rating + rng.normal(0, 0.1, n) > rating.median()).astype(int)
+    return X, y_player, y_match
+
+
+def fitted(kind):
+    X, y_player, y_match = synthetic_frame()
+    if kind in ("native", "wrapped"):
+        pipeline = build_player_pipeline(CATEGORICAL, NUMERIC, multioutput=kind,
+                                         params={"n_estimators": 20, "n_jobs": 1})
+        return pipeline.fit(X, y_player), X
+    params = {"n_estimators": 40} if kind in ("gb", "xgboost") else {"max_iter": 40}
+    if kind == "hist":
+        # Missing values exercise the learned missing-value direction
+        X = X.copy()
+        X.loc[X.index[::7], "adr_total"] = np.nan
+    return build_match_pipeline(CATEGORICAL, NUMERIC, backend=kind, params=params).fit(X, y_match), X
+
+
+@pytest.mark.parametrize("kind", ["native", "wrapped", "gb", "hist"])
+def test_parity_with_sklearn(kind):
+    pipeline, X = fitted(kind)
+    compact = compile_pipeline(pipeline)
+    assert parity_error(pipeline, compact, X) < 1e-6
+    # Single feature dicts take the same path as frames
+    row = X.iloc[0].to_dict()
+    assert np.allclose(compact.predict(row), compact.predict(X.iloc[[0]]))
+
+
+@pytest.mark.parametrize("kind", ["native", "wrapped", "gb", "hist"])
+def test_contributions_are_additive(kind):
+    pipeline, X = fitted(kind)
+    compact = compile_pipeline(pipeline)
+    expected, contributions = compact.feature_contributions(X)
+    assert contributions.shape[:2] == (len(X), len(compact.feature_names))
+
+    if compact.task == "regression":
+        raw = compact.predict(X)
+    else:
+        p = pipeline.predict_proba(X)[:, 1]
+        raw = np.log(p / (1 - p))[:, None]
+    assert np.allclose(expected + contributions.sum(axis=1), raw, atol=1e-6)
+
+
+def test_one_hot_columns_fold_onto_categoricals():
+    pipeline, X = fitted("native")
+    compact = compile_pipeline(pipeline)
+    assert compact.feature_names[:2] == CATEGORICAL
+
+    design = compact.ensemble.contributions(compact.preprocessor.transform(X))
+    _, contributions = compact.feature_contributions(X)
+    encoded = [str(n) for n in pipeline.named_steps["preprocessor"].get_feature_names_out()]
+    for f, feature in enumerate(compact.feature_names):
+        columns = [c for c, name in enumerate(encoded)
+                   if name.startswith(f"cat__{feature}_") or name == f"num__{feature}"]
+        assert columns
+        assert np.allclose(contributions[:, f], design[:, columns].sum(axis=1))
+
+    # explain() reports the categorical's input value, not a one-hot column
+    top = compact.explain(X.iloc[:5], top_k=len(compact.feature_names))
+    for r, per_output in enumerate(top):
+        for ranked in per_output:
+            values = dict((name, value) for name, value, _ in ranked)
+            assert values["map"] == X["map"].iloc[r] and values["agent"] == X["agent"].iloc[r]
+
+
+def test_forest_interval_matches_per_tree_predictions():
+    pipeline, X = fitted("native")
+    compact = compile_pipeline(pipeline)
+    X = X.iloc[:50]
+    pred, bounds = compact.predict_interval(X, (10, 90))
+    assert np.allclose(pred, pipeline.predict(X), atol=1e-6)
+
+    ttr = pipeline.named_steps["regressor"]
+    Z = pipeline.named_steps["preprocessor"].transform(X)
+    per_tree = np.stack([ttr.transformer_.inverse_transform(tree.predict(Z))
+                         for tree in ttr.regressor_.estimators_], axis=1)
+    assert np.allclose(bounds, np.percentile(per_tree, (10, 90), axis=1), atol=1e-6)
+
+
+def test_unsupported_estimator_falls_back_to_pickle(tmp_path):
+    pytest.importorskip("xgboost")
+    pipeline, X = fitted("xgboost")
+    with pytest.raises(ValueError):
+        compile_pipeline(pipeline)
+
+    model_path = str(tmp_path / "model.pkl")
+    joblib.dump(pipeline, model_path)
+    with open(compact_path_for(model_path), "w") as f:
+        f.write("stale")
+    assert save_compact_artifact(pipeline, model_path, X_check=X) is None
+    assert not os.path.exists(compact_path_for(model_path))
+
+    loaded = load_model_artifact(model_path)
+    assert isinstance(loaded, Pipeline)
+    assert np.allclose(loaded.predict_proba(X), pipeline.predict_proba(X))
+
+
+def test_saved_artifact_is_served(tmp_path):
+    pipeline, X = fitted("gb")
+    model_path = str(tmp_path / "model.pkl")
+    joblib.dump(pipeline, model_path)
+    assert save_compact_artifact(pipeline, model_path, X_check=X) == compact_path_for(model_path)
+    loaded = load_model_artifact(model_path)
+    assert not isinstance(loaded, Pipeline)
+    assert parity_error(pipeline, loaded, X) < 1e-6
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
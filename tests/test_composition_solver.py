@@ -0,0 +1,90 @@
+import itertools
+import os
+import random
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_pipeline.composition_solver import solve_compositions
+from ml_pipeline.config import AGENT_ROLE_MAP, ROLES, ROLE_BALANCE_BONUS
+
+AGENTS = sorted(a for a, role in AGENT_ROLE_MAP.items() if role in ROLES)
+
+
+def brute_force(options, top_k, role_limits=None, balance_bonus=ROLE_BALANCE_BONUS):
+    """Every distinct-agent assignment scored directly, best first."""
+    limits = role_limits or {}
+    scored = []
+    for combo in itertools.product(*[sorted(opts) for opts in options]):
+        if len(set(combo)) < len(combo):
+            continue
+        roles = [AGENT_ROLE_MAP[a] for a in combo]
+        if any(not lo <= roles.count(r) <= hi for r, (lo, hi) in limits.items()):
+            continue
+        score = sum(opts[a] for opts, a in zip(options, combo)) + balance_bonus * len(set(roles))
+        scored.append((score, list(combo)))
+    scored.sort(key=lambda s: -s[0])
+    return scored[:top_k]
+
+
+def random_options(rng, n_players, pool_size):
+    return [
+        {a: round(rng.uniform(0.6, 1.4), 6) for a in rng.sample(AGENTS, pool_size)}
+        for _ in range(n_players)
+    ]
+
+
+def assert_matches(got, expected, options, role_limits=None):
+    assert [round(s, 9) for s, _ in got] == [round(s, 9) for s, _ in expected]
+    for score, agents in got:
+        assert len(set(agents)) == len(agents)
+        assert all(a in opts for opts, a in zip(options, agents))
+        roles = [AGENT_ROLE_MAP[a] for a in agents]
+        for role, (lo, hi) in (role_limits or {}).items():
+            assert lo <= roles.count(role) <= hi
+        direct = sum(opts[a] for opts, a in zip(options, agents)) + ROLE_BALANCE_BONUS * len(set(roles))
+        assert abs(score - direct) < 1e-9
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(30):
+        options = random_options(rng, 5, rng.randint(3, 6))
+        got = solve_compositions(options, top_k=5)
+        assert_matches(got, brute_force(options, 5), options)
+
+
+def test_role_limits():
+    rng = random.Random(1)
+    limits = {"Duelist": (1, 1), "Controller": (1, 2), "Sentinel": (0, 1)}
+    for _ in range(30):
+        options = random_options(rng, 5, 6)
+        got = solve_compositions(options, top_k=5, role_limits=limits)
+        assert_matches(got, brute_force(options, 5, limits), options, limits)
+
+
+def test_infeasible_role_limits():
+    options = [{"Jett": 1.0, "Reyna": 0.9}] * 5
+    assert solve_compositions(options, role_limits={"Controller": (1, 5)}) == []
+
+
+def test_top_k_larger_than_feasible():
+    # Two players sharing a two-agent pool have exactly two assignments
+    options = [{"Jett": 1.2, "Sova": 1.0}, {"Jett": 0.9, "Sova": 1.1}]
+    got = solve_compositions(options, top_k=10)
+    expected = brute_force(options, 10)
+    assert len(expected) == 2
+    assert_matches(got, expected, options)
+
+
+def test_fewer_agents_than_players():
+    options = [{"Jett": 1.0, "Sova": 1.0}, {"Jett": 1.0}, {"Sova": 1.0}]
+    assert solve_compositions(options) == []
+    assert solve_compositions([]) == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,111 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_pipeline import feature_engineering
+from ml_pipeline.config import AGENT_ROLE_MAP, ROLES
+from ml_pipeline.feature_engineering import (
+    NUMERIC_STAT_COLS, PLAYER_GROUP_COLS,
+    build_match_features, build_match_features_chunked,
+    build_player_features, build_player_features_chunked,
+)
+from ml_pipeline.feature_engineering_duckdb import build_match_features_duckdb, build_player_features_duckdb
+
+MAPS = ["Ascent", "Bind", "Haven"]
+AGENTS = sorted(a for a, role in AGENT_ROLE_MAP.items() if role in ROLES)[:6]
+
+
+def synthetic_player_stats(n_matches=40, seed=0):
+    """
+    Player rows for a few best-of-3 matches: players recur across matches so
+    groups span many batches, some sides field only 4 players, and ~10% of the
+    stat values are missing.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for m in range(n_matches):
+        team_a, team_b = rng.choice([f"Team{t}" for t in range(6)], 2, replace=False)
+        for map_id in range(rng.integers(1, 4)):
+            winner = rng.choice([team_a, team_b])
+            map_name = rng.choice(MAPS)
+            for team in (team_a, team_b):
+                roster = int(team[4:]) * 5 + np.arange(5)
+                if rng.random() < 0.15:
+                    roster = roster[:4]
+                for p in roster:
+                    agent = rng.choice(AGENTS)
+                    rows.append({
+                        "match_id": f"m{m:03d}", "map_id": f"{map_id}", "map": map_name,
+                        "team": team, "team_a": team_a, "team_b": team_b, "winner": winner,
+                        "player_name": f"Player{p}", "agent": agent, "role": AGENT_ROLE_MAP[agent],
+                        "is_winner": int(team == winner),
+                    })
+
+    df = pd.DataFrame(rows)
+    for col in NUMERIC_STAT_COLS:
+        values = rng.gamma(4, 10, len(df))
+        values[rng.random(len(df)) < 0.1] = np.nan
+        df[col] = values
+    return df
+
+
+@pytest.fixture(scope="module")
+def player_stats():
+    return synthetic_player_stats()
+
+
+@pytest.fixture
+def stats_path(player_stats, tmp_path, monkeypatch):
+    # Spill partitions go to a scratch directory instead of ml_pipeline/data
+    monkeypatch.setattr(feature_engineering, "DATA_DIR", str(tmp_path))
+    path = str(tmp_path / "player_stats.parquet")
+    player_stats.to_parquet(path, index=False)
+    return path
+
+
+def assert_same_player_features(got, expected):
+    got = got.sort_values(PLAYER_GROUP_COLS, ignore_index=True)
+    expected = expected.sort_values(PLAYER_GROUP_COLS, ignore_index=True)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=1e-9, atol=1e-9)
+
+
+def assert_same_match_features(got, expected):
+    got = got.sort_values(["match_id", "map_id"], ignore_index=True)
+    expected = expected.sort_values(["match_id", "map_id"], ignore_index=True)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("batch_rows,num_partitions", [(7, 3), (64, 1), (100_000, 5)])
+def test_chunked_player_features_match_pandas(player_stats, stats_path, batch_rows, num_partitions):
+    expected = build_player_features(player_stats)
+    got = build_player_features_chunked(stats_path, batch_rows=batch_rows, num_partitions=num_partitions)
+    assert_same_player_features(got, expected)
+
+
+@pytest.mark.parametrize("batch_rows,num_partitions", [(7, 3), (64, 1), (100_000, 5)])
+def test_chunked_match_features_match_pandas(player_stats, stats_path, batch_rows, num_partitions):
+    expected = build_match_features(player_stats)
+    assert len(expected) < player_stats.groupby(["match_id", "map_id"]).ngroups  # 4-player sides dropped
+    got = build_match_features_chunked(stats_path, batch_rows=batch_rows, num_partitions=num_partitions)
+    assert_same_match_features(got, expected)
+
+
+def test_duckdb_features_match_pandas(player_stats, stats_path):
+    pytest.importorskip("duckdb")
+    # Same columns, row order and values — compared without re-sorting
+    pd.testing.assert_frame_equal(build_player_features_duckdb(stats_path, threads=2),
+                                  build_player_features(player_stats),
+                                  check_dtype=False, rtol=1e-9, atol=1e-9)
+    pd.testing.assert_frame_equal(build_match_features_duckdb(stats_path, threads=2),
+                                  build_match_features(player_stats),
+                                  check_dtype=False, rtol=1e-9, atol=1e-9)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
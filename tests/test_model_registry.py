@@ -0,0 +1,48 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_pipeline.model_registry import current_version, promote_model, promotion_history, rollback_model
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """A match registry with v0001..v0003 promoted in order."""
+    for version in ("v0001", "v0002", "v0003"):
+        os.makedirs(tmp_path / "match" / version)
+        (tmp_path / "match" / version / "manifest.json").write_text(json.dumps({"version": version}))
+        promote_model("match", version, str(tmp_path))
+    return str(tmp_path)
+
+
+def test_repeated_rollbacks_walk_back(registry):
+    assert rollback_model("match", registry_dir=registry) == "v0002"
+    assert rollback_model("match", registry_dir=registry) == "v0001"
+    with pytest.raises(ValueError):
+        rollback_model("match", registry_dir=registry)
+    assert current_version("match", registry) == "v0001"
+    assert [e.get("rolled_back_from") for e in promotion_history("match", registry)][-2:] == ["v0003", "v0002"]
+
+
+def test_promoting_again_clears_a_rollback(registry):
+    rollback_model("match", registry_dir=registry)           # v0003 → v0002
+    promote_model("match", "v0003", registry)                # v0003 is served again
+    assert rollback_model("match", registry_dir=registry) == "v0002"
+
+
+def test_rollback_to_explicit_version(registry):
+    assert rollback_model("match", to="v0001", registry_dir=registry) == "v0001"
+    assert current_version("match", registry) == "v0001"
+    with pytest.raises(ValueError):
+        rollback_model("match", to="v0001", registry_dir=registry)
+    with pytest.raises(ValueError):
+        rollback_model("match", to="v0009", registry_dir=registry)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_pipeline.name_index import PlayerNameIndex
+
+NAMES = ["TenZ", "Aspas", "Best", "Win", "yay", "Demon1", "cNed", "Jett", "Jeto"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return PlayerNameIndex(NAMES)
+
+
+def test_resolve(index):
+    assert index.resolve("tenz") == "TenZ"
+    assert index.resolve("TenZ.") == "TenZ"
+    assert index.resolve("aspa") == "Aspas"
+    assert index.resolve("xyzzy") is None
+
+
+def test_ambiguous_fuzzy_match_is_not_substituted(index):
+    # One edit from both Jett and Jeto
+    assert index.resolve("jet") is None
+    assert set(index.suggest("jet")) == {"Jett", "Jeto"}
+
+
+def test_common_words_are_not_players(index):
+    words = "who is the best team to win on bind".split()
+    assert [index.resolve_word(w) for w in words] == [None] * len(words)
+
+
+def test_words_shaped_like_names(index):
+    assert index.resolve_word("Best") == "Best"    # spelled as stored
+    assert index.resolve_word("yay") == "yay"
+    assert index.resolve_word("demon1") == "Demon1"  # digit
+    assert index.resolve_word("tenZ") == "TenZ"      # capital after the first letter
+    assert index.resolve_word("tenzz") is None       # no fuzzy matches for plain words
+
+
+def test_chatbot_skips_common_words(index):
+    spacy = pytest.importorskip("spacy")
+    try:
+        nlp = spacy.load("en_core_web_sm")
+    except OSError:
+        pytest.skip("en_core_web_sm is not installed")
+    from analytics_system.chatbot import ValorantChatbot
+
+    bot = ValorantChatbot.__new__(ValorantChatbot)
+    bot.nlp = nlp
+    bot.name_index = index
+    bot._not_players = {"bind", "jett"}
+    players = bot._extract_entities("who is the best player to win on bind?")["players"]
+    assert "Best" not in players and "Win" not in players
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
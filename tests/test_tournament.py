@@ -0,0 +1,209 @@
+import itertools
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_pipeline.tournament import _bracket_order, _double_elim, _single_elim, _swiss
+
+
+def random_probs(n, seed):
+    """Pairwise win probabilities with p[i, j] = 1 − p[j, i]."""
+    rng = np.random.default_rng(seed)
+    probs = np.full((n, n), 0.5)
+    for i, j in itertools.combinations(range(n), 2):
+        probs[i, j] = rng.uniform(0.2, 0.8)
+        probs[j, i] = 1 - probs[i, j]
+    return probs
+
+
+class RecordingRng:
+    """A Generator stand-in that keeps every block of uniforms it hands out."""
+
+    def __init__(self, seed):
+        self._rng = np.random.default_rng(seed)
+        self.draws = []
+
+    def random(self, shape):
+        draw = self._rng.random(shape)
+        self.draws.append(draw)
+        return draw
+
+
+# ═══ Swiss ═══
+
+def reference_swiss(entrants, probs, draws, wins_needed, losses_out):
+    """
+    One simulation played team by team: record groups in standings order,
+    odd groups float their lowest seed down, each group pairs its top half
+    against its bottom half, an odd team out gets a bye.
+    """
+    n = len(entrants)
+    wins, losses = [0] * n, [0] * n
+    for draw in draws:
+        active = [t for t in range(n) if wins[t] < wins_needed and losses[t] < losses_out]
+        if not active:
+            break
+        active.sort(key=lambda t: (-wins[t], losses[t], t))
+        groups, current = [], []
+        for t in active:
+            if current and (wins[current[-1]], losses[current[-1]]) != (wins[t], losses[t]):
+                if len(current) % 2:
+                    groups.append(current[:-1])
+                    current = [current[-1]]
+                else:
+                    groups.append(current)
+                    current = []
+            current.append(t)
+        groups.append(current)
+
+        pairs = []
+        for group in groups:
+            half = len(group) // 2
+            pairs += [(group[k], group[k + half]) for k in range(half)]
+            if len(group) % 2:
+                pairs.append((group[-1], None))
+        for k, (a, b) in enumerate(pairs):
+            if b is None:
+                wins[a] += 1
+            elif draw[k] < probs[entrants[a], entrants[b]]:
+                wins[a] += 1
+                losses[b] += 1
+            else:
+                wins[b] += 1
+                losses[a] += 1
+    return wins, losses
+
+
+@pytest.mark.parametrize("n,wins_needed,losses_out", [(6, 2, 2), (10, 2, 2), (12, 2, 2), (16, 3, 3)])
+def test_swiss_pairing_matches_reference(n, wins_needed, losses_out):
+    n_sims = 300
+    probs = random_probs(n, n)
+    rng = np.random.default_rng(n + 100)
+    entrants = np.array([rng.permutation(n) for _ in range(n_sims)])
+
+    recorder = RecordingRng(n)
+    advancers, _ = _swiss(entrants, probs, recorder, n, wins_needed, losses_out)
+    for s in range(n_sims):
+        wins, losses = reference_swiss(entrants[s], probs, [d[s] for d in recorder.draws],
+                                       wins_needed, losses_out)
+        assert set(advancers[s]) == {entrants[s][t] for t in range(n) if wins[t] == wins_needed}
+
+
+def test_swiss_records_at_even_odds():
+    # Every match is a coin flip, so each team's record is a negative binomial
+    n_sims = 100_000
+    probs = np.full((16, 16), 0.5)
+    entrants = np.tile(np.arange(16), (n_sims, 1))
+    _, details = _swiss(entrants, probs, np.random.default_rng(0), 16)
+    records = details["records"]
+    for record, expected in {"3-0": 1 / 8, "3-1": 3 / 16, "3-2": 6 / 32,
+                             "0-3": 1 / 8, "1-3": 3 / 16, "2-3": 6 / 32}.items():
+        assert abs(records[record].mean() - expected) < 0.003
+
+
+def test_swiss_favourite_advances():
+    # A team winning 90% of its series advances with P(3 wins before 3 losses)
+    n_sims = 100_000
+    probs = np.full((16, 16), 0.5)
+    probs[0, 1:], probs[1:, 0] = 0.9, 0.1
+    entrants = np.tile(np.arange(16), (n_sims, 1))
+    advancers, _ = _swiss(entrants, probs, np.random.default_rng(1), 16)
+    expected = 0.9 ** 3 * (1 + 3 * 0.1 + 6 * 0.1 ** 2)
+    assert abs((advancers == 0).any(axis=1).mean() - expected) < 0.003
+
+
+# ═══ Elimination brackets ═══
+
+def reference_double_elim(seeds, outcome):
+    """
+    Champion and runner-up of a double-elimination bracket where `outcome()`
+    decides each series (a, b, is_final) → winner, played team by team.
+    """
+    slots = [seeds[s] for s in _bracket_order(len(seeds))]
+    upper_losers = []
+    while len(slots) > 1:
+        results = [outcome(slots[k], slots[k + 1], False) for k in range(0, len(slots), 2)]
+        upper_losers.append([loser for _, loser in results])
+        slots = [winner for winner, _ in results]
+
+    first = upper_losers[0]
+    lower = [outcome(first[k], first[k + 1], False)[0] for k in range(0, len(first), 2)]
+    for dropped in upper_losers[1:]:
+        lower = [outcome(a, b, False)[0] for a, b in zip(lower, dropped[::-1])]
+        if len(lower) > 1:
+            lower = [outcome(lower[k], lower[k + 1], False)[0] for k in range(0, len(lower), 2)]
+    return outcome(slots[0], lower[0], True)
+
+
+def reference_single_elim(seeds, outcome):
+    slots = [seeds[s] for s in _bracket_order(len(seeds))]
+    while len(slots) > 1:
+        results = [outcome(slots[k], slots[k + 1], len(slots) == 2) for k in range(0, len(slots), 2)]
+        slots = [winner for winner, _ in results]
+        final = results[0]
+    return final
+
+
+def enumerate_bracket(reference, n, probs, final_probs, n_matches):
+    """Exact P(champion) and P(runner-up) per team over every series outcome."""
+    champion, runner_up = np.zeros(n), np.zeros(n)
+    for bits in itertools.product([True, False], repeat=n_matches):
+        weight, k = [1.0], iter(bits)
+
+        def outcome(a, b, is_final):
+            a_wins = next(k)
+            p = (final_probs if is_final else probs)[a, b]
+            weight[0] *= p if a_wins else 1 - p
+            return (a, b) if a_wins else (b, a)
+
+        won, lost = reference(list(range(n)), outcome)
+        champion[won] += weight[0]
+        runner_up[lost] += weight[0]
+    return champion, runner_up
+
+
+@pytest.mark.parametrize("n", [4, 8])
+def test_double_elim_matches_enumeration(n):
+    probs, final_probs = random_probs(n, 7), random_probs(n, 8)
+    n_matches = 2 * n - 2  # upper bracket n − 1, lower bracket n − 2, grand final 1
+    champion, runner_up = enumerate_bracket(reference_double_elim, n, probs, final_probs, n_matches)
+    assert abs(champion.sum() - 1) < 1e-12
+
+    n_sims = 200_000
+    entrants = np.tile(np.arange(n), (n_sims, 1))
+    advancers, details = _double_elim(entrants, probs, final_probs, np.random.default_rng(n), n, advance=2)
+    assert np.abs(np.bincount(advancers[:, 0], minlength=n) / n_sims - champion).max() < 0.005
+    assert np.abs(np.bincount(advancers[:, 1], minlength=n) / n_sims - runner_up).max() < 0.005
+    assert np.allclose(details["reached"]["Grand Final"], champion + runner_up, atol=0.01)
+
+
+def test_single_elim_matches_enumeration():
+    n = 8
+    probs, final_probs = random_probs(n, 9), random_probs(n, 10)
+    champion, runner_up = enumerate_bracket(reference_single_elim, n, probs, final_probs, n - 1)
+
+    n_sims = 200_000
+    entrants = np.tile(np.arange(n), (n_sims, 1))
+    advancers, _ = _single_elim(entrants, probs, final_probs, np.random.default_rng(11), n, advance=2)
+    assert np.abs(np.bincount(advancers[:, 0], minlength=n) / n_sims - champion).max() < 0.005
+    assert np.abs(np.bincount(advancers[:, 1], minlength=n) / n_sims - runner_up).max() < 0.005
+
+
+def test_bracket_sizes_are_checked():
+    entrants = np.tile(np.arange(6), (10, 1))
+    probs = np.full((6, 6), 0.5)
+    with pytest.raises(ValueError):
+        _single_elim(entrants, probs, probs, np.random.default_rng(0), 6)
+    with pytest.raises(ValueError):
+        _double_elim(entrants[:, :2], probs, probs, np.random.default_rng(0), 6)
+    with pytest.raises(ValueError):
+        _swiss(entrants[:, :5], probs, np.random.default_rng(0), 6)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))